@@ -10,6 +10,8 @@ from collections import deque
 from enum import Enum
 import os
 import math
+import argparse
+import sys
 
 # --- Configuración de Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='ergosanitas_saltos_mejorado.log')
@@ -31,6 +33,8 @@ try:
     ROM_OPTIMO_SALTO = config.get('rom_optimo_salto', {})
     PARAMETROS_SALTO = config.get('parametros_salto', {})
     NIVEL_USUARIO = config.get('nivel_usuario', {})
+    VISUALIZACION = config.get('visualizacion', {})
+    HEADLESS = config.get('headless', {})
 except FileNotFoundError:
     logging.error("config_Saltos.yaml no encontrado. Usando parámetros por defecto.")
     # Parámetros por defecto para saltos (tomados de Saltos.py)
@@ -89,6 +93,13 @@ except FileNotFoundError:
             'rango_minimo_cm': 90
         }
     }
+    VISUALIZACION = {
+        "tasa_render_hz": 60
+    }
+    HEADLESS = {}
+
+# Frames de historial cinemático que se conservan (~10 s a 30 fps); el gráfico muestra esta ventana
+VENTANA_HISTORIAL = 300
 
 # --- Enum para Estados de Salto (tomado de Saltos3.0.py) ---
 class EstadoSalto(Enum):
@@ -306,10 +317,10 @@ class AnalizadorSaltos:
         self.jump_height_m = 0
         self.tipo_salto = TipoSalto.CMJ  # Valor por defecto
 
-        self.historial_angulos_rodilla = [] # Para velocidad
-        self.historial_angulos_cadera = [] # Para velocidad
-        self.historial_pos_y_cadera = []
-        self.historial_tiempos = []
+        self.historial_angulos_rodilla = deque(maxlen=VENTANA_HISTORIAL) # Para velocidad
+        self.historial_angulos_cadera = deque(maxlen=VENTANA_HISTORIAL) # Para velocidad
+        self.historial_pos_y_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_tiempos = deque(maxlen=VENTANA_HISTORIAL)
         self.mensajes_feedback = []
 
         # Nuevas métricas
@@ -352,6 +363,10 @@ class AnalizadorSaltos:
         }
         self.px_to_m = 0
 
+        # Calibración robusta con varios frames; import diferido para no reemplazar el logging a archivo de este script
+        from jump_analyzer import AcumuladorCalibracion
+        self.acumulador_calibracion = AcumuladorCalibracion.desde_config()
+
     def set_tipo_salto(self, tipo_salto: TipoSalto):
         """Establece el tipo de salto a analizar"""
         self.tipo_salto = tipo_salto
@@ -425,6 +440,26 @@ class AnalizadorSaltos:
             self.calibrado = False
             return False
 
+    def calibrar_acumulado(self, lm):
+        """Agrega un frame a `acumulador_calibracion`; retorna True en el frame que completa la calibración"""
+        acumulador = self.acumulador_calibracion
+        if not acumulador.agregar(lm) or not acumulador.completo:
+            return False
+        dist_rodillas_px, mid_hip_initial_y_px, knee_x_diff = acumulador.estimacion
+        self.px_to_m = self.usuario.longitudes["distancia_rodillas"] / dist_rodillas_px
+        self.initial_hip_y = mid_hip_initial_y_px
+        self.initial_knee_x_diff = knee_x_diff
+        if not self.verificar_calibracion():
+            logging.error("Valores de calibración inválidos. Reiniciando calibración.")
+            self.calibrado = False
+            acumulador.reiniciar()
+            return False
+        self.calibrado = True
+        logging.info(f"Calibrado exitoso en {acumulador.frames} frames ({acumulador.inliers} inliers): "
+                     f"factor_px_m={self.px_to_m:.5f}, initial_hip_y={self.initial_hip_y:.5f}, "
+                     f"confianza={acumulador.confianza:.2f}, estabilidad={acumulador.estabilidad:.2f}")
+        return True
+
     def verificar_calibracion(self):
         """Verifica si la calibración es válida"""
         return self.px_to_m > 0.001 and self.initial_hip_y > 0
@@ -433,10 +468,10 @@ class AnalizadorSaltos:
         self.t0 = datetime.now()
         self.frame_count = 0
         self.buenos_frames = 0
-        self.historial_angulos_rodilla = []
-        self.historial_angulos_cadera = []
-        self.historial_pos_y_cadera = []
-        self.historial_tiempos = []
+        self.historial_angulos_rodilla = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_angulos_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_pos_y_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_tiempos = deque(maxlen=VENTANA_HISTORIAL)
         self.mensajes_feedback = [
             "ATENCION: Realice saltos solo si está en condiciones físicas",
             "Detenga el ejercicio si siente molestias o dolor"
@@ -606,14 +641,15 @@ class AnalizadorSaltos:
             return 0.0
         return ((altura_abalakov - altura_cmj) / altura_cmj) * 100
 
-    def verificar(self, lm):
+    def verificar(self, lm, timestamp=None):
+        """Analiza un frame. `timestamp` (segundos) permite usar el reloj del video en lugar del de pared"""
         if not self.calibrado:
             logging.warning("Verificación llamada sin calibrar.")
             return 0, False, {"error": "Sin calibrar", "feedback": "Sin calibrar"}
 
-        self.mensajes_feedback = []
+        self.mensajes_feedback.clear()
         self.frame_count += 1
-        current_time = time.time()
+        current_time = time.time() if timestamp is None else timestamp
         delta_time = current_time - self.ultimo_tiempo
         self.ultimo_tiempo = current_time
 
@@ -892,55 +928,154 @@ class AnalizadorSaltos:
         cos_angle = dot_product / denominator
         return np.degrees(np.arccos(np.clip(cos_angle, -1, 1)))
 
+# --- Recursos precalculados del HUD ---
+class RecursosHUD:
+    """Caché de recursos gráficos compartida por los widgets del HUD.
+
+    Cada recurso se construye una sola vez por clave (p. ej. tamaño del widget)
+    y se reutiliza en todos los frames siguientes.
+    """
+    _cache = {}
+
+    @classmethod
+    def obtener(cls, clave, construir):
+        recurso = cls._cache.get(clave)
+        if recurso is None:
+            recurso = construir()
+            cls._cache[clave] = recurso
+        return recurso
+
+    @classmethod
+    def limpiar(cls):
+        cls._cache.clear()
+
+    @classmethod
+    def degradado_potencia(cls, width, height):
+        """Degradado rojo/naranja/verde de la barra de potencia, de arriba hacia abajo"""
+        def construir():
+            # La fila j corresponde al nivel i = height - 1 - j contado desde la base
+            ratios = (height - 1 - np.arange(height)) / height
+            colores = np.empty((height, 3), dtype=np.uint8)
+            colores[:] = (0, 255, 0) # Verde
+            colores[ratios < 0.66] = (0, 165, 255) # Naranja
+            colores[ratios < 0.33] = (0, 0, 255) # Rojo
+            sprite = np.repeat(colores[:, np.newaxis, :], max(width - 3, 0), axis=1)
+            sprite.flags.writeable = False
+            return sprite
+        return cls.obtener(('degradado_potencia', width, height), construir)
+
+    @classmethod
+    def coordenadas_x_grafico(cls, graph_width, n_puntos):
+        """Abscisas (relativas al widget) de los puntos del gráfico de altura"""
+        def construir():
+            xs = (np.arange(n_puntos) * graph_width) // n_puntos
+            xs = xs.astype(np.int32)
+            xs.flags.writeable = False
+            return xs
+        return cls.obtener(('coordenadas_x_grafico', graph_width, n_puntos), construir)
+
+    @classmethod
+    def tamano_texto(cls, text, font_scale, thickness=2):
+        return cls.obtener(('texto', text, font_scale, thickness),
+                           lambda: cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0])
+
+def color_capa(img, color):
+    """Adapta un color BGR a la imagen destino (opaco si la imagen es una capa BGRA)"""
+    if img.ndim == 3 and img.shape[2] == 4:
+        return (*color[:3], 255)
+    return color
+
 # --- InterfazVisual (de Saltos.py, con ajustes) ---
 class InterfazVisual:
+    ERRORES_MONITOR = [
+        ("insufficient_cm_depth", "CM INSUF."),
+        ("prematura_extension", "EXTENSION PREM."),
+        ("rodillas_valgo_takeoff", "RODILLAS VALGO"),
+        ("insufficient_plantarflexion", "FALTA EMPUJE"),
+        ("stiff_landing", "ATERRIZAJE RIGIDO"),
+        ("landing_imbalance", "DESEQ. ATERRIZAJE"),
+        ("excessive_landing_impact", "IMPACTO EXCESIVO"),
+        ("trunk_lean_takeoff_landing", "TRONCO INCLINADO")
+    ]
+
+    AYUDA_TECLAS = [
+        "Teclas:",
+        "1-CMJ  2-SQJ  3-Abalakov",
+        "R-Reiniciar  Q-Salir",
+        "C-Recalibrar"
+    ]
+
     @staticmethod
     def dibujar_contenedor(img, text, x, y, width, height, bg_color, text_color, font_scale=0.8):
-        cv2.rectangle(img, (x, y), (x + width, y + height), bg_color, -1)
-        cv2.rectangle(img, (x, y), (x + width, y + height), (255, 255, 255), 2)
-        text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0]
+        InterfazVisual.dibujar_marco_contenedor(img, x, y, width, height, bg_color)
+        InterfazVisual.dibujar_texto_contenedor(img, text, x, y, width, height, text_color, font_scale)
+
+    @staticmethod
+    def dibujar_marco_contenedor(img, x, y, width, height, bg_color):
+        cv2.rectangle(img, (x, y), (x + width, y + height), color_capa(img, bg_color), -1)
+        cv2.rectangle(img, (x, y), (x + width, y + height), color_capa(img, (255, 255, 255)), 2)
+
+    @staticmethod
+    def dibujar_texto_contenedor(img, text, x, y, width, height, text_color, font_scale=0.8):
+        text_size = RecursosHUD.tamano_texto(text, font_scale)
         text_x = x + (width - text_size[0]) // 2
         text_y = y + (height + text_size[1]) // 2
-        cv2.putText(img, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_color, 2)
+        cv2.putText(img, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color_capa(img, text_color), 2)
 
     @staticmethod
     def dibujar_barra_potencia(img, potencia, x, y, width, height):
         cv2.rectangle(img, (x, y), (x + width, y + height), (50, 50, 50), -1)
         cv2.rectangle(img, (x, y), (x + width, y + height), (255, 255, 255), 2)
-        fill_height = int((potencia / 100) * height)
+        fill_height = min(int((potencia / 100) * height), height)
         if fill_height > 0:
-            for i in range(fill_height):
-                pos = y + height - i
-                ratio = i / height
-                if ratio < 0.33:
-                    color = (0, 0, 255) # Rojo
-                elif ratio < 0.66:
-                    color = (0, 165, 255) # Naranja
-                else:
-                    color = (0, 255, 0) # Verde
-                cv2.line(img, (x + 2, pos), (x + width - 2, pos), color, 2)
+            # Un único volcado del degradado precalculado en lugar de una línea por fila
+            sprite = RecursosHUD.degradado_potencia(width, height)
+            y0 = y + height - fill_height + 1
+            destino = img[max(y0, 0):y + height + 1, x + 2:x + width - 1]
+            destino[:] = sprite[height - fill_height + max(-y0, 0):][:destino.shape[0], :destino.shape[1]]
         cv2.putText(img, "EXPLOSIVIDAD", (x - 20, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         cv2.putText(img, f"{potencia:.0f}%", (x, y + height + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
     @staticmethod
     def dibujar_semaforo_tecnico(img, errores, x, y):
-        cv2.putText(img, "MONITOR TECNICO", (x, y - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-        errores_monitor = [
-            ("insufficient_cm_depth", "CM INSUF."),
-            ("prematura_extension", "EXTENSION PREM."),
-            ("rodillas_valgo_takeoff", "RODILLAS VALGO"),
-            ("insufficient_plantarflexion", "FALTA EMPUJE"),
-            ("stiff_landing", "ATERRIZAJE RIGIDO"),
-            ("landing_imbalance", "DESEQ. ATERRIZAJE"),
-            ("excessive_landing_impact", "IMPACTO EXCESIVO"),
-            ("trunk_lean_takeoff_landing", "TRONCO INCLINADO")
-        ]
-        for i, (error_key, error_text) in enumerate(errores_monitor):
+        InterfazVisual.dibujar_etiquetas_semaforo(img, x, y)
+        InterfazVisual.dibujar_luces_semaforo(img, errores, x, y)
+
+    @staticmethod
+    def dibujar_etiquetas_semaforo(img, x, y):
+        cv2.putText(img, "MONITOR TECNICO", (x, y - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color_capa(img, (255, 255, 0)), 1)
+        for i, (_, error_text) in enumerate(InterfazVisual.ERRORES_MONITOR):
+            cv2.putText(img, error_text, (x + 20, y + 10 + i*30), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color_capa(img, (255, 255, 255)), 1)
+
+    @staticmethod
+    def dibujar_luces_semaforo(img, errores, x, y):
+        for i, (error_key, _) in enumerate(InterfazVisual.ERRORES_MONITOR):
             color = (0, 255, 0) # Verde
             if errores.get(error_key, 0) > 0: # Si el contador de este error es mayor a 0
                 color = (0, 0, 255) # Rojo
-            cv2.circle(img, (x, y + i*30), 8, color, -1)
-            cv2.putText(img, error_text, (x + 20, y + 10 + i*30), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+            cv2.circle(img, (x, y + i*30), 8, color_capa(img, color), -1)
+
+    @staticmethod
+    def dibujar_panel_ayuda(img):
+        y_pos = 20
+        for text in InterfazVisual.AYUDA_TECLAS:
+            cv2.putText(img, text, (img.shape[1] - 200, y_pos), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color_capa(img, (255, 255, 100)), 1)
+            y_pos += 25
+
+    @staticmethod
+    def dibujar_depuracion(img, px_to_m, initial_hip_y, estado_salto: EstadoSalto, calibrado):
+        debug_info = [
+            f"px_to_m: {px_to_m:.5f}",
+            f"Hip Y: {initial_hip_y:.3f}",
+            f"Estado: {estado_salto.value}",
+            f"Calibrado: {calibrado}"
+        ]
+        y_debug = 300
+        for info in debug_info:
+            cv2.putText(img, info, (20, y_debug), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color_capa(img, (0, 255, 255)), 1)
+            y_debug += 25
 
     @staticmethod
     def dibujar_grafico_altura(img, historial_pos_y_cadera, initial_hip_y, px_to_m, jump_height_m_actual=0):
@@ -952,32 +1087,29 @@ class InterfazVisual:
         graph_width = 250
         start_x = w - graph_width - 20
         start_y = h - graph_height - 20
-        overlay = img.copy()
-        cv2.rectangle(overlay, (start_x, start_y), (start_x + graph_width, start_y + graph_height), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, img, 0.3, 0, img)
+
+        # Oscurecer solo la región del widget (equivale a mezclar 70% de negro), en el propio frame
+        roi = img[max(start_y, 0):start_y + graph_height + 1, max(start_x, 0):start_x + graph_width + 1]
+        if roi.size > 0:
+            cv2.convertScaleAbs(roi, dst=roi, alpha=0.3)
         cv2.rectangle(img, (start_x, start_y), (start_x + graph_width, start_y + graph_height), (255, 255, 255), 1)
 
-        data_to_plot = np.array(historial_pos_y_cadera)
+        data_to_plot = np.asarray(historial_pos_y_cadera, dtype=np.float64)
         min_y_data = np.min(data_to_plot)
         max_y_data = np.max(data_to_plot)
         
-        padding_y_px = 0.1 * graph_height
         effective_y_range = (max_y_data - min_y_data) + (0.2 * abs(initial_hip_y - min_y_data))
         if effective_y_range == 0: effective_y_range = 1
 
-        puntos = []
         max_points = 50
-        start_index = max(0, len(historial_pos_y_cadera) - max_points)
-        
-        for i in range(start_index, len(historial_pos_y_cadera)):
-            x = start_x + int((i - start_index) * graph_width / min(max_points, len(historial_pos_y_cadera) - start_index))
-            y_normalized = (historial_pos_y_cadera[i] - min_y_data) / effective_y_range
-            y = start_y + int((1 - y_normalized) * graph_height)
-            puntos.append((x, y))
-
-        if len(puntos) > 1:
-            for i in range(1, len(puntos)):
-                cv2.line(img, puntos[i-1], puntos[i], (0, 255, 0), 2)
+        ultimos = data_to_plot[-max_points:]
+        xs = RecursosHUD.coordenadas_x_grafico(graph_width, len(ultimos))
+        ys = ((1 - (ultimos - min_y_data) / effective_y_range) * graph_height).astype(np.int32)
+
+        puntos = np.empty((len(ultimos), 2), dtype=np.int32)
+        puntos[:, 0] = xs + start_x
+        puntos[:, 1] = ys + start_y
+        cv2.polylines(img, [puntos], False, (0, 255, 0), 2)
         
         ref_y_normalized = (initial_hip_y - min_y_data) / effective_y_range
         ref_y_px_on_graph = start_y + int((1 - ref_y_normalized) * graph_height)
@@ -1055,8 +1187,327 @@ class InterfazVisual:
         except Exception as e:
             logging.warning(f"Error dibujando guías visuales: {e}")
 
+# --- Compositor del HUD ---
+class CompositorHUD:
+    """Compone el HUD sobre cada frame a partir de una capa BGRA en caché.
+
+    Los elementos estáticos (panel de ayuda, etiquetas del monitor técnico y
+    marcos de los contadores) se dibujan una sola vez por tamaño de frame. Los
+    dinámicos se agrupan en paneles (cada contador, semáforo y feedback) y cuando
+    cambian los valores de uno solo se reconstruye su región de la capa. En
+    cada frame el HUD se aplica con una única copia enmascarada; los valores de
+    depuración cambian en cada frame y se dibujan aparte, sobre el frame.
+    """
+
+    # (x, y, ancho, alto, fondo, escala) de los contadores del marcador
+    CONTENEDORES = [
+        (20, 20, 200, 40, (20, 20, 160), 0.8),
+        (20, 70, 200, 40, (20, 160, 20), 0.8),
+        (20, 120, 200, 40, (160, 20, 20), 0.8),
+        (20, 170, 200, 40, (160, 160, 20), 0.8),
+        (20, 220, 200, 40, (100, 100, 100), 0.6)
+    ]
+
+    PANELES = ('saltos', 'correctos', 'estado', 'altura', 'tipo', 'semaforo', 'feedback')
+
+    def __init__(self):
+        self._tamano = None
+        self._base_ayuda = None
+        self._base_marcador = None
+        self._lienzo = None
+        self._capa = None
+        self._mascara = None
+        self._regiones = {}
+        self._region_ayuda = None
+        self._firmas = {}
+        self.reconstrucciones = 0
+
+    def componer(self, frame, analizador=None, mostrar_marcador=False):
+        h, w = frame.shape[:2]
+        if self._tamano != (h, w):
+            self._preparar_bases(w, h)
+
+        firmas = self._firmas_paneles(analizador, mostrar_marcador)
+        sucios = [panel for panel in self.PANELES if firmas[panel] != self._firmas.get(panel)]
+        if sucios:
+            self._reconstruir(firmas, sucios, mostrar_marcador, w)
+
+        # Una sola copia enmascarada (SIMD en OpenCV) directamente sobre el frame
+        cv2.copyTo(self._capa, self._mascara, frame)
+
+    def _preparar_bases(self, w, h):
+        self._tamano = (h, w)
+        self._firmas = {}
+
+        self._base_ayuda = np.zeros((h, w, 4), dtype=np.uint8)
+        InterfazVisual.dibujar_panel_ayuda(self._base_ayuda)
+
+        self._base_marcador = self._base_ayuda.copy()
+        for x, y, ancho, alto, fondo, _ in self.CONTENEDORES:
+            InterfazVisual.dibujar_marco_contenedor(self._base_marcador, x, y, ancho, alto, fondo)
+        InterfazVisual.dibujar_etiquetas_semaforo(self._base_marcador, w - 250, 50)
+        # Se vuelve a dibujar la ayuda encima, como en el orden original del HUD
+        InterfazVisual.dibujar_panel_ayuda(self._base_marcador)
+
+        # Región (y0, y1, x0, x1) que cubre todo lo que dibuja cada panel,
+        # incluidas las diferencias entre las dos bases
+        self._regiones = {
+            panel: (y - 4, y + alto + 4, x - 4, x + ancho + 6)
+            for panel, (x, y, ancho, alto, _, _) in zip(self.PANELES, self.CONTENEDORES)
+        }
+        self._regiones.update({
+            'semaforo': (10, 280, max(w - 262, 0), w),
+            'feedback': (max(h - 104, 0), max(h - 10, 0), 16, 326),
+        })
+        # En frames pequeños las regiones se recortan al frame (y pueden quedar vacías)
+        self._regiones = {panel: (min(y0, h), min(y1, h), min(x0, w), min(x1, w))
+                          for panel, (y0, y1, x0, x1) in self._regiones.items()}
+        self._region_ayuda = (0, 30 + 25 * len(InterfazVisual.AYUDA_TECLAS), max(w - 202, 0), w)
+        self._lienzo = self._base_ayuda.copy()
+        self._capa = np.zeros((h, w, 3), dtype=np.uint8)
+        self._mascara = np.zeros((h, w), dtype=np.uint8)
+        self._convertir(self._lienzo, self._capa, self._mascara)
+
+    def _firmas_paneles(self, analizador, mostrar_marcador):
+        if not mostrar_marcador:
+            return dict.fromkeys(self.PANELES)
+        return {
+            'saltos': f"Saltos: {analizador.contador}",
+            'correctos': f"Correctos: {analizador.correctas}",
+            'estado': f"Estado: {analizador.estado.value.replace('_', ' ').upper()}",
+            'altura': f"Altura Salto: {analizador.jump_height_m:.2f}m",
+            'tipo': f"Tipo: {analizador.tipo_salto.value}",
+            'semaforo': tuple(analizador.errores.get(clave, 0) > 0 for clave, _ in InterfazVisual.ERRORES_MONITOR),
+            'feedback': tuple(analizador.mensajes_feedback[-3:]),
+        }
+
+    def _dibujar_panel(self, panel, firma, w):
+        if firma is None:
+            return
+        if panel == 'semaforo':
+            errores = {clave: int(activo) for (clave, _), activo in zip(InterfazVisual.ERRORES_MONITOR, firma)}
+            InterfazVisual.dibujar_luces_semaforo(self._lienzo, errores, w - 250, 50)
+        elif panel == 'feedback':
+            y_offset_feedback = self._lienzo.shape[0] - 100
+            for i, msg in enumerate(firma):
+                InterfazVisual.dibujar_contenedor(self._lienzo, msg, 20, y_offset_feedback + i * 30, 300, 25, (50,50,50), (255,255,255), 0.6)
+        else:
+            x, y, ancho, alto, _, escala = self.CONTENEDORES[self.PANELES.index(panel)]
+            InterfazVisual.dibujar_texto_contenedor(self._lienzo, firma, x, y, ancho, alto, (255, 255, 255), escala)
+
+    def _reconstruir(self, firmas, sucios, mostrar_marcador, w):
+        base = self._base_marcador if mostrar_marcador else self._base_ayuda
+        regiones = [self._regiones[panel] for panel in sucios]
+        for y0, y1, x0, x1 in regiones:
+            self._lienzo[y0:y1, x0:x1] = base[y0:y1, x0:x1]
+
+        # Se redibujan (en el orden original) los paneles que tocan alguna región
+        # restaurada, por si se solapan; fuera de ellas el lienzo no se vuelve a
+        # convertir hasta que su región se restaure
+        for panel in self.PANELES:
+            if any(self._solapan(self._regiones[panel], region) for region in regiones):
+                self._dibujar_panel(panel, firmas[panel], w)
+        if mostrar_marcador and any(self._solapan(self._region_ayuda, region) for region in regiones):
+            InterfazVisual.dibujar_panel_ayuda(self._lienzo)
+
+        for y0, y1, x0, x1 in regiones:
+            if y0 == y1 or x0 == x1:
+                continue
+            self._convertir(self._lienzo[y0:y1, x0:x1], self._capa[y0:y1, x0:x1], self._mascara[y0:y1, x0:x1])
+        self._firmas = firmas
+        self.reconstrucciones += 1
+
+    @staticmethod
+    def _solapan(a, b):
+        return a[0] < b[1] and b[0] < a[1] and a[2] < b[3] and b[2] < a[3]
+
+    @staticmethod
+    def _convertir(lienzo, capa, mascara):
+        # Píxeles semitransparentes (texto suavizado): recuperar su color pleno y
+        # decidir por umbral, ya que la copia enmascarada no mezcla
+        alfa = cv2.extractChannel(lienzo, 3)
+        capa[:] = cv2.divide(cv2.cvtColor(lienzo, cv2.COLOR_BGRA2BGR), cv2.merge([alfa, alfa, alfa]), scale=255)
+        mascara[:] = cv2.threshold(alfa, 127, 255, cv2.THRESH_BINARY)[1]
+
+# --- Resumen y guardado de resultados (modo interactivo y headless) ---
+def imprimir_resumen(perfil, resultados_finales):
+    print("\n=== RESUMEN DE LA SESIÓN DE SALTOS ===")
+    print(f"Usuario: {perfil.nombre}")
+    print(f"Edad: {perfil.edad} años | Sexo: {perfil.sexo}")
+    print(f"Peso: {perfil.peso_kg} kg | Altura: {perfil.altura_m:.2f} m")
+    print(f"IMC: {perfil.imc:.1f} | Nivel: {perfil.nivel_actividad.capitalize()}")
+    print(f"Tipo de salto: {resultados_finales['tipo_salto']}")
+    print(f"Duración: {resultados_finales['duracion']}")
+    print(f"Total de saltos: {resultados_finales['total']}")
+    print(f"Saltos correctos: {resultados_finales['correctas']}")
+    print(f"Precisión: {resultados_finales['precision']:.1f}%")
+    print(f"Altura de Salto Promedio: {resultados_finales['altura_salto_promedio']:.2f}m ({resultados_finales['altura_salto_promedio']*100:.1f}cm)")
+    print(f"Potencia Promedio: {resultados_finales['potencia_promedio']:.1f} Watts")
+    print(f"Tiempo de Vuelo Promedio: {resultados_finales['tiempo_vuelo_promedio']:.3f}s")
+    print(f"Clasificación: {resultados_finales['clasificacion']}")
+    print(f"Evaluación de Rendimiento: {resultados_finales['evaluacion_rendimiento']}")
+    print(f"Puntuación Técnica: {resultados_finales['puntuacion_tecnica']:.1f}/100")
+    print(f"Frames analizados: {resultados_finales['frames_analizados']} | Renderizados: {resultados_finales['frames_renderizados']} | Sin renderizar: {resultados_finales['frames_render_descartados']}")
+    
+    print("\n=== ERRORES DETECTADOS ===")
+    for error, count in resultados_finales['errores'].items():
+        if count > 0:
+            print(f"- {error.replace('_', ' ').capitalize()}: {count} veces")
+    
+    print("\n=== RECOMENDACIONES ===")
+    for i, rec in enumerate(resultados_finales['recomendaciones'], 1):
+        print(f"{i}. {rec}")
+
+def guardar_resultados(perfil, resultados_finales, filename=None):
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"saltos_{perfil.nombre.replace(' ', '_')}_{timestamp}.json"
+
+    try:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(resultados_finales, f, indent=2, ensure_ascii=False)
+        print(f"\n=== RESULTADOS GUARDADOS ===")
+        print(f"Archivo: {filename}")
+        logging.info(f"Resultados guardados en {filename}")
+        return True
+    except Exception as e:
+        print(f"Error al guardar: {e}")
+        logging.error(f"Error al guardar resultados: {e}")
+        return False
+
+# --- Modo headless (servidores sin pantalla) ---
+TIPOS_SALTO_CLI = {"cmj": TipoSalto.CMJ, "sqj": TipoSalto.SQJ, "abalakov": TipoSalto.ABALAKOV}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis biomecánico de saltos - Ergo SaniTas SpA")
+    parser.add_argument("--headless", action="store_true",
+                        help="Sin ventanas, teclado ni dibujo: perfil y tipo de salto por CLI o config_Saltos.yaml")
+    parser.add_argument("--perfil", default=HEADLESS.get('perfil', "perfil_usuario.json"),
+                        help="Archivo JSON del perfil de usuario")
+    parser.add_argument("--tipo", choices=sorted(TIPOS_SALTO_CLI), default=HEADLESS.get('tipo_salto', "cmj"),
+                        help="Tipo de salto a analizar")
+    parser.add_argument("--fuente", default=str(HEADLESS.get('fuente', 0)),
+                        help="Índice de cámara o ruta de un archivo de video")
+    parser.add_argument("--salida", default=HEADLESS.get('salida'),
+                        help="Archivo JSON de resultados (por defecto saltos_<nombre>_<fecha>.json)")
+    parser.add_argument("--video-anotado", default=HEADLESS.get('video_anotado'),
+                        help="Guardar el video con el HUD dibujado en esta ruta (opcional)")
+    parser.add_argument("--max-frames", type=int, default=HEADLESS.get('max_frames', 0),
+                        help="Detener tras N frames (0 = hasta el final de la fuente)")
+    parser.add_argument("--perfil-memoria", type=float, default=0, metavar="SEGUNDOS",
+                        help="Snapshots de memoria (tracemalloc) cada N segundos en memoria_<fecha>.jsonl (0 = desactivado)")
+    return parser.parse_args(argv)
+
+def iniciar_monitor_memoria(intervalo_s, analizador):
+    """Arranca el perfilado de memoria si se pidió; retorna el monitor o None"""
+    if intervalo_s <= 0:
+        return None
+    from memory_monitor import MonitorMemoria
+    monitor = MonitorMemoria(intervalo_s=intervalo_s, archivo=f"memoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    monitor.registrar('analizador', analizador)
+    monitor.start()
+    return monitor
+
+def abrir_fuente(fuente):
+    """Abre una cámara (índice numérico) o un archivo de video. Devuelve (cap, es_archivo)"""
+    if fuente.isdigit():
+        return cv2.VideoCapture(int(fuente)), False
+    return cv2.VideoCapture(fuente), True
+
+def ejecutar_headless(args):
+    perfil = UsuarioPerfil.cargar_perfil(args.perfil)
+    if perfil is None:
+        logging.error(f"Modo headless: no se pudo cargar el perfil {args.perfil}")
+        print(f"Error: perfil no encontrado o inválido: {args.perfil}")
+        return 2
+
+    cap, es_archivo = abrir_fuente(args.fuente)
+    if not cap.isOpened():
+        logging.error(f"Modo headless: no se pudo abrir la fuente {args.fuente}")
+        print(f"Error: no se pudo abrir la fuente {args.fuente}")
+        return 1
+
+    mp_pose = mp.solutions.pose
+    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    analizador_saltos = AnalizadorSaltos(perfil)
+    analizador_saltos.set_tipo_salto(TIPOS_SALTO_CLI[args.tipo])
+    analizador_saltos.iniciar()
+    monitor_memoria = iniciar_monitor_memoria(args.perfil_memoria, analizador_saltos)
+
+    escritor = None
+    compositor = CompositorHUD() if args.video_anotado else None
+
+    calibrando = True
+    frames_analizados = 0
+    t_inicio = time.perf_counter()
+
+    try:
+        while args.max_frames <= 0 or frames_analizados < args.max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # En archivos se usa el reloj del video: el análisis corre más rápido que el tiempo real
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 if es_archivo else None
+
+            if not es_archivo:
+                frame = cv2.flip(frame, 1)
+            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            results = pose.process(image_rgb)
+            frames_analizados += 1
+
+            lm = results.pose_landmarks.landmark if results.pose_landmarks else None
+
+            if calibrando and lm:
+                if analizador_saltos.calibrar_acumulado(lm):
+                    calibrando = False
+                    analizador_saltos.ultimo_tiempo = time.time() if timestamp is None else timestamp
+                    logging.info("Calibración completada (headless).")
+            elif not calibrando and lm:
+                analizador_saltos.verificar(lm, timestamp)
+
+            if compositor is not None:
+                if escritor is None:
+                    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+                    h, w = frame.shape[:2]
+                    escritor = cv2.VideoWriter(args.video_anotado, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+                if lm:
+                    mp.solutions.drawing_utils.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+                compositor.componer(frame, analizador_saltos, mostrar_marcador=(not calibrando and lm is not None))
+                if lm and not calibrando:
+                    InterfazVisual.dibujar_barra_potencia(frame, analizador_saltos.potencia, frame.shape[1] - 80, 50, 40, 200)
+                    InterfazVisual.dibujar_grafico_altura(frame, analizador_saltos.historial_pos_y_cadera, analizador_saltos.initial_hip_y, analizador_saltos.px_to_m, analizador_saltos.jump_height_m)
+                    InterfazVisual.dibujar_guias_visuales(frame, lm, analizador_saltos.estado, analizador_saltos)
+                escritor.write(frame)
+    except KeyboardInterrupt:
+        logging.info("Modo headless interrumpido por el usuario.")
+    finally:
+        cap.release()
+        if escritor is not None:
+            escritor.release()
+        pose.close()
+        if monitor_memoria is not None:
+            monitor_memoria.stop()
+
+    duracion_proceso = time.perf_counter() - t_inicio
+    resultados_finales = analizador_saltos.finalizar()
+    resultados_finales['frames_analizados'] = frames_analizados
+    resultados_finales['frames_renderizados'] = frames_analizados if compositor is not None else 0
+    resultados_finales['frames_render_descartados'] = 0
+    resultados_finales['fps_analisis'] = frames_analizados / duracion_proceso if duracion_proceso > 0 else 0
+    resultados_finales['calibrado'] = not calibrando
+
+    logging.info(f"Headless: {frames_analizados} frames en {duracion_proceso:.1f}s ({resultados_finales['fps_analisis']:.1f} fps)")
+    imprimir_resumen(perfil, resultados_finales)
+    return 0 if guardar_resultados(perfil, resultados_finales, args.salida) else 1
+
 # --- Main execution loop ---
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    if args.headless:
+        return ejecutar_headless(args)
+
     # Mostrar instrucciones iniciales
     print("\n" + "="*50)
     print("   INSTRUCCIONES PARA UN ANÁLISIS PRECISO")
@@ -1072,12 +1523,12 @@ def main():
     input("Presione ENTER para comenzar...")
 
     # 1. Configuración de perfil de usuario
-    perfil = UsuarioPerfil.cargar_perfil()
+    perfil = UsuarioPerfil.cargar_perfil(args.perfil)
     if perfil is None:
         perfil = UsuarioPerfil()
         perfil.obtener_datos_usuario()
 
-    cap = cv2.VideoCapture(0)
+    cap, _ = abrir_fuente(args.fuente)
 
     if not cap.isOpened():
         print("Error: No se pudo abrir la cámara.")
@@ -1107,11 +1558,19 @@ def main():
         analizador_saltos.set_tipo_salto(TipoSalto.CMJ)
 
     calibrando = True
-    calibracion_frames = 0
-    max_calib_frames = 60
     debug_mode = True  # Modo depuración activado
+    compositor = CompositorHUD()
+
+    # El análisis corre en cada frame capturado; el dibujo y la ventana solo a la tasa de la pantalla
+    tasa_render = VISUALIZACION.get('tasa_render_hz', 60)
+    periodo_render = 1.0 / tasa_render if tasa_render and tasa_render > 0 else 0.0
+    proximo_render = time.perf_counter()
+    frames_analizados = 0
+    frames_renderizados = 0
+    frames_render_descartados = 0
 
     analizador_saltos.iniciar()
+    monitor_memoria = iniciar_monitor_memoria(args.perfil_memoria, analizador_saltos)
 
     while cap.isOpened():
         ret, frame = cap.read()
@@ -1122,99 +1581,87 @@ def main():
         frame = cv2.flip(frame, 1)
         image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = pose.process(image_rgb)
+        frames_analizados += 1
+
+        ahora = time.perf_counter()
+        renderizar = ahora >= proximo_render
+        if renderizar:
+            proximo_render = max(proximo_render + periodo_render, ahora)
+            frames_renderizados += 1
+        else:
+            frames_render_descartados += 1
 
         lm = None
         if results.pose_landmarks:
-            mp.solutions.drawing_utils.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                                                     mp.solutions.drawing_utils.DrawingSpec(color=(245,117,66), thickness=2, circle_radius=2),
-                                                     mp.solutions.drawing_utils.DrawingSpec(color=(245,66,230), thickness=2, circle_radius=2))
+            if renderizar:
+                mp.solutions.drawing_utils.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
+                                                         mp.solutions.drawing_utils.DrawingSpec(color=(245,117,66), thickness=2, circle_radius=2),
+                                                         mp.solutions.drawing_utils.DrawingSpec(color=(245,66,230), thickness=2, circle_radius=2))
             lm = results.pose_landmarks.landmark
 
+        # El HUD en caché (panel de ayuda permanente y marcador) se compone tras
+        # analizar el frame y antes del resto del dibujo, para no tapar el
+        # gráfico de altura, las guías ni los mensajes
         if calibrando and lm:
-            if analizador_saltos.calibrar(lm):
-                calibracion_frames += 1
-                progress = int(calibracion_frames / max_calib_frames * 100)
-                msg = f"CALIBRANDO... {progress}% - Mantenga posición estable"
-                InterfazVisual.dibujar_contenedor(frame, msg, 50, 50, 600, 50, (0, 255, 255), (0,0,0))
-                
-                # Dibujar guía visual de posición
-                h, w = frame.shape[:2]
-                cv2.putText(frame, "MANTENGA ESTA POSICION", (w//2 - 150, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                cv2.putText(frame, "Pies al ancho de hombros", (w//2 - 120, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
-                cv2.putText(frame, "Brazos ligeramente separados", (w//2 - 140, 85), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
+            calibracion_completa = analizador_saltos.calibrar_acumulado(lm)
+            if renderizar:
+                compositor.componer(frame, analizador_saltos)
+            if analizador_saltos.acumulador_calibracion.muestra_aceptada:
+                if renderizar:
+                    progress = int(analizador_saltos.acumulador_calibracion.estado()['progreso'] * 100)
+                    msg = f"CALIBRANDO... {progress}% - Mantenga posición estable"
+                    InterfazVisual.dibujar_contenedor(frame, msg, 50, 50, 600, 50, (0, 255, 255), (0,0,0))
+                    
+                    # Dibujar guía visual de posición
+                    h, w = frame.shape[:2]
+                    cv2.putText(frame, "MANTENGA ESTA POSICION", (w//2 - 150, 30), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                    cv2.putText(frame, "Pies al ancho de hombros", (w//2 - 120, 60), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
+                    cv2.putText(frame, "Brazos ligeramente separados", (w//2 - 140, 85), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 0), 1)
                 
-                if calibracion_frames >= max_calib_frames:
+                if calibracion_completa:
                     calibrando = False
                     logging.info("Calibración completada.")
                     InterfazVisual.dibujar_contenedor(frame, "CALIBRACION COMPLETA. ¡Comienza a saltar!", 50, 50, 600, 50, (0, 255, 0), (0,0,0))
                     cv2.waitKey(1500)
             else:
-                InterfazVisual.dibujar_contenedor(frame, "ERROR CALIBRACION: Asegurate de estar visible y quieto.", 50, 50, 600, 50, (0, 0, 255), (255,255,255))
-                calibracion_frames = 0
+                if renderizar:
+                    InterfazVisual.dibujar_contenedor(frame, "ERROR CALIBRACION: Asegurate de estar visible y quieto.", 50, 50, 600, 50, (0, 0, 255), (255,255,255))
 
         elif not calibrando and lm:
             angle_rodilla, postura_ok, detalles_salto = analizador_saltos.verificar(lm)
             
-            # Dibujar contadores y estado
-            InterfazVisual.dibujar_contenedor(frame, f"Saltos: {analizador_saltos.contador}", 20, 20, 200, 40, (20, 20, 160), (255, 255, 255))
-            InterfazVisual.dibujar_contenedor(frame, f"Correctos: {analizador_saltos.correctas}", 20, 70, 200, 40, (20, 160, 20), (255, 255, 255))
-            InterfazVisual.dibujar_contenedor(frame, f"Estado: {analizador_saltos.estado.value.replace('_', ' ').upper()}", 20, 120, 200, 40, (160, 20, 20), (255, 255, 255))
-            InterfazVisual.dibujar_contenedor(frame, f"Altura Salto: {analizador_saltos.jump_height_m:.2f}m", 20, 170, 200, 40, (160, 160, 20), (255, 255, 255))
-            InterfazVisual.dibujar_contenedor(frame, f"Tipo: {analizador_saltos.tipo_salto.value}", 20, 220, 200, 40, (100, 100, 100), (255, 255, 255), 0.6)
-            
-            # Dibujar barra de potencia
-            InterfazVisual.dibujar_barra_potencia(frame, analizador_saltos.potencia, frame.shape[1] - 80, 50, 40, 200)
+            if renderizar:
+                # Contadores, estado, semáforo técnico y feedback los aplica el compositor del HUD
+                compositor.componer(frame, analizador_saltos, mostrar_marcador=True)
 
-            # Dibujar semáforo técnico
-            InterfazVisual.dibujar_semaforo_tecnico(frame, analizador_saltos.errores, frame.shape[1] - 250, 50)
+                # Dibujar barra de potencia
+                InterfazVisual.dibujar_barra_potencia(frame, analizador_saltos.potencia, frame.shape[1] - 80, 50, 40, 200)
 
-            # Dibujar gráfico de altura de cadera
-            InterfazVisual.dibujar_grafico_altura(frame, analizador_saltos.historial_pos_y_cadera, analizador_saltos.initial_hip_y, analizador_saltos.px_to_m, analizador_saltos.jump_height_m)
-            
-            # Dibujar guías visuales
-            InterfazVisual.dibujar_guias_visuales(frame, lm, analizador_saltos.estado, analizador_saltos)
-
-            # Mostrar mensajes de feedback
-            y_offset_feedback = frame.shape[0] - 100
-            for i, msg in enumerate(analizador_saltos.mensajes_feedback[-3:]):
-                InterfazVisual.dibujar_contenedor(frame, msg, 20, y_offset_feedback + i * 30, 300, 25, (50,50,50), (255,255,255), 0.6)
+                # Dibujar gráfico de altura de cadera
+                InterfazVisual.dibujar_grafico_altura(frame, analizador_saltos.historial_pos_y_cadera, analizador_saltos.initial_hip_y, analizador_saltos.px_to_m, analizador_saltos.jump_height_m)
+                
+                # Dibujar guías visuales
+                InterfazVisual.dibujar_guias_visuales(frame, lm, analizador_saltos.estado, analizador_saltos)
 
-        elif not lm:
+        elif not lm and renderizar:
+            compositor.componer(frame, analizador_saltos)
             InterfazVisual.dibujar_contenedor(frame, "AJUSTE SU POSICION", 50, 50, 600, 50, (255, 165, 0), (255,255,255))
             cv2.putText(frame, "Asegure que todo su cuerpo sea visible", (100, 120), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
             cv2.putText(frame, "Alejese/acerquese a la camara si es necesario", (100, 150), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+        if not renderizar:
+            # Frame solo analizado: sin dibujo, ventana ni lectura de teclado
+            continue
             
-        # Dibujar panel de ayuda permanente
-        help_text = [
-            "Teclas:",
-            "1-CMJ  2-SQJ  3-Abalakov",
-            "R-Reiniciar  Q-Salir",
-            "C-Recalibrar"
-        ]
-        y_pos = 20
-        for text in help_text:
-            cv2.putText(frame, text, (frame.shape[1] - 200, y_pos), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 100), 1)
-            y_pos += 25
-            
-        # Modo depuración: mostrar valores clave
+        # Modo depuración: valores que cambian en cada frame, fuera de la capa en caché
         if debug_mode and lm:
-            debug_info = [
-                f"px_to_m: {analizador_saltos.px_to_m:.5f}",
-                f"Hip Y: {analizador_saltos.initial_hip_y:.3f}",
-                f"Estado: {analizador_saltos.estado.value}",
-                f"Calibrado: {analizador_saltos.calibrado}"
-            ]
-            y_debug = 300
-            for info in debug_info:
-                cv2.putText(frame, info, (20, y_debug), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-                y_debug += 25
+            InterfazVisual.dibujar_depuracion(frame, analizador_saltos.px_to_m, analizador_saltos.initial_hip_y,
+                                              analizador_saltos.estado, analizador_saltos.calibrado)
 
         cv2.imshow('Deteccion de Saltos', frame)
 
@@ -1225,13 +1672,13 @@ def main():
             print("Sesión reiniciada.")
             logging.info("Sesión reiniciada por el usuario.")
             analizador_saltos.iniciar()
+            analizador_saltos.acumulador_calibracion.reiniciar()
             calibrando = True
-            calibracion_frames = 0
         elif key == ord('c'): # Recalibrar
             print("Recalibrando...")
             logging.info("Recalibración iniciada por el usuario.")
+            analizador_saltos.acumulador_calibracion.reiniciar()
             calibrando = True
-            calibracion_frames = 0
         elif key == ord('1'):
             analizador_saltos.set_tipo_salto(TipoSalto.CMJ)
             print("Tipo de salto cambiado a CMJ")
@@ -1242,53 +1689,22 @@ def main():
             analizador_saltos.set_tipo_salto(TipoSalto.ABALAKOV)
             print("Tipo de salto cambiado a Abalakov")
 
+    if monitor_memoria is not None:
+        monitor_memoria.stop()
+
     resultados_finales = analizador_saltos.finalizar()
+    resultados_finales['frames_analizados'] = frames_analizados
+    resultados_finales['frames_renderizados'] = frames_renderizados
+    resultados_finales['frames_render_descartados'] = frames_render_descartados
     
     # Calcular índices de elasticidad y coordinación
     # Estos valores normalmente se calcularían comparando diferentes sesiones
     # En esta implementación, solo mostramos los valores base
-    
-    print("\n=== RESUMEN DE LA SESIÓN DE SALTOS ===")
-    print(f"Usuario: {perfil.nombre}")
-    print(f"Edad: {perfil.edad} años | Sexo: {perfil.sexo}")
-    print(f"Peso: {perfil.peso_kg} kg | Altura: {perfil.altura_m:.2f} m")
-    print(f"IMC: {perfil.imc:.1f} | Nivel: {perfil.nivel_actividad.capitalize()}")
-    print(f"Tipo de salto: {resultados_finales['tipo_salto']}")
-    print(f"Duración: {resultados_finales['duracion']}")
-    print(f"Total de saltos: {resultados_finales['total']}")
-    print(f"Saltos correctos: {resultados_finales['correctas']}")
-    print(f"Precisión: {resultados_finales['precision']:.1f}%")
-    print(f"Altura de Salto Promedio: {resultados_finales['altura_salto_promedio']:.2f}m ({resultados_finales['altura_salto_promedio']*100:.1f}cm)")
-    print(f"Potencia Promedio: {resultados_finales['potencia_promedio']:.1f} Watts")
-    print(f"Tiempo de Vuelo Promedio: {resultados_finales['tiempo_vuelo_promedio']:.3f}s")
-    print(f"Clasificación: {resultados_finales['clasificacion']}")
-    print(f"Evaluación de Rendimiento: {resultados_finales['evaluacion_rendimiento']}")
-    print(f"Puntuación Técnica: {resultados_finales['puntuacion_tecnica']:.1f}/100")
-    
-    print("\n=== ERRORES DETECTADOS ===")
-    for error, count in resultados_finales['errores'].items():
-        if count > 0:
-            print(f"- {error.replace('_', ' ').capitalize()}: {count} veces")
-    
-    print("\n=== RECOMENDACIONES ===")
-    for i, rec in enumerate(resultados_finales['recomendaciones'], 1):
-        print(f"{i}. {rec}")
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"saltos_{perfil.nombre.replace(' ', '_')}_{timestamp}.json"
-
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(resultados_finales, f, indent=2, ensure_ascii=False)
-        print(f"\n=== RESULTADOS GUARDADOS ===")
-        print(f"Archivo: {filename}")
-        logging.info(f"Resultados guardados en {filename}")
-    except Exception as e:
-        print(f"Error al guardar: {e}")
-        logging.error(f"Error al guardar resultados: {e}")
+    imprimir_resumen(perfil, resultados_finales)
+    guardar_resultados(perfil, resultados_finales)
 
     cap.release()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
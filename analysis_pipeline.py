@@ -0,0 +1,290 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import cv2
+import yaml
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class UltimoValor:
+    """Ranura de último valor entre un hilo productor y uno consumidor.
+
+    El productor reemplaza el valor completo con una sola asignación de
+    referencia (atómica en CPython), así que ni el productor ni el lector se
+    bloquean nunca. El lector solo ve el valor más reciente; los intermedios
+    que no alcanzó a leer se pierden, que es lo deseado para la interfaz.
+    """
+
+    def __init__(self):
+        self._actual = (0, None)
+
+    def publicar(self, valor):
+        secuencia = self._actual[0] + 1
+        self._actual = (secuencia, valor)
+        return secuencia
+
+    def leer(self):
+        """Retorna (secuencia, valor) del último valor publicado"""
+        return self._actual
+
+    def leer_si_nuevo(self, ultima_secuencia):
+        """Retorna (secuencia, valor) si hay un valor posterior a `ultima_secuencia`, si no (ultima_secuencia, None)"""
+        secuencia, valor = self._actual
+        if secuencia == ultima_secuencia:
+            return ultima_secuencia, None
+        return secuencia, valor
+
+
+# Estados del salto en los que perder un frame altera las mediciones (tiempo de vuelo, altura, aterrizaje)
+FASES_CRITICAS = frozenset({'DESPEGUE', 'VUELO', 'ATERRIZAJE'})
+
+
+class PoliticaTiempoReal:
+    """Reglas para descartar frames cuando la inferencia no alcanza a la cámara.
+
+    Fuera de las fases críticas gana siempre el frame más reciente y se
+    descarta cualquier frame con más de `latencia_max_s` desde su captura: el
+    feedback llega tarde pero nunca acumula retraso. Durante `fases_criticas`
+    los frames se encolan en orden hasta `buffer_critico` y se analizan aunque
+    superen la latencia máxima; solo si ese buffer se llena se pierde el más
+    antiguo.
+    """
+
+    def __init__(self, latencia_max_s=0.25, buffer_critico=8, fases_criticas=FASES_CRITICAS):
+        self.latencia_max_s = latencia_max_s
+        self.buffer_critico = max(1, buffer_critico)
+        self.fases_criticas = frozenset(fases_criticas)
+
+    @classmethod
+    def desde_config(cls, config_file='config_Saltos.yaml'):
+        """Crea la política según la sección `tiempo_real` de la configuración (valores por defecto si no existe)"""
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = (yaml.safe_load(f) or {}).get('tiempo_real', {})
+        except FileNotFoundError:
+            config = {}
+        return cls(latencia_max_s=config.get('latencia_max_s', 0.25),
+                   buffer_critico=config.get('buffer_critico', 8),
+                   fases_criticas=config.get('fases_criticas', FASES_CRITICAS))
+
+    def es_critico(self, estado):
+        return estado in self.fases_criticas
+
+
+class RanuraTiempoReal:
+    """Frames pendientes entre el hilo de captura y el de inferencia según una `PoliticaTiempoReal`.
+
+    Fuera de las fases críticas se comporta como una ranura de último valor;
+    en fase crítica, como una cola FIFO acotada. El hilo de inferencia indica
+    la fase con `actualizar_estado` después de cada frame analizado.
+    """
+
+    def __init__(self, politica):
+        self.politica = politica
+        self.critico = False
+        self._cola = deque()
+        self._condicion = threading.Condition()
+        self._cerrada = False
+
+        # Descartes por motivo: reemplazado por uno más nuevo, demasiado viejo o buffer crítico lleno
+        self.descartados = {'reemplazado': 0, 'latencia': 0, 'buffer_critico': 0}
+
+    @property
+    def total_descartados(self):
+        return sum(self.descartados.values())
+
+    def publicar(self, frame, t_captura, t_pared=None):
+        """Entrega un frame con su instante de captura (monotónico para la latencia, de pared para el análisis)"""
+        with self._condicion:
+            if self.critico:
+                if len(self._cola) >= self.politica.buffer_critico:
+                    self._cola.popleft()
+                    self.descartados['buffer_critico'] += 1
+            else:
+                self.descartados['reemplazado'] += len(self._cola)
+                self._cola.clear()
+            self._cola.append((frame, t_captura, t_pared))
+            self._condicion.notify()
+
+    def actualizar_estado(self, estado):
+        with self._condicion:
+            self.critico = self.politica.es_critico(estado)
+
+    def cerrar(self):
+        with self._condicion:
+            self._cerrada = True
+            self._condicion.notify_all()
+
+    def tomar(self, timeout=None):
+        """Retorna (frame, t_captura, t_pared) del siguiente frame a analizar, o None si se cerró o venció `timeout`"""
+        with self._condicion:
+            while True:
+                if not self._condicion.wait_for(lambda: self._cola or self._cerrada, timeout):
+                    return None
+                if self._cerrada:
+                    return None
+                if self.critico:
+                    return self._cola.popleft()
+                # Al salir de una fase crítica el atraso acumulado se descarta de una vez
+                self.descartados['reemplazado'] += len(self._cola) - 1
+                elemento = self._cola.pop()
+                self._cola.clear()
+                if time.monotonic() - elemento[1] <= self.politica.latencia_max_s:
+                    return elemento
+                self.descartados['latencia'] += 1
+
+
+class PipelineAnalisis:
+    """Cámara → analizador fuera del hilo de la interfaz.
+
+    Un hilo de captura lee frames continuamente y los entrega a una
+    `RanuraTiempoReal`; un hilo de inferencia toma de ahí el siguiente frame y
+    ejecuta `JumpAnalyzer.process_frame`. Qué frames se descartan cuando la
+    inferencia no alcanza lo decide `politica`. El resultado se publica en
+    `resultados`, que la interfaz consulta desde su propio reloj sin esperar
+    nunca a la inferencia. El analizador solo se modifica desde el hilo de
+    inferencia.
+
+    Cada frame se analiza con su instante de captura en reloj de pared, así
+    los frames encolados en fase crítica conservan los tiempos reales del
+    salto aunque se analicen con atraso.
+
+    Cada resultado incluye `descartados` (frames perdidos desde el resultado
+    anterior), `descartados_total` y `latencia_ms` (de la captura del frame a
+    la publicación de su resultado).
+    """
+
+    def __init__(self, analizador, fuente=0, captura=None, monitor_memoria=None, politica=None):
+        self.analizador = analizador
+        self.fuente = fuente
+        # Perfilado de memoria opcional (memory_monitor.MonitorMemoria) mientras el pipeline corre
+        self.monitor_memoria = monitor_memoria
+        self.politica = politica if politica is not None else PoliticaTiempoReal()
+        self.resultados = UltimoValor()
+        # Snapshots del analizador tomados entre dos frames (ver solicitar_snapshot)
+        self.snapshots = UltimoValor()
+        # Último frame capturado, para la vista previa (sin copias)
+        self.frames = UltimoValor()
+        self.ranura = RanuraTiempoReal(self.politica)
+
+        self.frames_capturados = 0
+        self.frames_procesados = 0
+        self.ultimo_tiempo_inferencia = 0.0
+
+        self._captura = captura
+        self._detener = threading.Event()
+        self._recalibrar = threading.Event()
+        self._snapshot = threading.Event()
+        self._hilos = []
+
+    @property
+    def activo(self):
+        return bool(self._hilos) and not self._detener.is_set()
+
+    @property
+    def frames_descartados(self):
+        return self.ranura.total_descartados
+
+    def start(self):
+        """Abre la fuente y arranca los hilos. Retorna False si no hay cámara"""
+        if self._captura is None:
+            self._captura = cv2.VideoCapture(self.fuente)
+            # Sin frames retenidos en el driver: la ranura decide qué se descarta (ignorado si el backend no lo soporta)
+            self._captura.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not self._captura.isOpened():
+            logging.warning(f"No se pudo abrir la fuente de video {self.fuente}")
+            self._captura.release()
+            self._captura = None
+            return False
+
+        self._detener.clear()
+        self._hilos = [
+            threading.Thread(target=self._capturar, name="PipelineCaptura", daemon=True),
+            threading.Thread(target=self._inferir, name="PipelineInferencia", daemon=True)
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+        if self.monitor_memoria is not None:
+            self.monitor_memoria.registrar('analizador', self.analizador)
+            self.monitor_memoria.start()
+        logging.info(f"Pipeline de análisis iniciado con la fuente {self.fuente}")
+        return True
+
+    def stop(self, timeout=2.0):
+        """Detiene los hilos y libera la cámara; después el analizador puede leerse sin carreras"""
+        self._detener.set()
+        self.ranura.cerrar()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+        if self._captura is not None:
+            self._captura.release()
+            self._captura = None
+        if self.monitor_memoria is not None:
+            self.monitor_memoria.stop()
+        logging.info(f"Pipeline detenido: {self.frames_procesados} frames procesados, "
+                     f"{self.frames_descartados} descartados de {self.frames_capturados} capturados "
+                     f"{self.ranura.descartados}")
+
+    def solicitar_recalibracion(self):
+        """Reinicia la sesión desde el hilo de inferencia, entre dos frames"""
+        self._recalibrar.set()
+
+    def solicitar_snapshot(self):
+        """Pide un `snapshot()` del analizador tomado en el hilo de inferencia; se publica en `snapshots`"""
+        self._snapshot.set()
+
+    def _capturar(self):
+        while not self._detener.is_set():
+            ret, frame = self._captura.read()
+            if not ret:
+                logging.warning("La fuente de video no entregó más frames")
+                break
+            self.frames_capturados += 1
+            self.frames.publicar(frame)
+            # Instante de captura también en reloj de pared: los frames encolados en
+            # vuelo se analizan tarde y el tiempo de vuelo debe medir el salto
+            self.ranura.publicar(frame, time.monotonic(), time.time())
+        self._detener.set()
+        self.ranura.cerrar()
+
+    def _inferir(self):
+        ranura = self.ranura
+        metricas = getattr(self.analizador, 'metricas', None)
+        descartados_previos = dict(ranura.descartados)
+        while True:
+            elemento = ranura.tomar()
+            if elemento is None:
+                break
+            frame, t_captura, t_pared = elemento
+
+            if self._recalibrar.is_set():
+                self._recalibrar.clear()
+                self.analizador.reset_session()
+
+            t0 = time.perf_counter()
+            resultado = self.analizador.process_frame(frame, t_pared)
+            self.ultimo_tiempo_inferencia = time.perf_counter() - t0
+            self.frames_procesados += 1
+            if 'estado' in resultado:
+                ranura.actualizar_estado(resultado['estado'])
+
+            descartados = dict(ranura.descartados)
+            nuevos = {motivo: n - descartados_previos[motivo] for motivo, n in descartados.items()}
+            descartados_previos = descartados
+            if metricas is not None:
+                for motivo, n in nuevos.items():
+                    if n:
+                        metricas.frames_descartados.inc(motivo, n=n)
+            resultado['descartados'] = sum(nuevos.values())
+            resultado['descartados_total'] = sum(descartados.values())
+            resultado['latencia_ms'] = (time.monotonic() - t_captura) * 1000.0
+            self.resultados.publicar(resultado)
+
+            if self._snapshot.is_set():
+                self._snapshot.clear()
+                self.snapshots.publicar(self.analizador.snapshot())
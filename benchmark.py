@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de rendimiento para la aplicación Ergo SaniTas SpA
+Cada subcomando mide un componente y entrega un número reproducible
+
+Uso:
+    python3 benchmark.py perfiles [--guardados 40] [--procesos 1 4 16]
+    python3 benchmark.py render [--resoluciones 720 1080] [--iteraciones 500]
+    python3 benchmark.py analizador [--tipos CMJ SQJ ABALAKOV] [--repeticiones 20]
+    python3 benchmark.py multiplexor [--sesiones 1 2 4 8 10] [--trabajadores 4] [--modo pose]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _escritor_perfiles(profiles_file, indice_proceso, guardados, inicio):
+    """Proceso escritor: guarda `guardados` perfiles propios en el archivo compartido"""
+    import logging
+    logging.disable(logging.INFO)
+    from profile_manager import ProfileManager, UsuarioPerfil
+
+    pm = ProfileManager(profiles_file)
+    inicio.wait()
+    for i in range(guardados):
+        pm.save_profile(UsuarioPerfil(f"Estacion {indice_proceso} Atleta {i}", "M", 25, 175, 70, "intermedio"))
+
+
+def benchmark_perfiles(args):
+    """Throughput de guardado con varios procesos escritores concurrentes"""
+    print(f"{'procesos':>9} {'guardados':>10} {'segundos':>9} {'guardados/s':>12} {'perdidos':>9}")
+
+    for n_procesos in args.procesos:
+        directorio = tempfile.mkdtemp(dir=args.directorio)
+        profiles_file = os.path.join(directorio, "perfiles_usuarios.json")
+        inicio = multiprocessing.Event()
+
+        procesos = [
+            multiprocessing.Process(target=_escritor_perfiles, args=(profiles_file, i, args.guardados, inicio))
+            for i in range(n_procesos)
+        ]
+        for p in procesos:
+            p.start()
+
+        t0 = time.perf_counter()
+        inicio.set()
+        for p in procesos:
+            p.join()
+        duracion = time.perf_counter() - t0
+
+        from profile_manager import ProfileManager
+        total = n_procesos * args.guardados
+        perdidos = total - len(ProfileManager(profiles_file).get_profile_names())
+        print(f"{n_procesos:>9} {total:>10} {duracion:>9.2f} {total / duracion:>12.1f} {perdidos:>9}")
+
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+RESOLUCIONES = {480: (640, 480), 720: (1280, 720), 1080: (1920, 1080)}
+
+
+def benchmark_render(args):
+    """Tiempo por frame de cada widget del HUD sobre un frame de la resolución indicada"""
+    import numpy as np
+    from TestSalto import InterfazVisual, CompositorHUD, AnalizadorSaltos, UsuarioPerfil
+
+    historial = list(400 + 30 * np.sin(np.arange(300) / 7))
+    errores = {"stiff_landing": 1}
+    analizador = AnalizadorSaltos(UsuarioPerfil("Benchmark", "M", 25, 175, 70, "intermedio"))
+    analizador.iniciar()
+    analizador.errores.update(errores)
+    compositor = CompositorHUD()
+
+    def hud_directo(img):
+        for text, (x, y, ancho, alto, fondo, escala) in zip(
+                [f"Saltos: {analizador.contador}", f"Correctos: {analizador.correctas}",
+                 f"Estado: {analizador.estado.value}", f"Altura Salto: {analizador.jump_height_m:.2f}m",
+                 f"Tipo: {analizador.tipo_salto.value}"], CompositorHUD.CONTENEDORES):
+            InterfazVisual.dibujar_contenedor(img, text, x, y, ancho, alto, fondo, (255, 255, 255), escala)
+        InterfazVisual.dibujar_semaforo_tecnico(img, analizador.errores, img.shape[1] - 250, 50)
+        for i, msg in enumerate(analizador.mensajes_feedback[-3:]):
+            InterfazVisual.dibujar_contenedor(img, msg, 20, img.shape[0] - 100 + i * 30, 300, 25, (50, 50, 50), (255, 255, 255), 0.6)
+        InterfazVisual.dibujar_panel_ayuda(img)
+        InterfazVisual.dibujar_depuracion(img, analizador.px_to_m, analizador.initial_hip_y, analizador.estado, analizador.calibrado)
+
+    def compositor_cambio(img):
+        # Peor caso: un contador cambia en cada frame y su panel se reconstruye
+        analizador.contador += 1
+        compositor.componer(img, analizador, True)
+
+    widgets = [
+        ("contenedor", lambda img: InterfazVisual.dibujar_contenedor(img, "Saltos: 12", 20, 20, 200, 40, (20, 20, 160), (255, 255, 255))),
+        ("barra_potencia", lambda img: InterfazVisual.dibujar_barra_potencia(img, 80, img.shape[1] - 80, 50, 40, 200)),
+        ("semaforo_tecnico", lambda img: InterfazVisual.dibujar_semaforo_tecnico(img, errores, img.shape[1] - 250, 50)),
+        ("grafico_altura", lambda img: InterfazVisual.dibujar_grafico_altura(img, historial, 410, 1.0, 0.32)),
+        ("hud_directo", hud_directo),
+        ("compositor_hud", lambda img: compositor.componer(img, analizador, True)),
+        ("compositor_cambio", compositor_cambio),
+    ]
+
+    print(f"{'resolucion':>10} {'widget':>18} {'us/frame':>10}")
+    for resolucion in args.resoluciones:
+        w, h = RESOLUCIONES[resolucion]
+        img = np.zeros((h, w, 3), dtype=np.uint8)
+        for nombre, dibujar in widgets:
+            dibujar(img)  # calentar cachés
+            t0 = time.perf_counter()
+            for _ in range(args.iteraciones):
+                dibujar(img)
+            duracion = time.perf_counter() - t0
+            print(f"{resolucion:>9}p {nombre:>18} {duracion / args.iteraciones * 1e6:>10.1f}")
+
+
+def benchmark_analizador(args):
+    """Frames/s y asignaciones por frame de calibrar y verificar con landmarks sintéticos"""
+    import logging
+    import tracemalloc
+    # Las oclusiones sintéticas hacen fallar calibraciones a propósito
+    logging.disable(logging.CRITICAL)
+    from profile_manager import UsuarioPerfil
+    from jump_analyzer import JumpAnalyzer, TipoSalto
+    from synthetic_pose import GeneradorPoseSintetica
+
+    perfil = UsuarioPerfil("Benchmark", "M", 25, 175, 70, "intermedio")
+    print(f"{'tipo':>9} {'etapa':>10} {'frames':>7} {'frames/s':>10} {'us/frame':>9} "
+          f"{'B/frame':>9} {'bloques/frame':>14} {'pico KB':>8}")
+
+    for nombre in args.tipos:
+        tipo = TipoSalto[nombre]
+        frames = GeneradorPoseSintetica.para_perfil(
+            perfil, tipo_salto=tipo, saltos=args.saltos, ruido=args.ruido,
+            prob_oclusion=args.oclusion, semilla=args.semilla).generar_landmarks()
+        analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+        analizador.set_tipo_salto(tipo)
+        _, lm_calibracion = frames[0]
+
+        def preparar_verificar():
+            analizador.reset_session()
+            analizador.calibrar(lm_calibracion)
+
+        def recorrer_verificar():
+            for t, lm in frames:
+                analizador.verificar(lm, timestamp=t)
+
+        def recorrer_calibrar():
+            for _, lm in frames:
+                analizador.calibrar(lm)
+
+        etapas = [("calibrar", lambda: None, recorrer_calibrar),
+                  ("verificar", preparar_verificar, recorrer_verificar)]
+        for etapa, preparar, recorrer in etapas:
+            preparar()
+            recorrer()  # calentar
+
+            duracion = 0.0
+            for _ in range(args.repeticiones):
+                preparar()
+                t0 = time.perf_counter()
+                recorrer()
+                duracion += time.perf_counter() - t0
+            total = len(frames) * args.repeticiones
+
+            # Asignaciones retenidas (crecimiento neto) y pico transitorio de una pasada
+            preparar()
+            tracemalloc.start()
+            antes = tracemalloc.take_snapshot()
+            actual_antes = tracemalloc.get_traced_memory()[0]
+            recorrer()
+            pico = tracemalloc.get_traced_memory()[1] - actual_antes
+            despues = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            diferencias = despues.compare_to(antes, "filename")
+            bytes_frame = sum(d.size_diff for d in diferencias) / len(frames)
+            bloques_frame = sum(d.count_diff for d in diferencias) / len(frames)
+
+            print(f"{nombre:>9} {etapa:>10} {total:>7} {total / duracion:>10.0f} {duracion / total * 1e6:>9.1f} "
+                  f"{bytes_frame:>9.1f} {bloques_frame:>14.2f} {pico / 1024:>8.1f}")
+
+
+def benchmark_multiplexor(args):
+    """Frames/s agregados según el número de streams: un hilo por sesión frente al pool fijo"""
+    import logging
+    import threading
+    logging.disable(logging.CRITICAL)
+    import numpy as np
+    from profile_manager import UsuarioPerfil
+    from jump_analyzer import JumpAnalyzer, TipoSalto, mp
+    from session_multiplexer import MultiplexorSesiones, procesar_frame, procesar_landmarks
+    from synthetic_pose import GeneradorPoseSintetica
+
+    perfil = UsuarioPerfil("Benchmark", "M", 25, 175, 70, "intermedio")
+    modo = args.modo
+    if modo == "pose" and mp is None:
+        print("mediapipe no está instalado; se usa --modo landmarks")
+        modo = "landmarks"
+
+    if modo == "pose":
+        # Sin persona en la imagen el detector corre en cada frame: el peor caso de inferencia
+        rng = np.random.default_rng(args.semilla)
+        imagen = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        elementos = [(None, imagen)]
+        procesar = procesar_frame
+    else:
+        secuencia = GeneradorPoseSintetica.para_perfil(perfil, saltos=3, semilla=args.semilla).generar_landmarks()
+        elementos = secuencia
+        procesar = procesar_landmarks
+    periodo = (len(elementos) + 1) / 30.0
+
+    def elemento(i):
+        if modo == "pose":
+            return elementos[0]
+        t, lm = elementos[i % len(elementos)]
+        return t + (i // len(elementos)) * periodo, lm
+
+    def medir(sesiones, trabajadores):
+        multiplexor = MultiplexorSesiones(trabajadores=trabajadores, capacidad_cola=2, procesar=procesar)
+        for sesion_id in range(sesiones):
+            analizador = JumpAnalyzer(perfil, usar_mediapipe=(modo == "pose"))
+            analizador.set_tipo_salto(TipoSalto.CMJ)
+            multiplexor.agregar_sesion(sesion_id, analizador)
+        multiplexor.start()
+
+        def producir(sesion_id):
+            for i in range(args.frames):
+                multiplexor.enviar(sesion_id, elemento(i), bloquear=True)
+
+        productores = [threading.Thread(target=producir, args=(sesion_id,)) for sesion_id in range(sesiones)]
+        t0 = time.perf_counter()
+        for hilo in productores:
+            hilo.start()
+        for hilo in productores:
+            hilo.join()
+        multiplexor.esperar_pendientes()
+        duracion = time.perf_counter() - t0
+        procesados = [s.frames_procesados for s in multiplexor.sesiones.values()]
+        multiplexor.stop()
+        return sum(procesados) / duracion, min(procesados), max(procesados)
+
+    print(f"modo {modo}, {args.frames} frames por stream")
+    print(f"{'streams':>8} {'trabajadores':>13} {'fps total':>10} {'fps/stream':>11} {'ms/frame':>9}")
+    for sesiones in args.sesiones:
+        configuraciones = [sesiones]
+        if args.trabajadores < sesiones:
+            configuraciones.append(args.trabajadores)
+        for trabajadores in configuraciones:
+            fps, minimo, maximo = medir(sesiones, trabajadores)
+            etiqueta = f"{trabajadores}" + (" (1/stream)" if trabajadores == sesiones else "")
+            print(f"{sesiones:>8} {etiqueta:>13} {fps:>10.1f} {fps / sesiones:>11.1f} {1000 / fps:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de Ergo SaniTas")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    p_perfiles = subparsers.add_parser("perfiles", help="Guardado concurrente de perfiles entre procesos")
+    p_perfiles.add_argument("--guardados", type=int, default=40, help="Perfiles guardados por proceso")
+    p_perfiles.add_argument("--procesos", type=int, nargs="+", default=[1, 4, 16])
+    p_perfiles.add_argument("--directorio", default=None, help="Directorio de datos (p. ej. montaje de red)")
+    p_perfiles.set_defaults(func=benchmark_perfiles)
+
+    p_render = subparsers.add_parser("render", help="Coste de dibujo de los widgets del HUD")
+    p_render.add_argument("--resoluciones", type=int, nargs="+", default=[720, 1080], choices=sorted(RESOLUCIONES))
+    p_render.add_argument("--iteraciones", type=int, default=500)
+    p_render.set_defaults(func=benchmark_render)
+
+    p_analizador = subparsers.add_parser("analizador", help="Throughput de calibrar/verificar con landmarks sintéticos")
+    p_analizador.add_argument("--tipos", nargs="+", default=["CMJ", "SQJ", "ABALAKOV"], choices=["CMJ", "SQJ", "ABALAKOV"])
+    p_analizador.add_argument("--repeticiones", type=int, default=20, help="Pasadas completas por la secuencia")
+    p_analizador.add_argument("--saltos", type=int, default=3)
+    p_analizador.add_argument("--ruido", type=float, default=0.002, help="Desviación del ruido gaussiano (coordenadas normalizadas)")
+    p_analizador.add_argument("--oclusion", type=float, default=0.01, help="Probabilidad por frame de iniciar una oclusión")
+    p_analizador.add_argument("--semilla", type=int, default=0)
+    p_analizador.set_defaults(func=benchmark_analizador)
+
+    p_multiplexor = subparsers.add_parser("multiplexor", help="Frames/s agregados con varios streams simultáneos")
+    p_multiplexor.add_argument("--sesiones", type=int, nargs="+", default=[1, 2, 4, 8, 10], help="Número de streams")
+    p_multiplexor.add_argument("--trabajadores", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                               help="Tamaño del pool de inferencia")
+    p_multiplexor.add_argument("--frames", type=int, default=150, help="Frames por stream")
+    p_multiplexor.add_argument("--modo", choices=["pose", "landmarks"], default="pose",
+                               help="pose: MediaPipe + análisis; landmarks: solo análisis")
+    p_multiplexor.add_argument("--semilla", type=int, default=0)
+    p_multiplexor.set_defaults(func=benchmark_multiplexor)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Fuentes de frames asíncronas: cámara, archivo de video (o RTSP), directorio de
+imágenes y stream MJPEG por HTTP, más un servidor MJPEG local para pruebas
+
+La lectura y decodificación bloqueantes (OpenCV) corren en hilos del executor,
+así que un solo bucle de eventos puede leer muchas fuentes a la vez.
+
+Uso:
+    python3 frame_sources.py analizar FUENTE [FUENTE ...] [--perfil perfil.json] [--tipo cmj]
+    python3 frame_sources.py servir-mjpeg FUENTE [--puerto 8080] [--fps 30]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.bmp')
+LIMITE_MJPEG = "frame"
+
+
+class FuenteFrames:
+    """Fuente asíncrona de frames BGR con su timestamp en segundos.
+
+    `leer()` retorna (timestamp, frame) o None al terminar la fuente. También
+    se puede recorrer con `async for` y usar como `async with`. Las fuentes
+    `en_vivo` entregan frames con el reloj de pared y no esperan al consumidor.
+    """
+    en_vivo = False
+
+    def __init__(self, executor=None):
+        # None = executor por defecto del bucle de eventos
+        self.executor = executor
+        self.frames_leidos = 0
+
+    async def _ejecutar(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcion, *args)
+
+    async def abrir(self):
+        """Abre la fuente. Retorna False si no está disponible"""
+        return True
+
+    async def leer(self):
+        raise NotImplementedError
+
+    async def cerrar(self):
+        pass
+
+    async def __aenter__(self):
+        if not await self.abrir():
+            raise OSError(f"No se pudo abrir la fuente {self}")
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.cerrar()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        elemento = await self.leer()
+        if elemento is None:
+            raise StopAsyncIteration
+        return elemento
+
+
+class FuenteCaptura(FuenteFrames):
+    """Base para fuentes leídas con cv2.VideoCapture"""
+
+    def __init__(self, fuente, executor=None):
+        super().__init__(executor)
+        self.fuente = fuente
+        self._captura = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.fuente!r})"
+
+    async def abrir(self):
+        self._captura = await self._ejecutar(cv2.VideoCapture, self.fuente)
+        if not self._captura.isOpened():
+            logging.warning(f"No se pudo abrir la fuente de video {self.fuente}")
+            await self.cerrar()
+            return False
+        return True
+
+    async def leer(self):
+        if self._captura is None:
+            return None
+        elemento = await self._ejecutar(self._leer_bloqueante)
+        if elemento is not None:
+            self.frames_leidos += 1
+        return elemento
+
+    def _leer_bloqueante(self):
+        ret, frame = self._captura.read()
+        return (time.time(), frame) if ret else None
+
+    async def cerrar(self):
+        if self._captura is not None:
+            captura, self._captura = self._captura, None
+            await self._ejecutar(captura.release)
+
+
+class FuenteCamara(FuenteCaptura):
+    """Cámara local por índice; con `espejo` el frame se invierte como en TestSalto"""
+    en_vivo = True
+
+    def __init__(self, indice=0, espejo=True, executor=None):
+        super().__init__(indice, executor)
+        self.espejo = espejo
+
+    def _leer_bloqueante(self):
+        ret, frame = self._captura.read()
+        if not ret:
+            return None
+        return time.time(), cv2.flip(frame, 1) if self.espejo else frame
+
+
+class FuenteVideo(FuenteCaptura):
+    """Archivo de video (o URL que entienda FFmpeg, p. ej. RTSP) con el reloj del propio video.
+
+    Con `tiempo_real` entrega los frames al ritmo del video en lugar de tan
+    rápido como se decodifiquen.
+    """
+
+    def __init__(self, ruta, tiempo_real=False, executor=None):
+        super().__init__(ruta, executor)
+        self.tiempo_real = tiempo_real
+        self.en_vivo = str(ruta).startswith(("rtsp://", "rtsps://"))
+        self._inicio = None
+
+    async def leer(self):
+        elemento = await super().leer()
+        if elemento is not None and self.tiempo_real:
+            if self._inicio is None:
+                self._inicio = time.monotonic() - elemento[0]
+            espera = self._inicio + elemento[0] - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+        return elemento
+
+    def _leer_bloqueante(self):
+        ret, frame = self._captura.read()
+        if not ret:
+            return None
+        if self.en_vivo:
+            return time.time(), frame
+        return self._captura.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame
+
+
+class FuenteDirectorioImagenes(FuenteFrames):
+    """Secuencia de imágenes de un directorio, en orden alfabético, a `fps` fijos"""
+
+    def __init__(self, directorio, fps=30.0, extensiones=EXTENSIONES_IMAGEN, executor=None):
+        super().__init__(executor)
+        self.directorio = directorio
+        self.fps = fps
+        self.extensiones = extensiones
+        self.archivos = []
+        self._indice = 0
+
+    def __repr__(self):
+        return f"FuenteDirectorioImagenes({self.directorio!r})"
+
+    async def abrir(self):
+        try:
+            nombres = await self._ejecutar(os.listdir, self.directorio)
+        except OSError as e:
+            logging.warning(f"No se pudo abrir el directorio de imágenes {self.directorio}: {e}")
+            return False
+        self.archivos = sorted(os.path.join(self.directorio, n) for n in nombres
+                               if n.lower().endswith(self.extensiones))
+        self._indice = 0
+        return True
+
+    async def leer(self):
+        while self._indice < len(self.archivos):
+            archivo = self.archivos[self._indice]
+            indice = self._indice
+            self._indice += 1
+            frame = await self._ejecutar(cv2.imread, archivo)
+            if frame is None:
+                logging.warning(f"Imagen ilegible omitida: {archivo}")
+                continue
+            self.frames_leidos += 1
+            return indice / self.fps, frame
+        return None
+
+
+class FuenteMJPEG(FuenteFrames):
+    """Stream MJPEG por HTTP (multipart/x-mixed-replace), como el de cámaras IP y ServidorMJPEG.
+
+    La red se lee con streams de asyncio; solo la decodificación JPEG va al
+    executor. Si las partes traen `X-Timestamp` se usa como reloj de la fuente.
+    """
+    en_vivo = True
+
+    def __init__(self, url, timeout=10.0, executor=None):
+        super().__init__(executor)
+        self.url = url
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._delimitador = None
+        self._delimitador_leido = False
+
+    def __repr__(self):
+        return f"FuenteMJPEG({self.url!r})"
+
+    async def abrir(self):
+        partes = urlsplit(self.url)
+        seguro = partes.scheme == "https"
+        ruta = partes.path or "/"
+        if partes.query:
+            ruta += "?" + partes.query
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(partes.hostname, partes.port or (443 if seguro else 80), ssl=seguro or None),
+                self.timeout)
+            self._writer.write(f"GET {ruta} HTTP/1.0\r\nHost: {partes.netloc}\r\n\r\n".encode('ascii'))
+            await self._writer.drain()
+            estado, cabeceras = await asyncio.wait_for(self._leer_cabeceras(), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            logging.warning(f"No se pudo abrir el stream MJPEG {self.url}: {e}")
+            await self.cerrar()
+            return False
+
+        tipo = cabeceras.get('content-type', '')
+        if " 200 " not in estado + " " or 'boundary=' not in tipo:
+            logging.warning(f"Respuesta inesperada del stream MJPEG {self.url}: {estado} ({tipo})")
+            await self.cerrar()
+            return False
+        limite = tipo.split('boundary=', 1)[1].split(';', 1)[0].strip().strip('"')
+        if limite.startswith("--"):
+            limite = limite[2:]
+        self._delimitador = b"--" + limite.encode('ascii')
+        return True
+
+    async def _leer_cabeceras(self):
+        bloque = await self._reader.readuntil(b"\r\n\r\n")
+        lineas = bloque.decode('latin-1').split("\r\n")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            if ":" in linea:
+                nombre, valor = linea.split(":", 1)
+                cabeceras[nombre.strip().lower()] = valor.strip()
+        return lineas[0], cabeceras
+
+    async def leer(self):
+        # Las partes JPEG ilegibles se saltan sin recursión: un stream con muchas
+        # partes corruptas seguidas no debe agotar la pila
+        frame = None
+        while frame is None:
+            if self._reader is None:
+                return None
+            try:
+                # Saltar hasta el delimitador de la siguiente parte (salvo que ya se haya consumido)
+                if not self._delimitador_leido:
+                    await self._reader.readuntil(self._delimitador)
+                self._delimitador_leido = False
+                _, cabeceras = await self._leer_cabeceras()
+                if 'content-length' in cabeceras:
+                    datos = await self._reader.readexactly(int(cabeceras['content-length']))
+                else:
+                    datos = await self._reader.readuntil(b"\r\n" + self._delimitador)
+                    datos = datos[:-len(self._delimitador) - 2]
+                    self._delimitador_leido = True
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return None
+
+            frame = await self._ejecutar(_decodificar_jpeg, datos)
+            if frame is None:
+                logging.warning(f"Parte JPEG ilegible en {self.url}")
+        self.frames_leidos += 1
+        timestamp = float(cabeceras['x-timestamp']) if 'x-timestamp' in cabeceras else time.time()
+        return timestamp, frame
+
+    async def cerrar(self):
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            self._reader = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def _decodificar_jpeg(datos):
+    return cv2.imdecode(np.frombuffer(datos, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class ServidorMJPEG:
+    """Servidor MJPEG local que sustituye a una cámara IP en pruebas y demostraciones.
+
+    Sirve en bucle (o una vez) una lista de frames a `fps` por cada cliente
+    conectado, en cualquier ruta. Los frames se codifican una sola vez al iniciar.
+    """
+
+    def __init__(self, frames, host="127.0.0.1", puerto=8080, fps=30.0, calidad=90, repetir=False, executor=None):
+        self.frames = frames
+        self.host = host
+        self.puerto = puerto
+        self.fps = fps
+        self.calidad = calidad
+        self.repetir = repetir
+        self.executor = executor
+        self._jpegs = []
+        self._servidor = None
+
+    async def start(self):
+        """Codifica los frames y abre el puerto. Retorna False si no se pudo abrir"""
+        loop = asyncio.get_running_loop()
+        parametros = [cv2.IMWRITE_JPEG_QUALITY, self.calidad]
+        self._jpegs = []
+        for frame in self.frames:
+            ok, jpeg = await loop.run_in_executor(self.executor, cv2.imencode, '.jpg', frame, parametros)
+            if ok:
+                self._jpegs.append(jpeg.tobytes())
+        try:
+            self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        except OSError as e:
+            logging.error(f"No se pudo abrir el servidor MJPEG en {self.host}:{self.puerto}: {e}")
+            return False
+        # Con puerto 0 el sistema elige uno libre
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        logging.info(f"Stream MJPEG en http://{self.host}:{self.puerto}/ ({len(self._jpegs)} frames)")
+        return True
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.puerto}/"
+
+    async def stop(self):
+        if self._servidor is None:
+            return
+        self._servidor.close()
+        await self._servidor.wait_closed()
+        self._servidor = None
+
+    async def _atender(self, reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(("HTTP/1.0 200 OK\r\n"
+                          f"Content-Type: multipart/x-mixed-replace; boundary={LIMITE_MJPEG}\r\n"
+                          "Cache-Control: no-cache\r\n\r\n").encode('ascii'))
+            periodo = 1.0 / self.fps if self.fps > 0 else 0.0
+            inicio = time.monotonic()
+            indice = 0
+            while self._jpegs and (self.repetir or indice < len(self._jpegs)):
+                jpeg = self._jpegs[indice % len(self._jpegs)]
+                # Sin fps fijo no hay reloj de la fuente: el cliente usa el de pared
+                reloj = f"X-Timestamp: {indice * periodo:.6f}\r\n" if periodo else ""
+                writer.write((f"--{LIMITE_MJPEG}\r\nContent-Type: image/jpeg\r\n"
+                              f"Content-Length: {len(jpeg)}\r\n{reloj}\r\n").encode('ascii'))
+                writer.write(jpeg + b"\r\n")
+                await writer.drain()
+                indice += 1
+                espera = inicio + indice * periodo - time.monotonic()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def abrir_fuente(especificacion, executor=None, **kwargs):
+    """Crea la fuente adecuada: índice de cámara, URL http(s) MJPEG, directorio de imágenes o video/RTSP"""
+    especificacion = str(especificacion)
+    if especificacion.isdigit():
+        return FuenteCamara(int(especificacion), executor=executor, **kwargs)
+    if especificacion.startswith(("http://", "https://")):
+        return FuenteMJPEG(especificacion, executor=executor, **kwargs)
+    if os.path.isdir(especificacion):
+        return FuenteDirectorioImagenes(especificacion, executor=executor, **kwargs)
+    return FuenteVideo(especificacion, executor=executor, **kwargs)
+
+
+async def analizar_fuente(fuente, analizador, max_frames=0, al_resultado=None):
+    """Lee una fuente y pasa cada frame por `analizador.process_frame` en el executor.
+
+    Retorna el número de frames analizados. Las fuentes grabadas usan su
+    propio reloj; las en vivo, el reloj de pared.
+    """
+    frames = 0
+    async with fuente:
+        async for timestamp, frame in fuente:
+            resultado = await fuente._ejecutar(
+                analizador.process_frame, frame, None if fuente.en_vivo else timestamp)
+            frames += 1
+            if al_resultado is not None:
+                al_resultado(resultado)
+            if 0 < max_frames <= frames:
+                break
+    return frames
+
+
+async def alimentar_multiplexor(fuente, multiplexor, sesion_id, max_frames=0):
+    """Envía los frames de una fuente a una sesión de session_multiplexer.MultiplexorSesiones.
+
+    Las fuentes en vivo descartan el frame más antiguo si la sesión va
+    atrasada; las grabadas esperan (en el executor) a que haya espacio y
+    se analizan con su propio reloj, como en `analizar_fuente`.
+    """
+    frames = 0
+    async with fuente:
+        async for timestamp, frame in fuente:
+            if fuente.en_vivo:
+                enviado = multiplexor.enviar(sesion_id, (None, frame))
+            else:
+                enviado = await fuente._ejecutar(multiplexor.enviar, sesion_id, (timestamp, frame), True)
+            if not enviado:
+                break
+            frames += 1
+            if 0 < max_frames <= frames:
+                break
+    return frames
+
+
+async def _analizar_fuentes(especificaciones, perfil, tipo_salto, max_frames):
+    from jump_analyzer import JumpAnalyzer
+
+    analizadores = []
+    tareas = []
+    for especificacion in especificaciones:
+        analizador = JumpAnalyzer(perfil)
+        analizador.set_tipo_salto(tipo_salto)
+        analizadores.append(analizador)
+        tareas.append(analizar_fuente(abrir_fuente(especificacion), analizador, max_frames))
+    frames = await asyncio.gather(*tareas, return_exceptions=True)
+    return list(zip(especificaciones, frames, analizadores))
+
+
+async def _servir_mjpeg(especificacion, host, puerto, fps, max_frames):
+    frames = []
+    async with abrir_fuente(especificacion) as fuente:
+        async for _, frame in fuente:
+            frames.append(frame)
+            if 0 < max_frames <= len(frames):
+                break
+    servidor = ServidorMJPEG(frames, host=host, puerto=puerto, fps=fps, repetir=True)
+    if not await servidor.start():
+        return 1
+    print(f"Sirviendo {len(frames)} frames en {servidor.url}")
+    await asyncio.Event().wait()
+
+
+def main():
+    from jump_analyzer import TipoSalto
+    from profile_manager import UsuarioPerfil
+
+    parser = argparse.ArgumentParser(description="Fuentes de frames de Ergo SaniTas")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_analizar = subparsers.add_parser("analizar", help="Analiza varias fuentes a la vez en un bucle de eventos")
+    p_analizar.add_argument("fuentes", nargs="+", help="Índice de cámara, video, directorio de imágenes o URL MJPEG")
+    p_analizar.add_argument("--perfil", default=None, help="Archivo JSON del perfil de usuario")
+    p_analizar.add_argument("--tipo", choices=[t.name.lower() for t in TipoSalto], default="cmj")
+    p_analizar.add_argument("--max-frames", type=int, default=0, help="Frames por fuente (0 = hasta el final)")
+
+    p_servir = subparsers.add_parser("servir-mjpeg", help="Sirve un video o directorio como stream MJPEG local")
+    p_servir.add_argument("fuente")
+    p_servir.add_argument("--host", default="127.0.0.1")
+    p_servir.add_argument("--puerto", type=int, default=8080)
+    p_servir.add_argument("--fps", type=float, default=30.0)
+    p_servir.add_argument("--max-frames", type=int, default=900, help="Frames cargados en memoria")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "servir-mjpeg":
+            return asyncio.run(_servir_mjpeg(args.fuente, args.host, args.puerto, args.fps, args.max_frames))
+
+        if args.perfil:
+            with open(args.perfil, 'r', encoding='utf-8') as f:
+                perfil = UsuarioPerfil.from_dict(json.load(f))
+        else:
+            perfil = UsuarioPerfil("Demo", "M", 25, 175, 70, "intermedio")
+        salidas = asyncio.run(_analizar_fuentes(args.fuentes, perfil, TipoSalto[args.tipo.upper()], args.max_frames))
+    except KeyboardInterrupt:
+        return 0
+
+    codigo = 0
+    for especificacion, frames, analizador in salidas:
+        if isinstance(frames, Exception):
+            print(f"❌ {especificacion}: {frames}")
+            codigo = 1
+            continue
+        resultados = analizador.get_results()
+        print(f"✅ {especificacion}: {frames} frames, {resultados['total']} saltos, "
+              f"altura promedio {resultados['altura_salto_promedio'] * 100:.1f} cm")
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Reproducción de secuencias de landmarks grabadas contra salidas de referencia (golden)
+Detecta cambios en saltos detectados, alturas y errores, y regresiones de tiempo por frame
+
+Uso:
+    python3 golden_replay.py verificar [--directorio golden] [--factor-presupuesto 1.0]
+    python3 golden_replay.py actualizar [--directorio golden]
+    python3 golden_replay.py generar [--directorio golden]
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from jump_analyzer import JumpAnalyzer, TipoSalto, landmarks_desde_array
+from profile_manager import UsuarioPerfil, write_json_atomic
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+VERSION_GOLDEN = 1
+DIRECTORIO_GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# Tolerancias absolutas por clave; el resto de floats debe coincidir a 1e-6
+TOLERANCIAS = {
+    "altura_salto_promedio": 0.005,
+    "alturas_saltos": 0.005,
+    "jump_height_m": 0.005,
+    "potencia_promedio": 5.0,
+    "potencia_salto": 5.0,
+    "tiempo_vuelo_promedio": 0.04,
+    "tiempo_vuelo": 0.04,
+    "precision": 0.01,
+    "t": 0.04
+}
+TOLERANCIA_DEFECTO = 1e-6
+
+# Presupuesto = tiempo medido al actualizar × margen (con un mínimo en µs)
+MARGEN_PRESUPUESTO = 4.0
+PRESUPUESTO_MINIMO_US = 200.0
+PERCENTILES_PRESUPUESTO = (50, 95)
+
+
+class RegistroEventos:
+    """Receptor de telemetría del analizador que guarda solo las transiciones de estado"""
+
+    def __init__(self):
+        self.eventos = []
+
+    def write_frame(self, t, estado, detalles, potencia, error_keys=None):
+        pass
+
+    def write_transition(self, t, desde, hacia, analizador):
+        evento = {
+            't': float(t),
+            'desde': desde,
+            'hacia': hacia,
+            'contador': analizador.contador,
+            'correctas': analizador.correctas,
+            'jump_height_m': float(analizador.jump_height_m)
+        }
+        if analizador.tiempos_vuelo and hacia == "ATERRIZAJE":
+            evento['tiempo_vuelo'] = float(analizador.tiempos_vuelo[-1])
+            evento['potencia_salto'] = float(analizador.potencias[-1])
+        self.eventos.append(evento)
+
+
+def guardar_secuencia(filename, timestamps, landmarks, perfil, tipo_salto):
+    """Guarda una secuencia (timestamps, array (N, 33, 4)) con el perfil y tipo de salto"""
+    meta = {'perfil': perfil.to_dict(), 'tipo_salto': tipo_salto.name}
+    np.savez_compressed(filename,
+                        timestamps=np.asarray(timestamps, dtype=np.float64),
+                        landmarks=np.asarray(landmarks, dtype=np.float32),
+                        meta=np.array(json.dumps(meta, ensure_ascii=False)))
+
+
+def cargar_secuencia(filename):
+    """Retorna (timestamps, landmarks, perfil, tipo_salto) de una secuencia grabada"""
+    with np.load(filename, allow_pickle=False) as datos:
+        meta = json.loads(str(datos['meta']))
+        return (datos['timestamps'], datos['landmarks'],
+                UsuarioPerfil.from_dict(meta['perfil']), TipoSalto[meta['tipo_salto']])
+
+
+def reproducir(timestamps, landmarks, perfil, tipo_salto):
+    """Pasa la secuencia por calibrar/verificar; retorna (resultados, eventos, tiempos por frame en µs)"""
+    analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+    analizador.set_tipo_salto(tipo_salto)
+    registro = RegistroEventos()
+    analizador.telemetria = registro
+
+    frames = [landmarks_desde_array(frame) for frame in landmarks]
+    tiempos_us = []
+    for t, lm in zip(timestamps, frames):
+        if not analizador.calibrado:
+            analizador.calibrar(lm)
+            continue
+        t0 = time.perf_counter_ns()
+        analizador.verificar(lm, timestamp=float(t))
+        tiempos_us.append((time.perf_counter_ns() - t0) / 1000)
+
+    return analizador.get_results(), registro.eventos, np.array(tiempos_us)
+
+
+def comparar(esperado, obtenido, ruta="", clave=None):
+    """Lista de diferencias entre dos estructuras JSON, con tolerancia numérica por clave"""
+    diferencias = []
+    if isinstance(esperado, dict) and isinstance(obtenido, dict):
+        for k in sorted(set(esperado) | set(obtenido)):
+            if k not in obtenido:
+                diferencias.append(f"{ruta}/{k}: falta")
+            elif k not in esperado:
+                diferencias.append(f"{ruta}/{k}: clave nueva")
+            else:
+                diferencias += comparar(esperado[k], obtenido[k], f"{ruta}/{k}", k)
+    elif isinstance(esperado, list) and isinstance(obtenido, list):
+        if len(esperado) != len(obtenido):
+            diferencias.append(f"{ruta}: {len(esperado)} elementos esperados, {len(obtenido)} obtenidos")
+        for i, (e, o) in enumerate(zip(esperado, obtenido)):
+            diferencias += comparar(e, o, f"{ruta}[{i}]", clave)
+    elif isinstance(esperado, bool) or isinstance(esperado, str) or esperado is None:
+        if esperado != obtenido:
+            diferencias.append(f"{ruta}: {esperado!r} != {obtenido!r}")
+    elif isinstance(esperado, int) and isinstance(obtenido, int):
+        if esperado != obtenido:
+            diferencias.append(f"{ruta}: {esperado} != {obtenido}")
+    elif isinstance(esperado, (int, float)) and isinstance(obtenido, (int, float)):
+        tolerancia = TOLERANCIAS.get(clave, TOLERANCIA_DEFECTO)
+        if abs(esperado - obtenido) > tolerancia:
+            diferencias.append(f"{ruta}: {esperado} != {obtenido} (tolerancia {tolerancia})")
+    else:
+        diferencias.append(f"{ruta}: {esperado!r} != {obtenido!r}")
+    return diferencias
+
+
+def _percentiles(tiempos_us):
+    return {f"p{p}": float(np.percentile(tiempos_us, p)) if len(tiempos_us) else 0.0
+            for p in PERCENTILES_PRESUPUESTO}
+
+
+def _normalizar(datos):
+    """Convierte tipos de numpy a tipos JSON para comparar con lo leído del golden"""
+    return json.loads(json.dumps(datos, ensure_ascii=False))
+
+
+def actualizar_golden(secuencia_file, golden_file=None):
+    """Reescribe la salida de referencia de una secuencia con el analizador actual"""
+    if golden_file is None:
+        golden_file = os.path.splitext(secuencia_file)[0] + ".json"
+    timestamps, landmarks, perfil, tipo_salto = cargar_secuencia(secuencia_file)
+    resultados, eventos, tiempos_us = reproducir(timestamps, landmarks, perfil, tipo_salto)
+
+    presupuesto = {p: round(max(PRESUPUESTO_MINIMO_US, v * MARGEN_PRESUPUESTO), 1)
+                   for p, v in _percentiles(tiempos_us).items()}
+    golden = {
+        'version': VERSION_GOLDEN,
+        'secuencia': os.path.basename(secuencia_file),
+        'resultados': resultados,
+        'eventos': eventos,
+        'presupuesto_us': presupuesto
+    }
+    write_json_atomic(golden_file, _normalizar(golden), indent=2)
+    logging.info(f"Golden actualizado: {golden_file} ({resultados['total']} saltos, {len(eventos)} eventos)")
+    return golden_file
+
+
+def verificar_golden(golden_file, factor_presupuesto=1.0):
+    """Reproduce la secuencia de un golden y la compara. Retorna (success, errors)"""
+    try:
+        with open(golden_file, 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+        if golden.get('version') != VERSION_GOLDEN:
+            return False, [f"Versión de golden no soportada: {golden.get('version')}"]
+
+        secuencia_file = os.path.join(os.path.dirname(golden_file), golden['secuencia'])
+        resultados, eventos, tiempos_us = reproducir(*cargar_secuencia(secuencia_file))
+
+        errors = comparar(golden['resultados'], _normalizar(resultados), "resultados")
+        errors += comparar(golden['eventos'], _normalizar(eventos), "eventos")
+
+        medidos = _percentiles(tiempos_us)
+        for percentil, limite in golden.get('presupuesto_us', {}).items():
+            limite *= factor_presupuesto
+            if medidos.get(percentil, 0.0) > limite:
+                errors.append(f"presupuesto: {percentil} {medidos[percentil]:.1f} µs/frame > {limite:.1f} µs")
+
+        return len(errors) == 0, errors
+
+    except Exception as e:
+        return False, [f"Error reproduciendo {golden_file}: {e}"]
+
+
+def verificar_directorio(directorio=DIRECTORIO_GOLDEN, factor_presupuesto=1.0):
+    """Verifica todos los golden de un directorio. Retorna (success, {archivo: errores})"""
+    fallos = {}
+    goldens = sorted(glob.glob(os.path.join(directorio, "*.json")))
+    if not goldens:
+        return False, {directorio: ["No hay archivos golden"]}
+    for golden_file in goldens:
+        success, errors = verificar_golden(golden_file, factor_presupuesto)
+        if not success:
+            fallos[golden_file] = errors
+    return len(fallos) == 0, fallos
+
+
+def generar_secuencias(directorio=DIRECTORIO_GOLDEN):
+    """Crea las secuencias sintéticas de referencia (CMJ, SQJ y Abalakov con ruido y oclusiones)"""
+    from synthetic_pose import GeneradorPoseSintetica
+
+    os.makedirs(directorio, exist_ok=True)
+    perfil = UsuarioPerfil("Golden", "M", 25, 175, 70, "intermedio")
+    archivos = []
+    for semilla, tipo in enumerate(TipoSalto):
+        generador = GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=tipo, saltos=2,
+                                                       prob_oclusion=0.01, semilla=semilla)
+        timestamps, landmarks, _ = generador.generar_arrays()
+        filename = os.path.join(directorio, f"{tipo.name.lower()}_sintetico.npz")
+        guardar_secuencia(filename, timestamps, landmarks, perfil, tipo)
+        archivos.append(filename)
+    return archivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducción golden del analizador de saltos")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_verificar = subparsers.add_parser("verificar", help="Compara las secuencias contra sus golden")
+    p_verificar.add_argument("--directorio", default=DIRECTORIO_GOLDEN)
+    p_verificar.add_argument("--factor-presupuesto", type=float, default=1.0,
+                             help="Escala los presupuestos de tiempo (máquinas lentas)")
+
+    p_actualizar = subparsers.add_parser("actualizar", help="Reescribe los golden con el analizador actual")
+    p_actualizar.add_argument("--directorio", default=DIRECTORIO_GOLDEN)
+
+    p_generar = subparsers.add_parser("generar", help="Regenera las secuencias sintéticas y sus golden")
+    p_generar.add_argument("--directorio", default=DIRECTORIO_GOLDEN)
+
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    if args.comando == "verificar":
+        success, fallos = verificar_directorio(args.directorio, args.factor_presupuesto)
+        for archivo, errors in fallos.items():
+            print(f"❌ {os.path.basename(archivo)}")
+            for error in errors:
+                print(f"   {error}")
+        if success:
+            print("✅ Todas las secuencias coinciden con sus golden")
+        return 0 if success else 1
+
+    if args.comando == "generar":
+        secuencias = generar_secuencias(args.directorio)
+    else:
+        secuencias = sorted(glob.glob(os.path.join(args.directorio, "*.npz")))
+    for secuencia_file in secuencias:
+        print(f"✅ {actualizar_golden(secuencia_file)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import json
 import time
@@ -7,10 +6,15 @@ from datetime import datetime
 import logging
 import yaml
 from collections import deque
-from enum import Enum
+from enum import Enum, IntEnum
 import os
 import math
 
+try:
+    import mediapipe as mp
+except ImportError:  # Análisis de landmarks sin detector (servidores, benchmarks)
+    mp = None
+
 # Configuración de Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -30,6 +34,7 @@ try:
     ROM_OPTIMO_SALTO = config.get('rom_optimo_salto', {})
     PARAMETROS_SALTO = config.get('parametros_salto', {})
     NIVEL_USUARIO = config.get('nivel_usuario', {})
+    CALIBRACION = config.get('calibracion', {})
 except FileNotFoundError:
     logging.error("config_Saltos.yaml no encontrado. Usando parámetros por defecto.")
     # Parámetros por defecto
@@ -88,6 +93,7 @@ except FileNotFoundError:
             'rango_minimo_cm': 90
         }
     }
+    CALIBRACION = {}
 
 class EstadoSalto(Enum):
     INICIAL = "INICIAL"
@@ -115,8 +121,237 @@ RANGOS_CLASIFICACION = {
     }
 }
 
+class TemporizadorEtapas:
+    """Tiempos por etapa de `process_frame` con percentiles móviles.
+
+    Cada etapa guarda sus últimas `ventana` duraciones (ns de perf_counter_ns)
+    en un deque; los percentiles solo se calculan al pedirlos, así que el
+    costo por frame es un par de lecturas de reloj y un append por etapa.
+    """
+    ETAPAS = ('conversion', 'pose', 'calibracion', 'verificar', 'potencia', 'total')
+
+    def __init__(self, ventana=300):
+        self.ventana = ventana
+        self.muestras = {etapa: deque(maxlen=ventana) for etapa in self.ETAPAS}
+        self.frame = {}
+
+    def iniciar_frame(self):
+        self.frame = {}
+
+    def registrar(self, etapa, duracion_ns):
+        self.frame[etapa] = duracion_ns
+        self.muestras[etapa].append(duracion_ns)
+
+    def tiempos_frame_ms(self):
+        """Tiempos del último frame en milisegundos"""
+        return {etapa: ns / 1e6 for etapa, ns in self.frame.items()}
+
+    def percentiles(self):
+        """p50/p95/p99 (ms) de cada etapa con muestras en la ventana"""
+        stats = {}
+        for etapa, muestras in self.muestras.items():
+            if not muestras:
+                continue
+            p50, p95, p99 = np.percentile(np.fromiter(muestras, dtype=np.int64, count=len(muestras)), [50, 95, 99]) / 1e6
+            stats[etapa] = {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'muestras': len(muestras)}
+        return stats
+
+# Índices de landmarks de MediaPipe Pose (disponibles aunque mediapipe no esté instalado)
+if mp is not None:
+    PoseLandmark = mp.solutions.pose.PoseLandmark
+else:
+    PoseLandmark = IntEnum('PoseLandmark', [
+        'NOSE', 'LEFT_EYE_INNER', 'LEFT_EYE', 'LEFT_EYE_OUTER', 'RIGHT_EYE_INNER', 'RIGHT_EYE',
+        'RIGHT_EYE_OUTER', 'LEFT_EAR', 'RIGHT_EAR', 'MOUTH_LEFT', 'MOUTH_RIGHT', 'LEFT_SHOULDER',
+        'RIGHT_SHOULDER', 'LEFT_ELBOW', 'RIGHT_ELBOW', 'LEFT_WRIST', 'RIGHT_WRIST', 'LEFT_PINKY',
+        'RIGHT_PINKY', 'LEFT_INDEX', 'RIGHT_INDEX', 'LEFT_THUMB', 'RIGHT_THUMB', 'LEFT_HIP',
+        'RIGHT_HIP', 'LEFT_KNEE', 'RIGHT_KNEE', 'LEFT_ANKLE', 'RIGHT_ANKLE', 'LEFT_HEEL',
+        'RIGHT_HEEL', 'LEFT_FOOT_INDEX', 'RIGHT_FOOT_INDEX'
+    ], start=0)
+
+NUM_LANDMARKS = 33
+
+# Frames de historial cinemático que se conservan (~10 s a 30 fps); la sesión puede durar horas
+VENTANA_HISTORIAL = 300
+
+# Estado de sesión que guarda JumpAnalyzer.snapshot()
+VERSION_SNAPSHOT = 1
+CAMPOS_SNAPSHOT = ('calibrado', 'px_to_m', 'initial_hip_y', 'initial_knee_x_diff', 'contador', 'correctas',
+                   'potencia', 'potencia_target', 'max_hip_y_cm', 'min_hip_y_flight', 'takeoff_time',
+                   'landing_time', 'jump_height_m', 'ultimo_tiempo')
+LISTAS_SNAPSHOT = ('alturas_saltos', 'tiempos_vuelo', 'potencias')
+SUAVIZADOS_SNAPSHOT = ('smoothed_knee_angles', 'smoothed_hip_angles', 'smoothed_ankle_angles', 'smoothed_trunk_angles')
+HISTORIALES_SNAPSHOT = ('historial_angulos_rodilla', 'historial_angulos_cadera', 'historial_pos_y_cadera',
+                        'historial_tiempos')
+
+def _valor_snapshot(valor):
+    # Escalares de numpy a tipos de Python; inf (sin vuelo registrado) no es JSON válido
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isinf(valor):
+        return None
+    return valor
+
+class Landmark:
+    """Landmark liviano compatible con los de MediaPipe (x, y, z, visibility)"""
+    __slots__ = ('x', 'y', 'z', 'visibility')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, visibility=1.0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+def landmarks_desde_array(array):
+    """Convierte un array (33, 4) de [x, y, z, visibility] en una lista de Landmark"""
+    return [Landmark(float(x), float(y), float(z), float(v)) for x, y, z, v in array]
+
+def landmarks_a_array(lm):
+    """Convierte una lista de landmarks (MediaPipe o Landmark) en un array (33, 4)"""
+    return np.array([[p.x, p.y, p.z, p.visibility] for p in lm], dtype=np.float32)
+
+# Landmarks que deben verse con claridad para calibrar
+LANDMARKS_CALIBRACION = (PoseLandmark.LEFT_HIP, PoseLandmark.RIGHT_HIP, PoseLandmark.LEFT_KNEE, PoseLandmark.RIGHT_KNEE,
+                         PoseLandmark.LEFT_ANKLE, PoseLandmark.RIGHT_ANKLE, PoseLandmark.LEFT_SHOULDER,
+                         PoseLandmark.RIGHT_SHOULDER)
+
+def medidas_calibracion(lm):
+    """Medidas de calibración de un frame: (distancia entre rodillas, altura media de cadera, diferencia x de rodillas).
+
+    Lanza CalibrationError si falta algún landmark clave o la distancia entre rodillas es cero.
+    """
+    for landmark in LANDMARKS_CALIBRACION:
+        if landmark.value >= len(lm) or not lm[landmark.value].visibility > 0.7:
+            raise CalibrationError(f"Landmark {landmark.name} no detectado o visibilidad baja.")
+
+    lhip_3d = np.array([lm[PoseLandmark.LEFT_HIP.value].x,
+                        lm[PoseLandmark.LEFT_HIP.value].y,
+                        lm[PoseLandmark.LEFT_HIP.value].z])
+    rhip_3d = np.array([lm[PoseLandmark.RIGHT_HIP.value].x,
+                        lm[PoseLandmark.RIGHT_HIP.value].y,
+                        lm[PoseLandmark.RIGHT_HIP.value].z])
+    lknee_3d = np.array([lm[PoseLandmark.LEFT_KNEE.value].x,
+                         lm[PoseLandmark.LEFT_KNEE.value].y,
+                         lm[PoseLandmark.LEFT_KNEE.value].z])
+    rknee_3d = np.array([lm[PoseLandmark.RIGHT_KNEE.value].x,
+                         lm[PoseLandmark.RIGHT_KNEE.value].y,
+                         lm[PoseLandmark.RIGHT_KNEE.value].z])
+
+    mid_hip_initial_y_px = (lhip_3d[1] + rhip_3d[1]) / 2
+    dist_rodillas_px = np.hypot(lknee_3d[0] - rknee_3d[0], lknee_3d[1] - rknee_3d[1])
+    if not dist_rodillas_px > 0:
+        raise CalibrationError("Distancia entre rodillas cero. Posición incorrecta.")
+    return dist_rodillas_px, mid_hip_initial_y_px, abs(lknee_3d[0] - rknee_3d[0])
+
+# Dispersión relativa de las medidas (sobre su mediana) con la que la estabilidad llega a 0
+DISPERSION_MAXIMA = 0.05
+
+class AcumuladorCalibracion:
+    """Calibración robusta a partir de varios frames de postura estática.
+
+    Cada frame válido agrega sus medidas (`medidas_calibracion`) a un buffer
+    circular preasignado de `max_frames` filas. Los frames con alguna medida a
+    más de `umbral_mad` desviaciones robustas (MAD escalada) de la mediana se
+    descartan como atípicos, y la estimación es la media de los restantes.
+
+    La calibración termina en cuanto el error relativo de la estimación
+    (dispersión / sqrt(inliers)) baja de `tolerancia` con al menos
+    `min_frames` inliers; si en `max_frames` no converge, se acepta igual
+    siempre que la fracción de inliers sea suficiente y la postura no oscile
+    más de `DISPERSION_MAXIMA`. Si no, sigue con los frames más recientes. Así
+    una rodilla mal detectada en un frame no fija la escala de toda la sesión
+    y un deportista quieto calibra en una fracción de segundo.
+    """
+
+    def __init__(self, min_frames=10, max_frames=60, tolerancia=0.005, umbral_mad=3.5, fraccion_minima=0.6):
+        self.min_frames = min_frames
+        self.max_frames = max(max_frames, min_frames)
+        self.tolerancia = tolerancia
+        self.umbral_mad = umbral_mad
+        self.fraccion_minima = fraccion_minima
+        # Filas: distancia entre rodillas, altura de cadera, diferencia x de rodillas
+        self._muestras = np.empty((self.max_frames, 3), dtype=np.float64)
+        self.reiniciar()
+
+    @classmethod
+    def desde_config(cls):
+        """Crea un acumulador con la sección `calibracion` de config_Saltos.yaml (valores por defecto si no existe)"""
+        return cls(min_frames=CALIBRACION.get('min_frames', 10),
+                   max_frames=CALIBRACION.get('max_frames', 60),
+                   tolerancia=CALIBRACION.get('tolerancia', 0.005),
+                   umbral_mad=CALIBRACION.get('umbral_mad', 3.5),
+                   fraccion_minima=CALIBRACION.get('fraccion_minima', 0.6))
+
+    def reiniciar(self):
+        self.frames = 0
+        self.rechazados = 0
+        self.inliers = 0
+        self.estimacion = None
+        self.dispersion = 0.0
+        self.convergido = False
+        self.completo = False
+        self.muestra_aceptada = False
+
+    @property
+    def estabilidad(self):
+        """1 = postura inmóvil; 0 = oscilación de DISPERSION_MAXIMA o más"""
+        return max(0.0, 1.0 - self.dispersion / DISPERSION_MAXIMA)
+
+    @property
+    def confianza(self):
+        """Fracción de frames aceptados como inliers ponderada por la estabilidad"""
+        ventana = min(self.frames, self.max_frames)
+        return self.inliers / ventana * self.estabilidad if ventana else 0.0
+
+    def agregar(self, lm):
+        """Agrega un frame; retorna False si no tiene los landmarks necesarios. Ver `completo`"""
+        try:
+            medidas = medidas_calibracion(lm)
+        except CalibrationError:
+            self.rechazados += 1
+            self.muestra_aceptada = False
+            return False
+        self._muestras[self.frames % self.max_frames] = medidas
+        self.frames += 1
+        self.muestra_aceptada = True
+        self._estimar()
+        return True
+
+    def _estimar(self):
+        datos = self._muestras[:min(self.frames, self.max_frames)]
+        mediana = np.median(datos, axis=0)
+        desviacion = 1.4826 * np.median(np.abs(datos - mediana), axis=0)
+        # Con MAD cero (frames idénticos) solo son inliers los que coinciden con la mediana
+        limite = np.maximum(self.umbral_mad * desviacion, 1e-9)
+        inliers = np.all(np.abs(datos - mediana) <= limite, axis=1)
+
+        self.inliers = int(np.count_nonzero(inliers))
+        self.estimacion = tuple(float(v) for v in datos[inliers].mean(axis=0))
+        # Solo escala y altura de cadera fijan la calibración
+        self.dispersion = float(np.max(desviacion[:2] / np.abs(mediana[:2])))
+        fraccion = self.inliers / len(datos)
+        error_relativo = self.dispersion / math.sqrt(self.inliers)
+        self.convergido = (self.inliers >= self.min_frames and fraccion >= self.fraccion_minima
+                           and error_relativo <= self.tolerancia)
+        self.completo = self.convergido or (self.frames >= self.max_frames and fraccion >= self.fraccion_minima
+                                            and self.dispersion < DISPERSION_MAXIMA)
+
+    def estado(self):
+        """Progreso y calidad de la calibración en curso"""
+        return {
+            'frames': self.frames,
+            'inliers': self.inliers,
+            'rechazados': self.rechazados,
+            'muestra_aceptada': self.muestra_aceptada,
+            'progreso': 1.0 if self.completo else min(self.inliers / self.min_frames, 0.99),
+            'confianza': self.confianza,
+            'estabilidad': self.estabilidad,
+            'convergido': self.convergido,
+            'completo': self.completo
+        }
+
 class JumpAnalyzer:
-    def __init__(self, usuario_perfil):
+    def __init__(self, usuario_perfil, medir_latencias=False, usar_mediapipe=True):
         self.usuario = usuario_perfil
         self.contador = 0
         self.correctas = 0
@@ -155,10 +390,10 @@ class JumpAnalyzer:
         self.jump_height_m = 0
         self.tipo_salto = TipoSalto.CMJ
 
-        self.historial_angulos_rodilla = []
-        self.historial_angulos_cadera = []
-        self.historial_pos_y_cadera = []
-        self.historial_tiempos = []
+        self.historial_angulos_rodilla = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_angulos_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_pos_y_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_tiempos = deque(maxlen=VENTANA_HISTORIAL)
         self.mensajes_feedback = []
 
         self.alturas_saltos = []
@@ -195,12 +430,31 @@ class JumpAnalyzer:
         }
         self.px_to_m = 0
 
-        # Inicializar MediaPipe
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # Calibración con varios frames de process_frame/process_landmarks
+        self.acumulador_calibracion = AcumuladorCalibracion.desde_config()
+
+        # Escritor de telemetría opcional (ver telemetry_writer.TelemetryWriter)
+        self.telemetria = None
+
+        # Medición opcional de latencias por etapa (None = desactivada, sin costo)
+        self.temporizador = TemporizadorEtapas() if medir_latencias else None
+
+        # Métricas de la estación opcionales (ver metrics_server.MetricasEstacion)
+        self.metricas = None
+        self._inferencia_ns = None
+
+        # Inicializar MediaPipe (opcional: sin detector solo se analizan landmarks ya extraídos)
+        self.mp_pose = None
+        self.pose = None
+        if usar_mediapipe:
+            if mp is None:
+                logging.warning("mediapipe no está instalado: solo se podrán analizar landmarks")
+            else:
+                self.mp_pose = mp.solutions.pose
+                self.pose = self.mp_pose.Pose(
+                    min_detection_confidence=0.5,
+                    min_tracking_confidence=0.5
+                )
 
     def set_tipo_salto(self, tipo_salto: TipoSalto):
         """Establece el tipo de salto a analizar"""
@@ -215,58 +469,9 @@ class JumpAnalyzer:
             self.mensajes_feedback.append("SALTO ABALAKOV: Use brazos para impulsarse activamente")
 
     def calibrar(self, lm):
-        """Calibra el sistema usando los landmarks detectados"""
+        """Calibra el sistema con los landmarks de un solo frame (ver `calibrar_acumulado`)"""
         try:
-            required_landmarks = [
-                self.mp_pose.PoseLandmark.LEFT_HIP,
-                self.mp_pose.PoseLandmark.RIGHT_HIP,
-                self.mp_pose.PoseLandmark.LEFT_KNEE,
-                self.mp_pose.PoseLandmark.RIGHT_KNEE,
-                self.mp_pose.PoseLandmark.LEFT_ANKLE,
-                self.mp_pose.PoseLandmark.RIGHT_ANKLE,
-                self.mp_pose.PoseLandmark.LEFT_SHOULDER,
-                self.mp_pose.PoseLandmark.RIGHT_SHOULDER
-            ]
-
-            for landmark in required_landmarks:
-                if landmark.value >= len(lm) or not lm[landmark.value].visibility > 0.7:
-                    logging.warning(f"Calibración fallida: Landmark {landmark.name} no visible o ausente.")
-                    raise CalibrationError(f"Landmark {landmark.name} no detectado o visibilidad baja.")
-
-            lhip_3d = np.array([lm[self.mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                                lm[self.mp_pose.PoseLandmark.LEFT_HIP.value].y,
-                                lm[self.mp_pose.PoseLandmark.LEFT_HIP.value].z])
-            rhip_3d = np.array([lm[self.mp_pose.PoseLandmark.RIGHT_HIP.value].x,
-                                lm[self.mp_pose.PoseLandmark.RIGHT_HIP.value].y,
-                                lm[self.mp_pose.PoseLandmark.RIGHT_HIP.value].z])
-            lknee_3d = np.array([lm[self.mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                                 lm[self.mp_pose.PoseLandmark.LEFT_KNEE.value].y,
-                                 lm[self.mp_pose.PoseLandmark.LEFT_KNEE.value].z])
-            rknee_3d = np.array([lm[self.mp_pose.PoseLandmark.RIGHT_KNEE.value].x,
-                                 lm[self.mp_pose.PoseLandmark.RIGHT_KNEE.value].y,
-                                 lm[self.mp_pose.PoseLandmark.RIGHT_KNEE.value].z])
-
-            mid_hip_initial_y_px = (lhip_3d[1] + rhip_3d[1]) / 2
-            dist_rodillas_px = np.hypot(lknee_3d[0] - rknee_3d[0], lknee_3d[1] - rknee_3d[1])
-            
-            if dist_rodillas_px > 0:
-                self.px_to_m = self.usuario.longitudes["distancia_rodillas"] / dist_rodillas_px
-            else:
-                logging.error("Distancia entre rodillas cero durante calibración.")
-                raise CalibrationError("Distancia entre rodillas cero. Posición incorrecta.")
-
-            self.initial_hip_y = mid_hip_initial_y_px
-            self.initial_knee_x_diff = abs(lknee_3d[0] - rknee_3d[0])
-
-            if self.px_to_m < 0.001 or self.initial_hip_y <= 0:
-                logging.error("Valores de calibración inválidos. Reiniciando calibración.")
-                self.calibrado = False
-                return False
-
-            self.calibrado = True
-            logging.info(f"Calibrado exitoso: factor_px_m={self.px_to_m:.5f}, initial_hip_y={self.initial_hip_y:.5f}")
-            return True
-            
+            return self.aplicar_calibracion(*medidas_calibracion(lm))
         except CalibrationError as e:
             logging.error(f"Error específico en calibración: {e}")
             self.calibrado = False
@@ -276,9 +481,88 @@ class JumpAnalyzer:
             self.calibrado = False
             return False
 
-    def process_frame(self, frame):
-        """Procesa un frame de la cámara y retorna datos de análisis"""
+    def calibrar_acumulado(self, lm):
+        """Agrega un frame a `acumulador_calibracion` y calibra cuando la estimación converge.
+
+        Retorna True en el frame que completa la calibración.
+        """
+        acumulador = self.acumulador_calibracion
+        if not acumulador.agregar(lm) or not acumulador.completo:
+            return False
+        if not self.aplicar_calibracion(*acumulador.estimacion):
+            acumulador.reiniciar()
+            return False
+        logging.info(f"Calibración en {acumulador.frames} frames ({acumulador.inliers} inliers): "
+                     f"confianza={acumulador.confianza:.2f}, estabilidad={acumulador.estabilidad:.2f}")
+        return True
+
+    def aplicar_calibracion(self, dist_rodillas_px, mid_hip_initial_y_px, knee_x_diff):
+        """Fija escala y posición inicial a partir de las medidas de calibración"""
+        if not dist_rodillas_px > 0:
+            logging.error("Distancia entre rodillas cero durante calibración.")
+            self.calibrado = False
+            return False
+
+        self.px_to_m = self.usuario.longitudes["distancia_rodillas"] / dist_rodillas_px
+        self.initial_hip_y = mid_hip_initial_y_px
+        self.initial_knee_x_diff = knee_x_diff
+
+        if self.px_to_m < 0.001 or self.initial_hip_y <= 0:
+            logging.error("Valores de calibración inválidos. Reiniciando calibración.")
+            self.calibrado = False
+            return False
+
+        self.calibrado = True
+        logging.info(f"Calibrado exitoso: factor_px_m={self.px_to_m:.5f}, initial_hip_y={self.initial_hip_y:.5f}")
+        return True
+
+    def process_frame(self, frame, timestamp=None):
+        """Procesa un frame de la cámara y retorna datos de análisis.
+
+        `timestamp` (segundos) es el reloj de la fuente; None usa el reloj de pared.
+        """
+        return self._procesar_medido(self._procesar_frame, frame, timestamp)
+
+    def process_landmarks(self, lm, timestamp=None):
+        """Procesa landmarks ya extraídos (p. ej. en el dispositivo) y retorna los mismos datos que process_frame"""
+        return self._procesar_medido(self._procesar_landmarks, lm, timestamp)
+
+    def _procesar_medido(self, procesar, *args):
+        temporizador = self.temporizador
+        metricas = self.metricas
+        if temporizador is None and metricas is None:
+            return procesar(*args)
+
+        if temporizador is not None:
+            temporizador.iniciar_frame()
+        self._inferencia_ns = None
+        t0 = time.perf_counter_ns()
+        resultado = procesar(*args)
+        total_ns = time.perf_counter_ns() - t0
+        if temporizador is not None:
+            temporizador.registrar('total', total_ns)
+            resultado['latencias_ms'] = temporizador.tiempos_frame_ms()
+        if metricas is not None:
+            metricas.registrar_frame(resultado, total_ns, self._inferencia_ns)
+        return resultado
+
+    def get_latency_stats(self):
+        """Percentiles móviles (ms) por etapa; vacío si la medición está desactivada"""
+        if self.temporizador is None:
+            return {}
+        return self.temporizador.percentiles()
+
+    def _procesar_frame(self, frame, timestamp=None):
+        temporizador = self.temporizador
+        medir = temporizador is not None or self.metricas is not None
         try:
+            if self.pose is None:
+                return {
+                    'error': 'Detector de pose no disponible',
+                    'estado': self.estado.value,
+                    'feedback': ['Error: Detector de pose no disponible']
+                }
+
             if frame is None:
                 return {
                     'error': 'Frame vacío',
@@ -287,8 +571,17 @@ class JumpAnalyzer:
                 }
 
             # Convertir frame a RGB para MediaPipe
+            if medir:
+                t0 = time.perf_counter_ns()
             image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if medir:
+                t1 = time.perf_counter_ns()
             results = self.pose.process(image_rgb)
+            if medir:
+                self._inferencia_ns = time.perf_counter_ns() - t1
+                if temporizador is not None:
+                    temporizador.registrar('conversion', t1 - t0)
+                    temporizador.registrar('pose', self._inferencia_ns)
 
             if not results.pose_landmarks:
                 return {
@@ -297,50 +590,89 @@ class JumpAnalyzer:
                     'feedback': ['Ajuste su posición para ser visible completamente']
                 }
 
-            lm = results.pose_landmarks.landmark
-
-            if not self.calibrado:
-                calibration_success = self.calibrar(lm)
-                return {
-                    'calibrando': True,
-                    'calibration_success': calibration_success,
-                    'estado': 'CALIBRANDO',
-                    'feedback': ['Mantenga posición estable para calibrar'] if not calibration_success else ['Calibración exitosa']
-                }
+            return self._analizar_landmarks(results.pose_landmarks.landmark, timestamp)
 
-            # Procesar análisis de salto
-            angle_rodilla, postura_ok, detalles_salto = self.verificar(lm)
-            
+        except Exception as e:
+            logging.error(f"Error procesando frame: {e}")
             return {
-                'calibrando': False,
-                'angulo_rodilla': angle_rodilla,
-                'postura_correcta': postura_ok,
+                'error': f'Error procesando frame: {str(e)}',
                 'estado': self.estado.value,
-                'jump_height': self.jump_height_m,
-                'potencia': self.potencia,
-                'contador': self.contador,
-                'correctas': self.correctas,
-                'feedback': self.mensajes_feedback[-3:] if self.mensajes_feedback else [],
-                'detalles': detalles_salto,
-                'tipo_salto': self.tipo_salto.value
+                'feedback': [f'Error: {str(e)}']
             }
 
+    def _procesar_landmarks(self, lm, timestamp=None):
+        try:
+            if lm is None or len(lm) < NUM_LANDMARKS:
+                return {
+                    'error': 'Landmarks incompletos',
+                    'estado': self.estado.value,
+                    'feedback': ['Error: Landmarks incompletos']
+                }
+            return self._analizar_landmarks(lm, timestamp)
+
         except Exception as e:
-            logging.error(f"Error procesando frame: {e}")
+            logging.error(f"Error procesando landmarks: {e}")
             return {
-                'error': f'Error procesando frame: {str(e)}',
+                'error': f'Error procesando landmarks: {str(e)}',
                 'estado': self.estado.value,
                 'feedback': [f'Error: {str(e)}']
             }
 
-    def verificar(self, lm):
-        """Lógica principal de verificación de salto"""
+    def _analizar_landmarks(self, lm, timestamp=None):
+        """Calibración o verificación de un frame de landmarks, común a frames de cámara y landmarks remotos"""
+        temporizador = self.temporizador
+        medir = temporizador is not None or self.metricas is not None
+        if not self.calibrado:
+            if temporizador is not None:
+                t0 = time.perf_counter_ns()
+            calibration_success = self.calibrar_acumulado(lm)
+            if temporizador is not None:
+                temporizador.registrar('calibracion', time.perf_counter_ns() - t0)
+            return {
+                'calibrando': True,
+                'calibration_success': calibration_success,
+                'calibracion': self.acumulador_calibracion.estado(),
+                'estado': 'CALIBRANDO',
+                'feedback': ['Mantenga posición estable para calibrar'] if not calibration_success else ['Calibración exitosa']
+            }
+
+        # Procesar análisis de salto
+        if medir:
+            t0 = time.perf_counter_ns()
+        angle_rodilla, postura_ok, detalles_salto = self.verificar(lm, timestamp)
+        if medir:
+            t_verificar = time.perf_counter_ns() - t0
+            if temporizador is not None:
+                temporizador.registrar('verificar', t_verificar)
+            if self.metricas is not None:
+                self.metricas.latencia_verificar.observe(t_verificar / 1e9)
+
+        return {
+            'calibrando': False,
+            'angulo_rodilla': angle_rodilla,
+            'postura_correcta': postura_ok,
+            'estado': self.estado.value,
+            'jump_height': self.jump_height_m,
+            'potencia': self.potencia,
+            'contador': self.contador,
+            'correctas': self.correctas,
+            'feedback': self.mensajes_feedback[-3:] if self.mensajes_feedback else [],
+            'detalles': detalles_salto,
+            'tipo_salto': self.tipo_salto.value
+        }
+
+    def verificar(self, lm, timestamp=None):
+        """Lógica principal de verificación de salto.
+
+        `timestamp` (segundos) permite usar el reloj de la fuente (video,
+        landmarks grabados o sintéticos) en lugar del reloj de pared.
+        """
         if not self.calibrado:
             logging.warning("Verificación llamada sin calibrar.")
             return 0, False, {"error": "Sin calibrar", "feedback": "Sin calibrar"}
 
-        self.mensajes_feedback = []
-        current_time = time.time()
+        self.mensajes_feedback.clear()
+        current_time = time.time() if timestamp is None else timestamp
         delta_time = current_time - self.ultimo_tiempo
         self.ultimo_tiempo = current_time
 
@@ -358,16 +690,16 @@ class JumpAnalyzer:
                 raise PoseDetectionError(f"Punto {p_enum.name} no detectado o visibilidad baja.")
 
             # Puntos clave
-            lhip = pt(self.mp_pose.PoseLandmark.LEFT_HIP)
-            lknee = pt(self.mp_pose.PoseLandmark.LEFT_KNEE)
-            lankle = pt(self.mp_pose.PoseLandmark.LEFT_ANKLE)
-            rhip = pt(self.mp_pose.PoseLandmark.RIGHT_HIP)
-            rknee = pt(self.mp_pose.PoseLandmark.RIGHT_KNEE)
-            rankle = pt(self.mp_pose.PoseLandmark.RIGHT_ANKLE)
-            lshoulder = pt(self.mp_pose.PoseLandmark.LEFT_SHOULDER)
-            rshoulder = pt(self.mp_pose.PoseLandmark.RIGHT_SHOULDER)
-            lheel = pt(self.mp_pose.PoseLandmark.LEFT_HEEL)
-            rheel = pt(self.mp_pose.PoseLandmark.RIGHT_HEEL)
+            lhip = pt(PoseLandmark.LEFT_HIP)
+            lknee = pt(PoseLandmark.LEFT_KNEE)
+            lankle = pt(PoseLandmark.LEFT_ANKLE)
+            rhip = pt(PoseLandmark.RIGHT_HIP)
+            rknee = pt(PoseLandmark.RIGHT_KNEE)
+            rankle = pt(PoseLandmark.RIGHT_ANKLE)
+            lshoulder = pt(PoseLandmark.LEFT_SHOULDER)
+            rshoulder = pt(PoseLandmark.RIGHT_SHOULDER)
+            lheel = pt(PoseLandmark.LEFT_HEEL)
+            rheel = pt(PoseLandmark.RIGHT_HEEL)
 
             mid_hip_y_px = (lhip[1] + rhip[1]) / 2
 
@@ -410,6 +742,7 @@ class JumpAnalyzer:
             # Máquina de estados
             postura_correcta_frame = True
             error_keys = []
+            estado_anterior = self.estado
 
             if self.estado == EstadoSalto.INICIAL:
                 if mid_hip_y_px > (self.initial_hip_y + (0.02 * self.px_to_m)) and prom_rodilla < (self.umbrales["rodilla_extension_takeoff"] - self.usuario.umbrales_nivel['tolerancia_angulo']):
@@ -487,9 +820,13 @@ class JumpAnalyzer:
                     self.estado = EstadoSalto.INICIAL
                     logging.info("Estado: INICIAL (listo para el próximo salto)")
 
+            if self.temporizador is not None:
+                t_potencia = time.perf_counter_ns()
             self._actualizar_potencia(postura_correcta_frame, prom_rodilla, velocidad_rodilla)
+            if self.temporizador is not None:
+                self.temporizador.registrar('potencia', time.perf_counter_ns() - t_potencia)
 
-            return prom_rodilla, postura_correcta_frame, {
+            detalles = {
                 "angulo_rodilla": prom_rodilla,
                 "angulo_cadera": prom_cadera,
                 "angulo_tobillo": prom_tobillo,
@@ -501,8 +838,23 @@ class JumpAnalyzer:
                 "tipo_salto": self.tipo_salto.value
             }
 
+            if self.metricas is not None:
+                for error_key in error_keys:
+                    self.metricas.errores.inc(error_key)
+                if self.estado == EstadoSalto.ESTABLE_POST_ATERRIZAJE and estado_anterior != self.estado:
+                    self.metricas.saltos.inc(self.tipo_salto.name, "si" if postura_correcta_frame else "no")
+
+            if self.telemetria is not None:
+                if self.estado != estado_anterior:
+                    self.telemetria.write_transition(current_time, estado_anterior.value, self.estado.value, self)
+                self.telemetria.write_frame(current_time, self.estado.value, detalles, self.potencia, error_keys)
+
+            return prom_rodilla, postura_correcta_frame, detalles
+
         except PoseDetectionError as e:
             logging.warning(f"Error de detección en verificar: {e}")
+            if self.metricas is not None:
+                self.metricas.landmarks_no_visibles.inc()
             return 0, False, {"error": str(e), "feedback": str(e), "estado_salto_str": self.estado.value}
         except Exception as e:
             logging.error(f"Error inesperado en verificar: {e}")
@@ -582,6 +934,7 @@ class JumpAnalyzer:
             "altura_salto_promedio": altura_promedio,
             "potencia_promedio": potencia_promedio,
             "tiempo_vuelo_promedio": tiempo_vuelo_promedio,
+            "alturas_saltos": [float(a) for a in self.alturas_saltos],
             "clasificacion": clasificacion,
             "tipo_salto": self.tipo_salto.value,
             "evaluacion_rendimiento": evaluacion,
@@ -655,10 +1008,10 @@ class JumpAnalyzer:
         self.landing_time = 0
         self.jump_height_m = 0
         
-        self.historial_angulos_rodilla = []
-        self.historial_angulos_cadera = []
-        self.historial_pos_y_cadera = []
-        self.historial_tiempos = []
+        self.historial_angulos_rodilla = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_angulos_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_pos_y_cadera = deque(maxlen=VENTANA_HISTORIAL)
+        self.historial_tiempos = deque(maxlen=VENTANA_HISTORIAL)
         self.mensajes_feedback = []
         
         self.alturas_saltos = []
@@ -671,5 +1024,100 @@ class JumpAnalyzer:
         self.smoothed_trunk_angles.clear()
         
         self.px_to_m = 0
+        self.acumulador_calibracion.reiniciar()
         
         logging.info("Sesión de análisis reiniciada")
+
+    def snapshot(self, incluir_historial=False):
+        """Estado de la sesión como diccionario compacto serializable a JSON.
+
+        Incluye calibración, contadores, errores, listas por salto, estado de
+        la máquina y ventanas de suavizado (unos cientos de bytes más ~20 por
+        salto). De los historiales cinemáticos se guarda solo el último frame;
+        `incluir_historial` los guarda completos (hasta VENTANA_HISTORIAL
+        frames, para gráficos).
+        """
+        datos = {
+            'version': VERSION_SNAPSHOT,
+            'perfil': self.usuario.to_dict(),
+            'tipo_salto': self.tipo_salto.name,
+            'estado': self.estado.name,
+            'errores': dict(self.errores)
+        }
+        for campo in CAMPOS_SNAPSHOT:
+            datos[campo] = _valor_snapshot(getattr(self, campo))
+        for campo in LISTAS_SNAPSHOT + SUAVIZADOS_SNAPSHOT:
+            datos[campo] = [_valor_snapshot(v) for v in getattr(self, campo)]
+        # Sin historial completo basta el último frame, del que depende la velocidad de rodilla
+        datos['historial'] = {}
+        for campo in HISTORIALES_SNAPSHOT:
+            historial = getattr(self, campo)
+            if not incluir_historial:
+                historial = [historial[-1]] if historial else []
+            datos['historial'][campo] = [_valor_snapshot(v) for v in historial]
+        return datos
+
+    def restore(self, datos):
+        """Restaura un snapshot en este analizador. Retorna (success, errors)
+
+        Si el snapshot es inválido el analizador queda sin cambios.
+        """
+        errors = []
+        if not isinstance(datos, dict) or datos.get('version') != VERSION_SNAPSHOT:
+            version = datos.get('version') if isinstance(datos, dict) else None
+            return False, [f"Versión de snapshot no soportada: {version}"]
+        faltantes = [c for c in ('tipo_salto', 'estado', 'errores') + CAMPOS_SNAPSHOT + LISTAS_SNAPSHOT
+                     if c not in datos]
+        if faltantes:
+            return False, [f"Snapshot incompleto, faltan: {', '.join(faltantes)}"]
+        try:
+            tipo_salto = TipoSalto[datos['tipo_salto']]
+            estado = EstadoSalto[datos['estado']]
+        except KeyError as e:
+            return False, [f"Valor inválido en snapshot: {e}"]
+        desconocidos = set(datos['errores']) - set(self.errores)
+        if desconocidos:
+            errors.append(f"Errores técnicos desconocidos en snapshot: {', '.join(sorted(desconocidos))}")
+        if errors:
+            return False, errors
+
+        self.tipo_salto = tipo_salto
+        self.estado = estado
+        self.errores = {k: datos['errores'].get(k, 0) for k in self.errores}
+        for campo in CAMPOS_SNAPSHOT:
+            setattr(self, campo, datos[campo])
+        if self.min_hip_y_flight is None:
+            self.min_hip_y_flight = float('inf')
+        for campo in LISTAS_SNAPSHOT:
+            setattr(self, campo, list(datos[campo]))
+        for campo in SUAVIZADOS_SNAPSHOT:
+            suavizado = getattr(self, campo)
+            suavizado.clear()
+            suavizado.extend(datos.get(campo, []))
+        historial = datos.get('historial', {})
+        for campo in HISTORIALES_SNAPSHOT:
+            setattr(self, campo, deque(historial.get(campo, []), maxlen=VENTANA_HISTORIAL))
+        self.mensajes_feedback = []
+        # Una calibración a medias no se guarda: si el snapshot no estaba calibrado, se empieza de nuevo
+        self.acumulador_calibracion.reiniciar()
+
+        logging.info(f"Sesión restaurada: {self.contador} saltos, estado {self.estado.value}")
+        return True, []
+
+    @classmethod
+    def desde_snapshot(cls, datos, usuario_perfil=None, **kwargs):
+        """Crea un analizador a partir de un snapshot (p. ej. en otro proceso). Retorna (analizador, errors)
+
+        Sin `usuario_perfil` se usa el perfil guardado en el snapshot.
+        """
+        if usuario_perfil is None:
+            from profile_manager import UsuarioPerfil
+            try:
+                usuario_perfil = UsuarioPerfil.from_dict(datos['perfil'])
+            except (KeyError, TypeError, AttributeError) as e:
+                return None, [f"Snapshot sin perfil válido: {e}"]
+        analizador = cls(usuario_perfil, **kwargs)
+        success, errors = analizador.restore(datos)
+        if not success:
+            return None, errors
+        return analizador, []
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Servicio de ingesta de landmarks: los dispositivos ejecutan la detección de pose
+y el servidor ejecuta la biomecánica (JumpAnalyzer) por sesión
+
+Protocolo binario sobre TCP (little-endian). Cada mensaje lleva una cabecera
+'<2sBBII' (magic b'ES', versión, tipo, id de sesión, longitud del payload):
+
+    INICIO      JSON {"perfil": {...}} o {"usuario": nombre}, más "tipo_salto" y "detalles"
+    FRAME       '<d' timestamp (s) + 33×4 float32 [x, y, z, visibility]   (536 bytes)
+    RECALIBRAR  sin payload
+    SNAPSHOT    sin payload (estado de la sesión para migrarla a otro proceso)
+    FIN         sin payload
+
+El servidor responde en orden, un mensaje por cada mensaje recibido:
+ESTADO (JSON con estado y feedback), RESULTADOS (JSON de get_results al FIN),
+SNAPSHOT_DATOS (JSON de JumpAnalyzer.snapshot) o ERROR (JSON {"error": ...}).
+Un INICIO con {"snapshot": {...}} continúa una sesión migrada desde otro servidor. Una conexión puede llevar varias sesiones
+(por ejemplo un concentrador con varios deportistas), identificadas por el id.
+
+Uso:
+    python3 landmark_server.py [--host 0.0.0.0] [--puerto 9465]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import yaml
+
+from jump_analyzer import JumpAnalyzer, TipoSalto, NUM_LANDMARKS, landmarks_desde_array
+from profile_manager import UsuarioPerfil, save_session_results
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MAGIC = b'ES'
+VERSION_PROTOCOLO = 1
+CABECERA = struct.Struct('<2sBBII')
+TIMESTAMP = struct.Struct('<d')
+TAMANO_FRAME = TIMESTAMP.size + NUM_LANDMARKS * 4 * 4
+MAX_PAYLOAD = 64 * 1024
+
+# Tipos de mensaje (cliente → servidor)
+MSG_INICIO = 1
+MSG_FRAME = 2
+MSG_RECALIBRAR = 3
+MSG_FIN = 4
+MSG_SNAPSHOT = 5
+# Tipos de mensaje (servidor → cliente)
+MSG_ESTADO = 0x81
+MSG_RESULTADOS = 0x82
+MSG_SNAPSHOT_DATOS = 0x83
+MSG_ERROR = 0xFF
+
+# Claves del resultado de process_landmarks que se envían en cada ESTADO
+CLAVES_ESTADO = ('estado', 'calibrando', 'calibration_success', 'calibracion', 'postura_correcta',
+                 'angulo_rodilla', 'jump_height', 'potencia', 'contador', 'correctas', 'feedback', 'error')
+
+
+class ErrorProtocolo(Exception):
+    """Mensaje mal formado (magic, versión o longitud inválidos)"""
+    pass
+
+
+def _a_json(valor):
+    # Escalares de numpy (np.float64, np.bool_) en los resultados del analizador
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return str(valor)
+
+
+def empaquetar(tipo, sesion_id, payload=b''):
+    """Mensaje completo (cabecera + payload)"""
+    return CABECERA.pack(MAGIC, VERSION_PROTOCOLO, tipo, sesion_id, len(payload)) + payload
+
+
+def empaquetar_json(tipo, sesion_id, datos):
+    return empaquetar(tipo, sesion_id, json.dumps(datos, ensure_ascii=False, default=_a_json).encode('utf-8'))
+
+
+def empaquetar_frame(sesion_id, timestamp, landmarks):
+    """Mensaje FRAME a partir de un array (33, 4) de [x, y, z, visibility]"""
+    datos = np.ascontiguousarray(landmarks, dtype='<f4')
+    if datos.shape != (NUM_LANDMARKS, 4):
+        raise ValueError(f"Se esperaba un array ({NUM_LANDMARKS}, 4), no {datos.shape}")
+    return empaquetar(MSG_FRAME, sesion_id, TIMESTAMP.pack(timestamp) + datos.tobytes())
+
+
+def desempaquetar_frame(payload):
+    """Retorna (timestamp, array (33, 4) float32) de un payload FRAME"""
+    if len(payload) != TAMANO_FRAME:
+        raise ErrorProtocolo(f"Frame de {len(payload)} bytes, se esperaban {TAMANO_FRAME}")
+    timestamp, = TIMESTAMP.unpack_from(payload)
+    landmarks = np.frombuffer(payload, dtype='<f4', offset=TIMESTAMP.size).reshape(NUM_LANDMARKS, 4)
+    return timestamp, landmarks
+
+
+async def leer_mensaje(reader):
+    """Lee un mensaje; retorna (tipo, sesion_id, payload) o None si la conexión se cerró"""
+    try:
+        cabecera = await reader.readexactly(CABECERA.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ErrorProtocolo("Cabecera incompleta")
+        return None
+    magic, version, tipo, sesion_id, longitud = CABECERA.unpack(cabecera)
+    if magic != MAGIC:
+        raise ErrorProtocolo(f"Magic inválido: {magic!r}")
+    if version != VERSION_PROTOCOLO:
+        raise ErrorProtocolo(f"Versión de protocolo no soportada: {version}")
+    if longitud > MAX_PAYLOAD:
+        raise ErrorProtocolo(f"Payload demasiado grande: {longitud} bytes")
+    payload = await reader.readexactly(longitud) if longitud else b''
+    return tipo, sesion_id, payload
+
+
+class SesionRemota:
+    """Estado de un deportista conectado: su analizador y opciones de la sesión"""
+
+    def __init__(self, analizador, detalles=False):
+        self.analizador = analizador
+        self.detalles = detalles
+        self.frames = 0
+
+    def procesar(self, timestamp, landmarks):
+        """Analiza un frame y retorna el diccionario que se envía como ESTADO"""
+        resultado = self.analizador.process_landmarks(landmarks_desde_array(landmarks), timestamp)
+        self.frames += 1
+        estado = {clave: resultado[clave] for clave in CLAVES_ESTADO if clave in resultado}
+        estado['t'] = timestamp
+        if self.detalles and 'detalles' in resultado:
+            estado['detalles'] = resultado['detalles']
+        return estado
+
+
+class ServidorLandmarks:
+    """Servidor asyncio que recibe landmarks y devuelve estado y feedback por sesión.
+
+    El análisis de un frame (verificar) toma decenas de microsegundos, así que
+    se ejecuta en el propio bucle de eventos: un solo proceso atiende muchos
+    deportistas sin hilos. Las sesiones de una conexión se cierran al
+    desconectarse.
+    """
+
+    def __init__(self, host="127.0.0.1", puerto=9465, profile_manager=None, max_sesiones=64,
+                 guardar_resultados=False):
+        self.host = host
+        self.puerto = puerto
+        # Para iniciar sesiones por nombre de usuario ({"usuario": nombre})
+        self.profile_manager = profile_manager
+        self.max_sesiones = max_sesiones
+        self.guardar_resultados = guardar_resultados
+        # Métricas de la estación opcionales (ver metrics_server.MetricasEstacion)
+        self.metricas = None
+
+        self.sesiones_activas = 0
+        self.frames_recibidos = 0
+        self._servidor = None
+        self._conexiones = {}
+        # Un solo hilo de guardado: las sesiones que terminan a la vez escriben en serie
+        self._guardado = None
+
+    @classmethod
+    def desde_config(cls, config_file='config_Saltos.yaml', profile_manager=None):
+        """Crea el servidor según la sección `servidor_landmarks` de la configuración; None si está desactivado"""
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = (yaml.safe_load(f) or {}).get('servidor_landmarks', {})
+        except FileNotFoundError:
+            return None
+        if not config.get('activo', False):
+            return None
+        return cls(host=config.get('host', "127.0.0.1"), puerto=config.get('puerto', 9465),
+                   profile_manager=profile_manager, max_sesiones=config.get('max_sesiones', 64),
+                   guardar_resultados=config.get('guardar_resultados', False))
+
+    async def start(self):
+        """Abre el puerto. Retorna False si no se pudo abrir"""
+        try:
+            self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        except OSError as e:
+            logging.error(f"No se pudo abrir el servidor de landmarks en {self.host}:{self.puerto}: {e}")
+            return False
+        # Con puerto 0 el sistema elige uno libre
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        logging.info(f"Servidor de landmarks escuchando en {self.host}:{self.puerto}")
+        return True
+
+    async def stop(self):
+        if self._servidor is None:
+            return
+        self._servidor.close()
+        # Cerrar también las conexiones abiertas y esperar a que liberen sus sesiones
+        for writer in list(self._conexiones):
+            writer.close()
+        if self._conexiones:
+            await asyncio.gather(*self._conexiones.values(), return_exceptions=True)
+        await self._servidor.wait_closed()
+        self._servidor = None
+        if self._guardado is not None:
+            # Esperar a los resultados que aún se están guardando
+            self._guardado.shutdown(wait=True)
+            self._guardado = None
+
+    async def serve_forever(self):
+        if self._servidor is None and not await self.start():
+            return False
+        async with self._servidor:
+            await self._servidor.serve_forever()
+        return True
+
+    async def _atender(self, reader, writer):
+        sesiones = {}
+        remoto = writer.get_extra_info('peername')
+        self._conexiones[writer] = asyncio.current_task()
+        logging.info(f"Conexión de landmarks desde {remoto}")
+        try:
+            while True:
+                mensaje = await leer_mensaje(reader)
+                if mensaje is None:
+                    break
+                respuesta = await self._procesar_mensaje(sesiones, *mensaje)
+                writer.write(respuesta)
+                await writer.drain()
+        except ErrorProtocolo as e:
+            logging.warning(f"Conexión {remoto} cerrada por error de protocolo: {e}")
+            writer.write(empaquetar_json(MSG_ERROR, 0, {'error': str(e)}))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logging.warning(f"Conexión {remoto} interrumpida: {e}")
+        except Exception as e:
+            # Red de seguridad: el cliente recibe el error en lugar de un corte sin respuesta
+            logging.error(f"Error inesperado en la conexión {remoto}: {e}")
+            writer.write(empaquetar_json(MSG_ERROR, 0, {'error': f'Error interno: {str(e)}'}))
+        finally:
+            for sesion_id in list(sesiones):
+                await self._cerrar_sesion(sesiones, sesion_id)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            del self._conexiones[writer]
+
+    async def _procesar_mensaje(self, sesiones, tipo, sesion_id, payload):
+        """Procesa un mensaje del cliente y retorna la respuesta empaquetada"""
+        if tipo == MSG_FRAME:
+            sesion = sesiones.get(sesion_id)
+            if sesion is None:
+                return empaquetar_json(MSG_ERROR, sesion_id, {'error': 'Sesión no iniciada'})
+            timestamp, landmarks = desempaquetar_frame(payload)
+            self.frames_recibidos += 1
+            return empaquetar_json(MSG_ESTADO, sesion_id, sesion.procesar(timestamp, landmarks))
+
+        if tipo == MSG_INICIO:
+            success, errors = self._iniciar_sesion(sesiones, sesion_id, payload)
+            if not success:
+                return empaquetar_json(MSG_ERROR, sesion_id, {'error': "; ".join(errors)})
+            return empaquetar_json(MSG_ESTADO, sesion_id, {'estado': 'CALIBRANDO', 'feedback': ['Sesión iniciada']})
+
+        if tipo == MSG_RECALIBRAR:
+            sesion = sesiones.get(sesion_id)
+            if sesion is None:
+                return empaquetar_json(MSG_ERROR, sesion_id, {'error': 'Sesión no iniciada'})
+            sesion.analizador.reset_session()
+            return empaquetar_json(MSG_ESTADO, sesion_id, {'estado': 'CALIBRANDO', 'feedback': ['Recalibrando']})
+
+        if tipo == MSG_SNAPSHOT:
+            sesion = sesiones.get(sesion_id)
+            if sesion is None:
+                return empaquetar_json(MSG_ERROR, sesion_id, {'error': 'Sesión no iniciada'})
+            return empaquetar_json(MSG_SNAPSHOT_DATOS, sesion_id, sesion.analizador.snapshot())
+
+        if tipo == MSG_FIN:
+            if sesion_id not in sesiones:
+                return empaquetar_json(MSG_ERROR, sesion_id, {'error': 'Sesión no iniciada'})
+            resultados = await self._cerrar_sesion(sesiones, sesion_id)
+            return empaquetar_json(MSG_RESULTADOS, sesion_id, resultados)
+
+        return empaquetar_json(MSG_ERROR, sesion_id, {'error': f'Tipo de mensaje desconocido: {tipo}'})
+
+    def _iniciar_sesion(self, sesiones, sesion_id, payload):
+        """Crea el analizador de una sesión. Retorna (success, errors)"""
+        if sesion_id in sesiones:
+            return False, [f"La sesión {sesion_id} ya está iniciada"]
+        if self.sesiones_activas >= self.max_sesiones:
+            return False, [f"Máximo de sesiones alcanzado ({self.max_sesiones})"]
+        try:
+            datos = json.loads(payload.decode('utf-8')) if payload else {}
+            if not isinstance(datos, dict):
+                return False, ["INICIO inválido: se esperaba un objeto JSON"]
+            tipo_salto = TipoSalto[datos.get('tipo_salto', 'CMJ')]
+        except (ValueError, KeyError, TypeError) as e:
+            return False, [f"INICIO inválido: {e}"]
+
+        if 'snapshot' in datos:
+            # Sesión migrada: perfil, tipo de salto, calibración y saltos vienen en el snapshot
+            analizador, errors = JumpAnalyzer.desde_snapshot(datos['snapshot'], usar_mediapipe=False)
+            if analizador is None:
+                return False, errors
+            return self._registrar_sesion(sesiones, sesion_id, analizador, datos)
+
+        if 'perfil' in datos:
+            try:
+                perfil = UsuarioPerfil.from_dict(datos['perfil'])
+            except (TypeError, KeyError, ValueError, AttributeError) as e:
+                return False, [f"Perfil inválido: {e}"]
+            errors = perfil.validar_datos()
+            if errors:
+                return False, errors
+        elif 'usuario' in datos and self.profile_manager is not None:
+            perfil, errors = self.profile_manager.load_profile(datos['usuario'])
+            if perfil is None:
+                return False, errors
+        else:
+            return False, ["INICIO requiere 'perfil' o 'usuario'"]
+
+        analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+        analizador.set_tipo_salto(tipo_salto)
+        return self._registrar_sesion(sesiones, sesion_id, analizador, datos)
+
+    def _registrar_sesion(self, sesiones, sesion_id, analizador, datos):
+        analizador.metricas = self.metricas
+        sesiones[sesion_id] = SesionRemota(analizador, detalles=bool(datos.get('detalles', False)))
+        self.sesiones_activas += 1
+        logging.info(f"Sesión remota {sesion_id} iniciada para {analizador.usuario.nombre} "
+                     f"({analizador.tipo_salto.name}, {analizador.contador} saltos previos)")
+        return True, []
+
+    async def _cerrar_sesion(self, sesiones, sesion_id):
+        sesion = sesiones.pop(sesion_id)
+        self.sesiones_activas -= 1
+        analizador = sesion.analizador
+        resultados = analizador.get_results()
+        logging.info(f"Sesión remota {sesion_id} finalizada: {sesion.frames} frames, {resultados['total']} saltos")
+        if self.guardar_resultados and resultados['total'] > 0:
+            # Escritura de archivos fuera del bucle de eventos; el id de sesión y los
+            # microsegundos evitan que dos sesiones del mismo usuario compartan archivo
+            nombre = analizador.usuario.nombre
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filename = f"resultados_{nombre.replace(' ', '_')}_{timestamp}_{sesion_id}.json"
+            if self._guardado is None:
+                self._guardado = ThreadPoolExecutor(max_workers=1, thread_name_prefix="GuardadoResultados")
+            await asyncio.get_running_loop().run_in_executor(
+                self._guardado, save_session_results, nombre, resultados, filename)
+        return resultados
+
+
+class ClienteLandmarks:
+    """Cliente de referencia del protocolo (pruebas y dispositivos con Python)"""
+
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+
+    async def conectar(self, host="127.0.0.1", puerto=9465):
+        self._reader, self._writer = await asyncio.open_connection(host, puerto)
+
+    async def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    async def _solicitar(self, mensaje):
+        self._writer.write(mensaje)
+        await self._writer.drain()
+        respuesta = await leer_mensaje(self._reader)
+        if respuesta is None:
+            raise ConnectionError("El servidor cerró la conexión")
+        tipo, _, payload = respuesta
+        return tipo, json.loads(payload.decode('utf-8'))
+
+    async def iniciar_sesion(self, sesion_id, perfil=None, usuario=None, tipo_salto=TipoSalto.CMJ, detalles=False,
+                             snapshot=None):
+        """Retorna (success, errors). Con `snapshot` continúa una sesión migrada"""
+        datos = {'tipo_salto': tipo_salto.name, 'detalles': detalles}
+        if snapshot is not None:
+            datos['snapshot'] = snapshot
+        elif perfil is not None:
+            datos['perfil'] = perfil.to_dict()
+        else:
+            datos['usuario'] = usuario
+        tipo, respuesta = await self._solicitar(empaquetar_json(MSG_INICIO, sesion_id, datos))
+        if tipo == MSG_ERROR:
+            return False, [respuesta['error']]
+        return True, []
+
+    async def enviar_frame(self, sesion_id, timestamp, landmarks):
+        """Envía un frame (array (33, 4)) y retorna el estado de la sesión"""
+        _, respuesta = await self._solicitar(empaquetar_frame(sesion_id, timestamp, landmarks))
+        return respuesta
+
+    async def recalibrar(self, sesion_id):
+        _, respuesta = await self._solicitar(empaquetar(MSG_RECALIBRAR, sesion_id))
+        return respuesta
+
+    async def snapshot(self, sesion_id):
+        """Estado de la sesión (JumpAnalyzer.snapshot) para continuarla en otro servidor"""
+        _, respuesta = await self._solicitar(empaquetar(MSG_SNAPSHOT, sesion_id))
+        return respuesta
+
+    async def finalizar(self, sesion_id):
+        """Cierra la sesión y retorna sus resultados"""
+        _, respuesta = await self._solicitar(empaquetar(MSG_FIN, sesion_id))
+        return respuesta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de ingesta de landmarks de Ergo SaniTas")
+    parser.add_argument("--config", default="config_Saltos.yaml")
+    parser.add_argument("--host", default=None, help="Dirección de escucha (0.0.0.0 para la red local)")
+    parser.add_argument("--puerto", type=int, default=None)
+    parser.add_argument("--max-sesiones", type=int, default=None)
+    parser.add_argument("--guardar-resultados", action="store_true", help="Guardar los resultados de cada sesión")
+    args = parser.parse_args()
+
+    from profile_manager import ProfileManager
+    servidor = ServidorLandmarks.desde_config(args.config, ProfileManager()) or ServidorLandmarks(
+        profile_manager=ProfileManager())
+    if args.host is not None:
+        servidor.host = args.host
+    if args.puerto is not None:
+        servidor.puerto = args.puerto
+    if args.max_sesiones is not None:
+        servidor.max_sesiones = args.max_sesiones
+    if args.guardar_resultados:
+        servidor.guardar_resultados = True
+
+    try:
+        return 0 if asyncio.run(servidor.serve_forever()) else 1
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
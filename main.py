@@ -10,9 +10,12 @@ from kivy.uix.spinner import Spinner
 from kivy.uix.popup import Popup
 from kivy.uix.progressbar import ProgressBar
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.camera import Camera
 from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle, Line
+from kivy.graphics.texture import Texture
 from kivy.uix.widget import Widget
 from kivy.core.window import Window
 import cv2
@@ -21,21 +24,45 @@ import logging
 from datetime import datetime
 import threading
 import time
+import json
+import os
 
 # Importar nuestros módulos
 from profile_manager import ProfileManager, UsuarioPerfil, validate_user_input, normalize_gender, get_imc_classification
+from profile_manager import save_session_results, load_performance_aggregates, load_session_history, write_json_atomic
 from jump_analyzer import JumpAnalyzer, TipoSalto
+from telemetry_writer import TelemetryWriter, recover_pending_sessions, archive_stream
+from analysis_pipeline import PipelineAnalisis, PoliticaTiempoReal
+from memory_monitor import MonitorMemoria
+from metrics_server import ServidorMetricas
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Estado de la sesión en curso mientras la app está en segundo plano (Android puede cerrar el proceso)
+SNAPSHOT_FILE = "sesion_en_curso.json"
+# Cada cuánto se guarda el snapshot mientras se analiza (segundos)
+SNAPSHOT_INTERVALO_S = 5.0
+
+def leer_sesion_guardada():
+    """Contenido del snapshot de la sesión en curso, o None si no hay o no se puede leer"""
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    try:
+        with open(SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"No se pudo leer la sesión guardada: {e}")
+        return None
+
 # Configuración de ventana para desarrollo
 Window.size = (400, 700)  # Simular pantalla móvil
 
 class LoginScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.profile_manager = ProfileManager()
+        # Agrupar ediciones rápidas de perfiles en una sola escritura
+        self.profile_manager = ProfileManager(coalesce_window=0.5)
         self.build_ui()
 
     def build_ui(self):
@@ -371,6 +398,11 @@ class HomeScreen(Screen):
             imc_class = get_imc_classification(perfil.imc)
             self.user_info_label.text = f'Usuario: {perfil.nombre}\nEdad: {perfil.edad} años | IMC: {perfil.imc:.1f} ({imc_class})'
 
+            # Progreso leído de los agregados, sin recorrer el historial
+            cmj = load_performance_aggregates(perfil.nombre).por_tipo['CMJ']
+            if cmj.count > 0:
+                self.user_info_label.text += f'\nMejor CMJ: {cmj.mejor*100:.1f} cm | Últimos {len(cmj.ultimos)}: {cmj.promedio_ultimos*100:.1f} cm'
+
     def start_jump_analysis(self, instance):
         """Inicia el análisis de salto"""
         app = App.get_running_app()
@@ -381,6 +413,13 @@ class HomeScreen(Screen):
 
     def show_history(self, instance):
         """Muestra el historial de resultados"""
+        app = App.get_running_app()
+        perfil_nombre = app.current_profile.nombre if app.current_profile else None
+        historial, errors = load_session_history(perfil_nombre)
+        if errors:
+            self.show_error_popup(errors[0])
+            return
+        self.manager.get_screen('results').display_history(historial)
         self.manager.current = 'results'
 
     def configure_profile(self, instance):
@@ -411,12 +450,57 @@ class HomeScreen(Screen):
         close_button.bind(on_press=popup.dismiss)
         popup.open()
 
+class VistaPreviaCamara:
+    """Vista previa de la cámara sobre una única textura preasignada.
+
+    Los frames de OpenCV se suben en su orden de color nativo (BGR) con
+    `blit_buffer`, sin convertirlos a bytes ni crear texturas nuevas. Si el
+    frame supera `ancho_max`, se reduce solo para la vista previa en un búfer
+    reutilizado; el análisis siempre recibe el frame completo.
+    """
+
+    def __init__(self, ancho_max=640):
+        self.ancho_max = ancho_max
+        self.texture = None
+        self._buffer = None
+
+    def preparar(self, frame):
+        """Retorna el búfer contiguo a subir (el propio frame o el búfer reducido reutilizado)"""
+        h, w = frame.shape[:2]
+        if self.ancho_max and w > self.ancho_max:
+            destino = (self.ancho_max, int(h * self.ancho_max / w))
+            if self._buffer is None or (self._buffer.shape[1], self._buffer.shape[0]) != destino:
+                self._buffer = np.empty((destino[1], destino[0], 3), dtype=np.uint8)
+            cv2.resize(frame, destino, dst=self._buffer, interpolation=cv2.INTER_AREA)
+            return self._buffer
+        return np.ascontiguousarray(frame)
+
+    def actualizar(self, frame):
+        """Sube el frame a la textura (la creación y el volteo vertical ocurren una sola vez)"""
+        buffer = self.preparar(frame)
+        h, w = buffer.shape[:2]
+        if self.texture is None or self.texture.size != (w, h):
+            self.texture = Texture.create(size=(w, h), colorfmt='bgr')
+            # OpenCV entrega las filas de arriba hacia abajo; OpenGL las espera al revés
+            self.texture.flip_vertical()
+        self.texture.blit_buffer(buffer.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+        return self.texture
+
 class JumpAnalysisScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.jump_analyzer = None
         self.camera_active = False
         self.analysis_active = False
+        self.pipeline = None
+        self._ultima_secuencia = 0
+        self._ultimo_frame = 0
+        self._ultimo_snapshot = 0
+        self._reanudar = False
+        # Stream de telemetría de la sesión restaurada, que se sigue escribiendo al reanudar
+        self._stream_reanudado = None
+        self.snapshot_event = None
+        self.vista_previa = VistaPreviaCamara()
         self.build_ui()
 
     def build_ui(self):
@@ -442,7 +526,7 @@ class JumpAnalysisScreen(Screen):
         # Área de la cámara (simulada con un widget)
         self.camera_widget = Widget(size_hint_y=0.5)
         with self.camera_widget.canvas:
-            Color(0.1, 0.1, 0.1, 1)
+            self.camera_color = Color(0.1, 0.1, 0.1, 1)
             self.camera_rect = Rectangle(size=self.camera_widget.size, pos=self.camera_widget.pos)
         
         self.camera_widget.bind(size=self.update_camera_rect, pos=self.update_camera_rect)
@@ -504,8 +588,65 @@ class JumpAnalysisScreen(Screen):
         """Se ejecuta cuando se entra a la pantalla"""
         app = App.get_running_app()
         if app.current_profile:
-            self.jump_analyzer = JumpAnalyzer(app.current_profile)
-            self.status_label.text = f'Estado: Listo - {app.current_profile.nombre}'
+            self.jump_analyzer = self.cargar_sesion_guardada(app.current_profile) or JumpAnalyzer(app.current_profile)
+            self.jump_analyzer.metricas = app.metricas
+            if self.jump_analyzer.contador > 0 or self.jump_analyzer.calibrado:
+                self.status_label.text = f'Estado: Sesión reanudada - {self.jump_analyzer.contador} saltos'
+            else:
+                self.status_label.text = f'Estado: Listo - {app.current_profile.nombre}'
+
+    def cargar_sesion_guardada(self, perfil):
+        """Analizador restaurado del snapshot de una sesión interrumpida del mismo perfil, o None"""
+        datos = leer_sesion_guardada()
+        if datos is None or datos.get('perfil', {}).get('nombre') != perfil.nombre:
+            return None
+        analizador, errors = JumpAnalyzer.desde_snapshot(datos, perfil)
+        if analizador is None:
+            logging.warning(f"Sesión guardada descartada: {'; '.join(errors)}")
+            # Sin snapshot, su stream de telemetría se recupera en el próximo inicio
+            os.remove(SNAPSHOT_FILE)
+            return None
+        self._stream_reanudado = datos.get('telemetria')
+        return analizador
+
+    def pausar(self):
+        """La app pasa a segundo plano: libera la cámara y guarda el estado de la sesión"""
+        if not self.analysis_active or not self.jump_analyzer:
+            return
+        if hasattr(self, 'analysis_event'):
+            self.analysis_event.cancel()
+        if self.snapshot_event is not None:
+            self.snapshot_event.cancel()
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+        # Con los hilos detenidos el analizador puede leerse sin carreras
+        self._escribir_snapshot(self.jump_analyzer.snapshot())
+        self._reanudar = True
+
+    def reanudar(self):
+        """La app vuelve a primer plano: continúa la misma sesión"""
+        if self._reanudar and self.analysis_active:
+            self._iniciar_captura()
+        self._reanudar = False
+
+    def guardar_snapshot_periodico(self, dt):
+        """Guarda el estado de la sesión cada SNAPSHOT_INTERVALO_S mientras se analiza"""
+        if self.pipeline:
+            # El analizador solo se lee en el hilo de inferencia; update_analysis escribe el resultado
+            self.pipeline.solicitar_snapshot()
+        elif self.jump_analyzer:
+            self._escribir_snapshot(self.jump_analyzer.snapshot())
+
+    def _escribir_snapshot(self, datos):
+        # El snapshot es dueño del stream de telemetría: recover_pending_sessions no lo toca
+        telemetria = self.jump_analyzer.telemetria if self.jump_analyzer else None
+        if telemetria is not None:
+            datos['telemetria'] = telemetria.filename
+        try:
+            write_json_atomic(SNAPSHOT_FILE, datos)
+        except OSError as e:
+            logging.error(f"No se pudo guardar la sesión en curso: {e}")
 
     def toggle_analysis(self, instance):
         """Inicia o detiene el análisis"""
@@ -524,9 +665,37 @@ class JumpAnalysisScreen(Screen):
         self.start_button.text = 'Detener Análisis'
         self.start_button.background_color = (0.8, 0.2, 0.2, 1)
         self.status_label.text = 'Estado: Analizando...'
+
+        # Telemetría append-only: la sesión sobrevive a un cierre inesperado.
+        # Una sesión restaurada de un snapshot sigue escribiendo en su stream original.
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nombre = self.jump_analyzer.usuario.nombre
+        stream = self._stream_reanudado or f"telemetria_{nombre.replace(' ', '_')}_{timestamp}.jsonl"
+        self._stream_reanudado = None
+        self.jump_analyzer.telemetria = TelemetryWriter(
+            stream,
+            perfil_nombre=nombre,
+            tipo_salto=self.jump_analyzer.tipo_salto.value
+        )
         
-        # Simular análisis (en una implementación real, aquí se procesarían frames de cámara)
-        self.analysis_event = Clock.schedule_interval(self.simulate_analysis, 1.0/30.0)  # 30 FPS
+        self._iniciar_captura()
+
+    def _iniciar_captura(self):
+        # La captura y la inferencia corren en hilos propios; el reloj de la UI solo lee el último resultado
+        self.pipeline = PipelineAnalisis(self.jump_analyzer, fuente=0,
+                                         monitor_memoria=MonitorMemoria.desde_config(),
+                                         politica=PoliticaTiempoReal.desde_config())
+        self.camera_active = self.pipeline.start()
+        if self.camera_active:
+            self._ultima_secuencia = 0
+            self._ultimo_frame = 0
+            self.analysis_event = Clock.schedule_interval(self.update_analysis, 1.0/30.0)  # 30 FPS
+        else:
+            # Sin cámara disponible: modo demostración
+            self.pipeline = None
+            self.analysis_event = Clock.schedule_interval(self.simulate_analysis, 1.0/30.0)  # 30 FPS
+        self._ultimo_snapshot = 0
+        self.snapshot_event = Clock.schedule_interval(self.guardar_snapshot_periodico, SNAPSHOT_INTERVALO_S)
 
     def stop_analysis(self):
         """Detiene el análisis"""
@@ -537,11 +706,75 @@ class JumpAnalysisScreen(Screen):
         
         if hasattr(self, 'analysis_event'):
             self.analysis_event.cancel()
-        
-        # Mostrar resultados si hay saltos completados
+        if self.snapshot_event is not None:
+            self.snapshot_event.cancel()
+            self.snapshot_event = None
+
+        # Detener los hilos antes de leer el analizador desde el hilo de la UI
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+            self.camera_active = False
+            self.camera_rect.texture = None
+            self.camera_color.rgba = (0.1, 0.1, 0.1, 1)
+
+        stream = None
+        if self.jump_analyzer and self.jump_analyzer.telemetria:
+            stream = self.jump_analyzer.telemetria.filename
+            self.jump_analyzer.telemetria.close(self.jump_analyzer.get_results())
+            self.jump_analyzer.telemetria = None
+        
+        # La sesión terminó normalmente: ya no hay nada que reanudar
+        if os.path.exists(SNAPSHOT_FILE):
+            os.remove(SNAPSHOT_FILE)
+
+        # Guardar y mostrar resultados si hay saltos completados
+        guardada = True
         if self.jump_analyzer and self.jump_analyzer.contador > 0:
+            guardada, _ = save_session_results(self.jump_analyzer.usuario.nombre, self.jump_analyzer.get_results())
             self.show_results()
 
+        # Con los resultados guardados el stream ya no hace falta para recuperar la sesión
+        if stream is not None and guardada:
+            try:
+                archive_stream(stream)
+            except OSError as e:
+                logging.warning(f"No se pudo archivar la telemetría {stream}: {e}")
+
+    def update_analysis(self, dt):
+        """Actualiza la interfaz con el último resultado del pipeline (nunca espera a la inferencia)"""
+        if not self.pipeline:
+            return False
+
+        self._ultimo_frame, frame = self.pipeline.frames.leer_si_nuevo(self._ultimo_frame)
+        if frame is not None:
+            self.camera_rect.texture = self.vista_previa.actualizar(frame)
+            self.camera_color.rgba = (1, 1, 1, 1)
+
+        self._ultimo_snapshot, datos = self.pipeline.snapshots.leer_si_nuevo(self._ultimo_snapshot)
+        if datos is not None:
+            self._escribir_snapshot(datos)
+
+        self._ultima_secuencia, resultado = self.pipeline.resultados.leer_si_nuevo(self._ultima_secuencia)
+        if resultado is None:
+            if not self.pipeline.activo:
+                self.status_label.text = 'Estado: Cámara desconectada'
+            return True
+
+        if resultado.get('calibrando'):
+            progreso = resultado.get('calibracion', {}).get('progreso', 0.0)
+            self.status_label.text = f'Estado: Calibrando... {progreso:.0%}'
+        elif 'error' not in resultado:
+            self.status_label.text = f"Estado: {resultado['estado'].replace('_', ' ').capitalize()}"
+            self.jump_counter_label.text = f"Saltos: {resultado['correctas']}/{resultado['contador']}"
+            self.height_label.text = f"Altura de salto: {resultado['jump_height']:.2f}m"
+            self.power_label.text = f"Potencia: {resultado['potencia']:.0f}%"
+
+        if resultado.get('feedback'):
+            self.feedback_label.text = f"Feedback: {resultado['feedback'][-1]}"
+
+        return True
+
     def simulate_analysis(self, dt):
         """Simula el análisis de salto (para demostración)"""
         if not self.jump_analyzer:
@@ -582,7 +815,11 @@ class JumpAnalysisScreen(Screen):
     def recalibrate(self, instance):
         """Recalibra el sistema"""
         if self.jump_analyzer:
-            self.jump_analyzer.reset_session()
+            if self.pipeline:
+                # El analizador pertenece al hilo de inferencia mientras el pipeline corre
+                self.pipeline.solicitar_recalibracion()
+            else:
+                self.jump_analyzer.reset_session()
             self.status_label.text = 'Estado: Recalibrado'
             self.jump_counter_label.text = 'Saltos: 0/0'
             self.height_label.text = 'Altura de salto: 0.00m'
@@ -621,6 +858,66 @@ class JumpAnalysisScreen(Screen):
         close_button.bind(on_press=popup.dismiss)
         popup.open()
 
+def fila_resultado(text, font_size='16sp', bold=False, height=30, halign='center', text_size=(None, None)):
+    """Fila de datos para la lista reciclada de resultados.
+
+    Cada fila lleva todas las claves de estilo: las vistas se reutilizan entre
+    filas distintas y una clave omitida conservaría el estilo de la fila anterior.
+    """
+    return {
+        'text': text,
+        'font_size': font_size,
+        'bold': bold,
+        'height': height,
+        'halign': halign,
+        'text_size': text_size
+    }
+
+def filas_resultados(resultados):
+    """Convierte los resultados de una sesión en filas de la lista de resultados"""
+    filas = [
+        fila_resultado(f'Total de saltos: {resultados.get("total", 0)}'),
+        fila_resultado(f'Saltos correctos: {resultados.get("correctas", 0)}'),
+        fila_resultado(f'Precisión: {resultados.get("precision", 0):.1f}%'),
+        fila_resultado(f'Altura promedio: {resultados.get("altura_salto_promedio", 0)*100:.1f} cm'),
+        fila_resultado(f'Clasificación: {resultados.get("clasificacion", "N/A")}', bold=True),
+        fila_resultado(f'Evaluación: {resultados.get("evaluacion_rendimiento", "N/A")}', bold=True)
+    ]
+
+    # Desglose por salto
+    if resultados.get("alturas_saltos"):
+        filas.append(fila_resultado('Saltos:', font_size='18sp', bold=True, height=40))
+        for i, altura in enumerate(resultados["alturas_saltos"], 1):
+            filas.append(fila_resultado(f'Salto {i}: {altura*100:.1f} cm', font_size='14sp'))
+
+    # Recomendaciones
+    if resultados.get("recomendaciones"):
+        filas.append(fila_resultado('Recomendaciones:', font_size='18sp', bold=True, height=40))
+        for i, rec in enumerate(resultados["recomendaciones"][:5], 1):  # Máximo 5 recomendaciones
+            filas.append(fila_resultado(f'{i}. {rec}', font_size='14sp', height=50,
+                                        halign='left', text_size=(350, None)))
+
+    return filas
+
+def filas_historial(historial):
+    """Convierte el historial de sesiones (load_session_history) en filas de la lista"""
+    if not historial:
+        return [fila_resultado('No hay sesiones guardadas')]
+
+    filas = []
+    for sesion in historial:
+        resultados = sesion.get('resultados', {})
+        filas.append(fila_resultado(f"{sesion.get('fecha', 'Desconocida')} - {resultados.get('tipo_salto', '')}",
+                                    font_size='14sp', bold=True))
+        filas.append(fila_resultado(f"Saltos: {resultados.get('correctas', 0)}/{resultados.get('total', 0)} | "
+                                    f"Altura promedio: {resultados.get('altura_salto_promedio', 0)*100:.1f} cm",
+                                    font_size='14sp'))
+    return filas
+
+class FilaResultado(Label):
+    """Vista reutilizable de una fila de la lista de resultados"""
+    pass
+
 class ResultsScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -630,7 +927,7 @@ class ResultsScreen(Screen):
         main_layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
         
         # Header
-        header_label = Label(
+        self.header_label = Label(
             text='Resultados del Análisis',
             font_size='22sp',
             bold=True,
@@ -638,12 +935,18 @@ class ResultsScreen(Screen):
             color=(0.2, 0.4, 0.8, 1)
         )
         
-        # Área de resultados (scroll)
-        scroll = ScrollView(size_hint_y=0.75)
-        self.results_layout = BoxLayout(orientation='vertical', spacing=10, size_hint_y=None)
-        self.results_layout.bind(minimum_height=self.results_layout.setter('height'))
-        
-        scroll.add_widget(self.results_layout)
+        # Área de resultados: lista virtualizada, solo se crean las filas visibles
+        self.results_view = RecycleView(size_hint_y=0.75)
+        self.results_view.viewclass = FilaResultado
+        results_layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=10,
+            default_size=(None, 30),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        results_layout.bind(minimum_height=results_layout.setter('height'))
+        self.results_view.add_widget(results_layout)
         
         # Botones de control
         button_layout = BoxLayout(orientation='horizontal', size_hint_y=0.15, spacing=10)
@@ -663,87 +966,23 @@ class ResultsScreen(Screen):
         button_layout.add_widget(new_analysis_button)
         button_layout.add_widget(home_button)
         
-        main_layout.add_widget(header_label)
-        main_layout.add_widget(scroll)
+        main_layout.add_widget(self.header_label)
+        main_layout.add_widget(self.results_view)
         main_layout.add_widget(button_layout)
         
         self.add_widget(main_layout)
 
     def display_results(self, resultados):
         """Muestra los resultados del análisis"""
-        # Limpiar resultados anteriores
-        self.results_layout.clear_widgets()
-        
-        # Información general
-        general_info = BoxLayout(orientation='vertical', spacing=5, size_hint_y=None, height=200)
-        
-        general_info.add_widget(Label(
-            text=f'Total de saltos: {resultados.get("total", 0)}',
-            font_size='16sp',
-            size_hint_y=None,
-            height=30
-        ))
-        
-        general_info.add_widget(Label(
-            text=f'Saltos correctos: {resultados.get("correctas", 0)}',
-            font_size='16sp',
-            size_hint_y=None,
-            height=30
-        ))
-        
-        general_info.add_widget(Label(
-            text=f'Precisión: {resultados.get("precision", 0):.1f}%',
-            font_size='16sp',
-            size_hint_y=None,
-            height=30
-        ))
-        
-        general_info.add_widget(Label(
-            text=f'Altura promedio: {resultados.get("altura_salto_promedio", 0)*100:.1f} cm',
-            font_size='16sp',
-            size_hint_y=None,
-            height=30
-        ))
-        
-        general_info.add_widget(Label(
-            text=f'Clasificación: {resultados.get("clasificacion", "N/A")}',
-            font_size='16sp',
-            bold=True,
-            size_hint_y=None,
-            height=30
-        ))
-        
-        general_info.add_widget(Label(
-            text=f'Evaluación: {resultados.get("evaluacion_rendimiento", "N/A")}',
-            font_size='16sp',
-            bold=True,
-            size_hint_y=None,
-            height=30
-        ))
-        
-        self.results_layout.add_widget(general_info)
-        
-        # Recomendaciones
-        if resultados.get("recomendaciones"):
-            rec_title = Label(
-                text='Recomendaciones:',
-                font_size='18sp',
-                bold=True,
-                size_hint_y=None,
-                height=40
-            )
-            self.results_layout.add_widget(rec_title)
-            
-            for i, rec in enumerate(resultados["recomendaciones"][:5], 1):  # Máximo 5 recomendaciones
-                rec_label = Label(
-                    text=f'{i}. {rec}',
-                    font_size='14sp',
-                    text_size=(350, None),
-                    halign='left',
-                    size_hint_y=None,
-                    height=50
-                )
-                self.results_layout.add_widget(rec_label)
+        self.header_label.text = 'Resultados del Análisis'
+        self.results_view.data = filas_resultados(resultados)
+        self.results_view.scroll_y = 1
+
+    def display_history(self, historial):
+        """Muestra el historial de sesiones del perfil"""
+        self.header_label.text = 'Historial de Sesiones'
+        self.results_view.data = filas_historial(historial)
+        self.results_view.scroll_y = 1
 
     def new_analysis(self, instance):
         """Inicia un nuevo análisis"""
@@ -757,6 +996,9 @@ class ErgoSaniTasApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.current_profile = None
+        # Endpoint local de métricas (sección `metricas` de config_Saltos.yaml)
+        self.servidor_metricas = None
+        self.metricas = None
 
     def build(self):
         # Crear el gestor de pantallas
@@ -787,8 +1029,38 @@ class ErgoSaniTasApp(App):
         """Se ejecuta cuando la aplicación inicia"""
         logging.info("Aplicación Ergo SaniTas iniciada")
 
+        # Reconstruir sesiones interrumpidas por un cierre inesperado. El stream de una
+        # sesión con snapshot se reanuda en la pantalla de análisis: recuperarlo aquí
+        # también contaría sus saltos dos veces en los agregados.
+        guardada = leer_sesion_guardada()
+        excluir = [guardada['telemetria']] if guardada and guardada.get('telemetria') else []
+        recuperadas = recover_pending_sessions(excluir=excluir)
+        if recuperadas:
+            logging.info(f"Sesiones recuperadas: {', '.join(recuperadas)}")
+
+        servidor = ServidorMetricas.desde_config()
+        if servidor is not None and servidor.start():
+            self.servidor_metricas = servidor
+            self.metricas = servidor.metricas
+            self.root.get_screen('login').profile_manager.metricas = self.metricas
+
+    def on_pause(self):
+        """La aplicación pasa a segundo plano (Android)"""
+        self.root.get_screen('jump_analysis').pausar()
+        return True
+
+    def on_resume(self):
+        """La aplicación vuelve a primer plano"""
+        self.root.get_screen('jump_analysis').reanudar()
+
     def on_stop(self):
         """Se ejecuta cuando la aplicación se cierra"""
+        analysis_screen = self.root.get_screen('jump_analysis')
+        if analysis_screen.pipeline:
+            analysis_screen.pipeline.stop()
+        self.root.get_screen('login').profile_manager.flush()
+        if self.servidor_metricas is not None:
+            self.servidor_metricas.stop()
         logging.info("Aplicación Ergo SaniTas cerrada")
 
 if __name__ == '__main__':
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Perfilado de memoria para sesiones de análisis largas (kioscos)
+Toma snapshots de tracemalloc a intervalos junto al analizador en streaming
+
+Uso:
+    python3 memory_monitor.py soak [--horas 1] [--intervalo-frames 9000] [--limite-kb 256]
+"""
+
+import argparse
+import json
+import linecache
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import yaml
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Asignaciones del propio perfilado que no interesan en el informe
+FILTROS_TRACEMALLOC = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+]
+
+TIPOS_CONTENEDOR = (list, deque, dict, set)
+
+
+def rss_kb():
+    """Memoria residente actual del proceso en KB (None si no se puede leer)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss es el pico (KB en Linux, bytes en macOS), mejor que nada
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return None
+
+
+def contar_contenedores(objeto):
+    """Longitud de cada atributo contenedor (listas, deques, dicts, sets) de un objeto"""
+    atributos = vars(objeto) if hasattr(objeto, '__dict__') else {}
+    return {nombre: len(valor) for nombre, valor in atributos.items() if isinstance(valor, TIPOS_CONTENEDOR)}
+
+
+def _estadisticas(estadisticas, top):
+    return [{
+        'ubicacion': f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+        'kb': round(s.size / 1024, 1),
+        'bloques': s.count
+    } for s in estadisticas[:top]]
+
+
+class MonitorMemoria:
+    """Snapshots periódicos de tracemalloc junto a un analizador en ejecución.
+
+    Cada muestra incluye la memoria trazada y residente, los principales
+    asignadores por línea y por módulo, las líneas que más crecieron desde la
+    primera muestra y la longitud de los contenedores de los objetos
+    registrados (por ejemplo los `historial_*` del analizador). Las muestras
+    se guardan en un deque acotado y opcionalmente en un archivo JSON Lines.
+
+    Puede muestrear por reloj (`start`, hilo de fondo) o a demanda
+    (`muestrear`), por ejemplo cada N frames en un bucle de reproducción.
+    """
+
+    def __init__(self, intervalo_s=300.0, top=10, archivo=None, max_muestras=288, nframes=1):
+        self.intervalo_s = intervalo_s
+        self.top = top
+        self.archivo = archivo
+        self.nframes = nframes
+        self.muestras = deque(maxlen=max_muestras)
+
+        self._objetos = {}
+        self._base = None
+        self._inicio = None
+        self._iniciado_aqui = False
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @classmethod
+    def desde_config(cls, config_file='config_Saltos.yaml'):
+        """Crea un monitor según la sección `monitor_memoria` de la configuración; None si está desactivado"""
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = (yaml.safe_load(f) or {}).get('monitor_memoria', {})
+        except FileNotFoundError:
+            return None
+        if not config.get('activo', False):
+            return None
+        return cls(intervalo_s=config.get('intervalo_s', 300.0),
+                   top=config.get('top', 10),
+                   archivo=config.get('archivo'))
+
+    def registrar(self, nombre, objeto):
+        """Incluye en cada muestra la longitud de los contenedores de `objeto`"""
+        self._objetos[nombre] = objeto
+
+    def iniciar_trazado(self):
+        """Activa tracemalloc (si no lo estaba) y toma la muestra base"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._iniciado_aqui = True
+        self._inicio = time.monotonic()
+        self._base = self._snapshot()
+
+    def start(self):
+        """Muestrea cada `intervalo_s` segundos en un hilo de fondo"""
+        self.iniciar_trazado()
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._muestrear_periodicamente, name="MonitorMemoria", daemon=True)
+        self._hilo.start()
+        logging.info(f"Monitor de memoria iniciado (cada {self.intervalo_s:.0f} s)")
+
+    def stop(self):
+        """Toma una muestra final y detiene el trazado si lo inició este monitor"""
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+        if self._base is not None:
+            self.muestrear()
+        if self._iniciado_aqui:
+            tracemalloc.stop()
+            self._iniciado_aqui = False
+        self._base = None
+
+    def muestrear(self):
+        """Toma una muestra ahora y la retorna"""
+        if self._base is None:
+            self.iniciar_trazado()
+        snapshot = self._snapshot()
+        actual, pico = tracemalloc.get_traced_memory()
+        crecimiento = [d for d in snapshot.compare_to(self._base, 'lineno') if d.size_diff > 0]
+
+        muestra = {
+            't': round(time.monotonic() - self._inicio, 3),
+            'rss_kb': rss_kb(),
+            'trazado_kb': round(actual / 1024, 1),
+            'pico_kb': round(pico / 1024, 1),
+            'crecimiento_kb': round(sum(d.size_diff for d in crecimiento) / 1024, 1),
+            'top_lineas': _estadisticas(snapshot.statistics('lineno'), self.top),
+            'top_modulos': _estadisticas(snapshot.statistics('filename'), self.top),
+            'crecimiento': [{
+                'ubicacion': f"{d.traceback[0].filename}:{d.traceback[0].lineno}",
+                'kb_diff': round(d.size_diff / 1024, 1),
+                'bloques_diff': d.count_diff
+            } for d in crecimiento[:self.top]],
+            'contenedores': {nombre: contar_contenedores(objeto) for nombre, objeto in self._objetos.items()}
+        }
+        self.muestras.append(muestra)
+
+        if self.archivo:
+            try:
+                with open(self.archivo, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(muestra, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logging.error(f"No se pudo escribir la muestra de memoria: {e}")
+
+        principal = muestra['crecimiento'][0]['ubicacion'] if muestra['crecimiento'] else "-"
+        logging.info(f"Memoria: trazada {muestra['trazado_kb']} KB, RSS {muestra['rss_kb']} KB, "
+                     f"mayor crecimiento en {principal}")
+        return muestra
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(FILTROS_TRACEMALLOC)
+
+    def _muestrear_periodicamente(self):
+        while not self._detener.wait(self.intervalo_s):
+            try:
+                self.muestrear()
+            except Exception as e:
+                logging.error(f"Error tomando muestra de memoria: {e}")
+
+
+def soak(horas=1.0, fps=30, intervalo_frames=9000, frames_sesion=18000, limite_kb=256.0, tipo_salto=None):
+    """Reproduce horas de frames sintéticos por el analizador y verifica que la memoria quede acotada.
+
+    Cada `frames_sesion` frames se reinicia la sesión, como al cambiar de
+    deportista en un kiosco. Retorna (success, errors, muestras).
+    """
+    from profile_manager import UsuarioPerfil
+    from jump_analyzer import JumpAnalyzer, TipoSalto, VENTANA_HISTORIAL
+    from synthetic_pose import GeneradorPoseSintetica
+
+    perfil = UsuarioPerfil("Soak", "M", 25, 175, 70, "intermedio")
+    tipo_salto = tipo_salto or TipoSalto.CMJ
+    secuencia = GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=tipo_salto, saltos=5, fps=fps,
+                                                   prob_oclusion=0.01).generar_landmarks()
+    duracion_secuencia = len(secuencia) / fps
+    analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+    analizador.set_tipo_salto(tipo_salto)
+
+    monitor = MonitorMemoria(top=5)
+    monitor.registrar('analizador', analizador)
+    total_frames = int(horas * 3600 * fps)
+
+    nivel_logging = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        vueltas = 0
+        for i in range(total_frames):
+            j = i % len(secuencia)
+            if j == 0 and i > 0:
+                vueltas += 1
+            t, lm = secuencia[j]
+            if i % frames_sesion == 0:
+                analizador.reset_session()
+            if not analizador.calibrado:
+                analizador.calibrar(lm)
+            else:
+                analizador.verificar(lm, timestamp=t + vueltas * duracion_secuencia)
+            # La base se toma tras una sesión completa, con todos los contenedores ya llenos
+            if i + 1 == min(frames_sesion, total_frames):
+                monitor.iniciar_trazado()
+            elif (i + 1) % intervalo_frames == 0 and i + 1 > frames_sesion:
+                monitor.muestrear()
+        monitor.muestrear()
+    finally:
+        logging.disable(nivel_logging)
+        monitor.stop()
+
+    errors = []
+    final = monitor.muestras[-1]
+    if final['crecimiento_kb'] > limite_kb:
+        errors.append(f"La memoria trazada creció {final['crecimiento_kb']:.1f} KB (límite {limite_kb} KB); "
+                      f"principal: {final['crecimiento'][0]['ubicacion']}")
+    for nombre, longitud in final['contenedores']['analizador'].items():
+        if nombre.startswith('historial_') and longitud > VENTANA_HISTORIAL:
+            errors.append(f"{nombre} sin cota: {longitud} elementos")
+    return len(errors) == 0, errors, list(monitor.muestras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfilado de memoria de Ergo SaniTas")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_soak = subparsers.add_parser("soak", help="Reproduce horas de frames sintéticos y verifica memoria acotada")
+    p_soak.add_argument("--horas", type=float, default=1.0, help="Horas simuladas (a --fps)")
+    p_soak.add_argument("--fps", type=int, default=30)
+    p_soak.add_argument("--intervalo-frames", type=int, default=9000, help="Frames entre muestras")
+    p_soak.add_argument("--frames-sesion", type=int, default=18000, help="Frames por sesión antes de reiniciarla")
+    p_soak.add_argument("--limite-kb", type=float, default=256.0, help="Crecimiento máximo de memoria trazada")
+    p_soak.add_argument("--archivo", default=None, help="Guardar las muestras en JSON Lines")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    success, errors, muestras = soak(args.horas, args.fps, args.intervalo_frames, args.frames_sesion, args.limite_kb)
+    duracion = time.perf_counter() - t0
+
+    print(f"{'t (s)':>8} {'crecido KB':>11} {'RSS KB':>9}  mayor crecimiento")
+    for muestra in muestras:
+        principal = muestra['crecimiento'][0] if muestra['crecimiento'] else {'ubicacion': '-', 'kb_diff': 0}
+        print(f"{muestra['t']:>8.1f} {muestra['crecimiento_kb']:>11.1f} {muestra['rss_kb'] or 0:>9}  "
+              f"{principal['ubicacion']} (+{principal['kb_diff']} KB)")
+    if args.archivo:
+        with open(args.archivo, 'w', encoding='utf-8') as f:
+            for muestra in muestras:
+                f.write(json.dumps(muestra, ensure_ascii=False) + "\n")
+
+    print(f"\n{args.horas} h simuladas en {duracion:.1f} s")
+    for error in errors:
+        print(f"❌ {error}")
+    if success:
+        print("✅ Memoria acotada")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites (segundos) de los histogramas de latencia
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador monotónico con etiquetas.
+
+    Cada métrica tiene su propio lock, tomado solo durante la suma; el bucle
+    de análisis y el servidor HTTP nunca esperan por otra métrica.
+    """
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {} if self.etiquetas else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores_etiquetas, n=1):
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0) + n
+
+    def valor(self, *valores_etiquetas):
+        return self._valores.get(valores_etiquetas, 0)
+
+    def exponer(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(v)}"
+                for clave, v in sorted(valores)]
+
+
+class Medidor(Contador):
+    """Valor instantáneo; con `funcion` se calcula al exponer"""
+    tipo = "gauge"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+
+    def set(self, valor, *valores_etiquetas):
+        self._valores[valores_etiquetas] = valor
+
+    def exponer(self):
+        if self.funcion is not None:
+            return [f"{self.nombre} {_formatear_numero(float(self.funcion()))}"]
+        return super().exponer()
+
+
+class Histograma:
+    """Histograma de buckets fijos (sin etiquetas), en el formato acumulado de Prometheus"""
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = tuple(sorted(buckets))
+        self._cuentas = [0] * (len(self.buckets) + 1)
+        self._suma = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, valor):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            self._cuentas[indice] += 1
+            self._suma += valor
+
+    @property
+    def cuenta(self):
+        return sum(self._cuentas)
+
+    def exponer(self):
+        with self._lock:
+            cuentas = list(self._cuentas)
+            suma = self._suma
+        lineas = []
+        acumulado = 0
+        for limite, cuenta in zip(self.buckets + (float('inf'),), cuentas):
+            acumulado += cuenta
+            lineas.append(f'{self.nombre}_bucket{{le="{_formatear_numero(float(limite))}"}} {acumulado}')
+        lineas.append(f"{self.nombre}_sum {_formatear_numero(suma)}")
+        lineas.append(f"{self.nombre}_count {acumulado}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas expuestas en formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._metricas = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def exponer(self):
+        lineas = []
+        for metrica in self._metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+class MetricasEstacion(RegistroMetricas):
+    """Métricas de una estación: análisis de frames, saltos y gestión de perfiles.
+
+    `JumpAnalyzer` y `ProfileManager` las actualizan si tienen asignado el
+    atributo `metricas`; sin él no hay ningún costo en el bucle de análisis.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frames = self.registrar(Contador(
+            "ergosanitas_frames_total", "Frames procesados por resultado", ("resultado",)))
+        self.fps = self.registrar(Medidor(
+            "ergosanitas_fps", "Frames procesados por segundo (media móvil)", funcion=lambda: self._fps))
+        self.latencia_frame = self.registrar(Histograma(
+            "ergosanitas_frame_segundos", "Tiempo total de process_frame"))
+        self.latencia_inferencia = self.registrar(Histograma(
+            "ergosanitas_inferencia_segundos", "Tiempo de inferencia de pose (MediaPipe)"))
+        self.latencia_verificar = self.registrar(Histograma(
+            "ergosanitas_verificar_segundos", "Tiempo de verificar por frame"))
+        self.frames_descartados = self.registrar(Contador(
+            "ergosanitas_frames_descartados_total", "Frames capturados que no se analizaron, por motivo", ("motivo",)))
+        self.landmarks_no_visibles = self.registrar(Contador(
+            "ergosanitas_landmarks_no_visibles_total", "Frames con pose detectada pero landmarks clave no visibles"))
+        self.calibraciones = self.registrar(Contador(
+            "ergosanitas_calibraciones_total", "Intentos de calibración por resultado", ("resultado",)))
+        self.saltos = self.registrar(Contador(
+            "ergosanitas_saltos_total", "Saltos completados", ("tipo_salto", "correcto")))
+        self.errores = self.registrar(Contador(
+            "ergosanitas_errores_tecnicos_total", "Frames con error técnico por tipo", ("error",)))
+        self.perfiles = self.registrar(Contador(
+            "ergosanitas_perfiles_operaciones_total", "Operaciones de perfiles por resultado", ("operacion", "resultado")))
+        self.escritura_perfiles = self.registrar(Histograma(
+            "ergosanitas_perfiles_escritura_segundos", "Tiempo de escritura del archivo de perfiles"))
+
+        self._fps = 0.0
+        self._ultimo_frame = None
+
+    def registrar_frame(self, resultado, total_ns, inferencia_ns=None):
+        """Clasifica el resultado de process_frame y actualiza latencias y fps"""
+        if 'error' in resultado:
+            etiqueta = "sin_pose" if resultado['error'] == 'No se detectó pose' else "error"
+        elif resultado.get('calibrando'):
+            etiqueta = "calibrando"
+            # Los frames que solo suman muestras a la calibración en curso no son intentos
+            calibracion = resultado.get('calibracion', {})
+            if resultado.get('calibration_success'):
+                self.calibraciones.inc("exito")
+            elif not calibracion.get('muestra_aceptada'):
+                self.calibraciones.inc("fallo")
+        else:
+            etiqueta = "analizado"
+        self.frames.inc(etiqueta)
+        self.latencia_frame.observe(total_ns / 1e9)
+        if inferencia_ns is not None:
+            self.latencia_inferencia.observe(inferencia_ns / 1e9)
+
+        ahora = time.monotonic()
+        if self._ultimo_frame is not None and ahora > self._ultimo_frame:
+            instantaneo = 1.0 / (ahora - self._ultimo_frame)
+            self._fps = instantaneo if self._fps == 0.0 else self._fps * 0.9 + instantaneo * 0.1
+        self._ultimo_frame = ahora
+
+
+class ServidorMetricas:
+    """Endpoint HTTP local (`/metrics`) con las métricas en formato Prometheus.
+
+    Corre en un hilo de fondo; cada scrape solo copia los valores bajo el
+    lock de cada métrica, sin tocar el bucle de análisis.
+    """
+
+    def __init__(self, metricas=None, host="127.0.0.1", puerto=9464):
+        self.metricas = metricas if metricas is not None else MetricasEstacion()
+        self.host = host
+        self.puerto = puerto
+        self._servidor = None
+        self._hilo = None
+
+    @classmethod
+    def desde_config(cls, config_file='config_Saltos.yaml'):
+        """Crea el servidor según la sección `metricas` de la configuración; None si está desactivado"""
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = (yaml.safe_load(f) or {}).get('metricas', {})
+        except FileNotFoundError:
+            return None
+        if not config.get('activo', False):
+            return None
+        return cls(host=config.get('host', "127.0.0.1"), puerto=config.get('puerto', 9464))
+
+    def start(self):
+        """Abre el puerto y atiende scrapes en segundo plano. Retorna False si no se pudo abrir"""
+        registro = self.metricas
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                cuerpo = registro.exponer().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', TIPO_CONTENIDO)
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._servidor = ThreadingHTTPServer((self.host, self.puerto), Manejador)
+        except OSError as e:
+            logging.error(f"No se pudo abrir el endpoint de métricas en {self.host}:{self.puerto}: {e}")
+            return False
+        self._servidor.daemon_threads = True
+        # Con puerto 0 el sistema elige uno libre
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="ServidorMetricas", daemon=True)
+        self._hilo.start()
+        logging.info(f"Métricas disponibles en http://{self.host}:{self.puerto}/metrics")
+        return True
+
+    def stop(self):
+        if self._servidor is None:
+            return
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        self._hilo.join()
+        self._servidor = None
+        self._hilo = None
@@ -1,8 +1,22 @@
 import json
 import os
+import math
+import csv
+import atexit
 import logging
+import tempfile
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -40,42 +54,79 @@ except FileNotFoundError:
         }
     }
 
+# Campos primarios de un perfil: lo único que se serializa; el resto se deriva
+CAMPOS_PERFIL = ['nombre', 'sexo', 'edad', 'altura_cm', 'peso_kg', 'nivel_actividad', 'fecha_creacion']
+
+# Campos cuyo cambio invalida los valores derivados en caché
+_CAMPOS_ANTROPOMETRICOS = frozenset(['sexo', 'edad', 'altura_cm', 'peso_kg'])
+
 class UsuarioPerfil:
-    def __init__(self, nombre="", sexo="", edad=0, altura_cm=0, peso_kg=0, nivel_actividad=""):
+    # Perfil compacto: sin __dict__ por instancia, con los valores derivados
+    # (altura_m, imc, longitudes) calculados bajo demanda y guardados en caché
+    __slots__ = CAMPOS_PERFIL + ['_altura_m', '_imc', '_longitudes']
+
+    def __init__(self, nombre="", sexo="", edad=0, altura_cm=0, peso_kg=0, nivel_actividad="", fecha_creacion=None):
         self.nombre = nombre
         self.sexo = sexo.upper()
         self.edad = edad
         self.altura_cm = altura_cm
         self.peso_kg = peso_kg
         self.nivel_actividad = nivel_actividad if nivel_actividad in NIVEL_USUARIO else 'principiante'
-        self.fecha_creacion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.fecha_creacion = fecha_creacion or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        self.altura_m = self.altura_cm / 100.0
-        self.imc = self.peso_kg / (self.altura_m ** 2) if self.altura_m > 0 else 0
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in _CAMPOS_ANTROPOMETRICOS:
+            self._invalidar_derivados()
 
-        # Inicializar longitudes como diccionario vacío
-        self.longitudes = {}
-        # Solo calcular si tenemos datos válidos
-        if self.sexo in ['M', 'F'] and self.altura_cm > 0:
+    def _invalidar_derivados(self):
+        object.__setattr__(self, '_altura_m', None)
+        object.__setattr__(self, '_imc', None)
+        object.__setattr__(self, '_longitudes', None)
+
+    @property
+    def altura_m(self):
+        if self._altura_m is None:
+            object.__setattr__(self, '_altura_m', self.altura_cm / 100.0)
+        return self._altura_m
+
+    @property
+    def imc(self):
+        if self._imc is None:
+            altura_m = self.altura_m
+            object.__setattr__(self, '_imc', self.peso_kg / (altura_m ** 2) if altura_m > 0 else 0)
+        return self._imc
+
+    @property
+    def longitudes(self):
+        if self._longitudes is None:
             self.calcular_longitudes()
-        else:
-            self.longitudes = {
+        return self._longitudes
+
+    @property
+    def umbrales_nivel(self):
+        return NIVEL_USUARIO[self.nivel_actividad]
+
+    def calcular_longitudes(self):
+        """Calcula las longitudes de los segmentos corporales"""
+        # Solo calcular si tenemos datos válidos
+        if self.sexo not in ['M', 'F'] or self.altura_cm <= 0:
+            longitudes = {
                 "femur": 0,
                 "tibia": 0,
                 "distancia_rodillas": 0
             }
-
-    def calcular_longitudes(self):
-        """Calcula las longitudes de los segmentos corporales"""
-        # Factor de corrección por edad
-        factor_correccion = 0.97 if self.edad > 50 else 1.0
-
-        self.longitudes = {
-            "femur": self.altura_m * PROPORCIONES[self.sexo.lower()]['altura_femur'] * factor_correccion,
-            "tibia": self.altura_m * PROPORCIONES[self.sexo.lower()]['altura_tibia'] * factor_correccion,
-            "distancia_rodillas": self.altura_m * PROPORCIONES[self.sexo.lower()]['distancia_rodillas'] * factor_correccion
-        }
-        self.umbrales_nivel = NIVEL_USUARIO[self.nivel_actividad]
+        else:
+            # Factor de corrección por edad
+            factor_correccion = 0.97 if self.edad > 50 else 1.0
+            proporciones = PROPORCIONES[self.sexo.lower()]
+            longitudes = {
+                "femur": self.altura_m * proporciones['altura_femur'] * factor_correccion,
+                "tibia": self.altura_m * proporciones['altura_tibia'] * factor_correccion,
+                "distancia_rodillas": self.altura_m * proporciones['distancia_rodillas'] * factor_correccion
+            }
+        object.__setattr__(self, '_longitudes', longitudes)
+        return longitudes
 
     def validar_datos(self):
         """Valida que los datos del perfil sean correctos"""
@@ -102,7 +153,7 @@ class UsuarioPerfil:
         return errores
 
     def actualizar_datos(self, nombre=None, sexo=None, edad=None, altura_cm=None, peso_kg=None, nivel_actividad=None):
-        """Actualiza los datos del perfil"""
+        """Actualiza los datos del perfil (los valores derivados se recalculan al consultarlos)"""
         if nombre is not None:
             self.nombre = nombre
         if sexo is not None:
@@ -111,19 +162,13 @@ class UsuarioPerfil:
             self.edad = edad
         if altura_cm is not None:
             self.altura_cm = altura_cm
-            self.altura_m = self.altura_cm / 100.0
         if peso_kg is not None:
             self.peso_kg = peso_kg
         if nivel_actividad is not None and nivel_actividad in NIVEL_USUARIO:
             self.nivel_actividad = nivel_actividad
 
-        # Recalcular valores derivados
-        self.imc = self.peso_kg / (self.altura_m ** 2) if self.altura_m > 0 else 0
-        if self.sexo in ['M', 'F'] and self.altura_cm > 0:
-            self.calcular_longitudes()
-
     def to_dict(self):
-        """Convierte el perfil a diccionario para serialización"""
+        """Convierte el perfil a diccionario para serialización (solo campos primarios)"""
         return {
             'nombre': self.nombre,
             'sexo': self.sexo,
@@ -131,55 +176,185 @@ class UsuarioPerfil:
             'altura_cm': self.altura_cm,
             'peso_kg': self.peso_kg,
             'nivel_actividad': self.nivel_actividad,
-            'fecha_creacion': self.fecha_creacion,
-            'altura_m': self.altura_m,
-            'imc': self.imc,
-            'longitudes': self.longitudes
+            'fecha_creacion': self.fecha_creacion
         }
 
     @classmethod
     def from_dict(cls, data):
-        """Crea un perfil desde un diccionario"""
-        perfil = cls(
+        """Crea un perfil desde un diccionario (ignora valores derivados de versiones anteriores)"""
+        return cls(
             nombre=data.get('nombre', ""),
             sexo=data.get('sexo', ""),
             edad=data.get('edad', 0),
             altura_cm=data.get('altura_cm', 0),
             peso_kg=data.get('peso_kg', 0),
-            nivel_actividad=data.get('nivel_actividad', "")
+            nivel_actividad=data.get('nivel_actividad', ""),
+            fecha_creacion=data.get('fecha_creacion')
         )
-        perfil.fecha_creacion = data.get('fecha_creacion', perfil.fecha_creacion)
-        return perfil
+
+def write_json_atomic(filename, data, indent=4):
+    """Escribe un JSON de forma atómica: archivo temporal + fsync + rename.
+
+    Un cierre inesperado deja el archivo anterior o el nuevo completo, nunca
+    uno truncado.
+    """
+    directorio = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_file = tempfile.mkstemp(prefix=os.path.basename(filename) + '.', suffix='.tmp', dir=directorio)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+    # Persistir también la entrada de directorio del rename (POSIX)
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directorio, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def _leer_filas_perfiles(filename):
+    """Genera (número de fila, datos) desde un CSV o un JSON Lines"""
+    # utf-8-sig: Excel guarda los CSV con BOM, que de otro modo quedaría pegado al primer encabezado
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        if filename.lower().endswith('.csv'):
+            reader = csv.DictReader(f)
+            for datos in reader:
+                yield reader.line_num, datos
+        else:
+            for fila, linea in enumerate(f, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    datos = json.loads(linea)
+                except json.JSONDecodeError:
+                    datos = None
+                yield fila, datos if isinstance(datos, dict) else None
+
+def _perfil_desde_fila(datos):
+    """Valida una fila importada y construye el perfil correspondiente"""
+    nombre = str(datos.get('nombre') or "").strip()
+    sexo = str(datos.get('sexo') or "")
+    edad = datos.get('edad') or "0"
+    altura = datos.get('altura_cm', datos.get('altura')) or "0"
+    peso = datos.get('peso_kg', datos.get('peso')) or "0"
+    nivel = str(datos.get('nivel_actividad', datos.get('nivel')) or "")
+
+    errores = validate_user_input(nombre, sexo, str(edad), str(altura), str(peso), nivel)
+    if errores:
+        return None, errores
+
+    perfil = UsuarioPerfil(
+        nombre=nombre,
+        sexo=normalize_gender(sexo),
+        edad=int(edad),
+        altura_cm=float(altura),
+        peso_kg=float(peso),
+        nivel_actividad=nivel
+    )
+    if datos.get('fecha_creacion'):
+        perfil.fecha_creacion = datos['fecha_creacion']
+    return perfil, perfil.validar_datos()
+
+# Bloqueos por ruta dentro del proceso: lockf pertenece al proceso completo y no excluye hilos
+_locks_proceso = {}
+_locks_proceso_lock = threading.Lock()
+
+def _lock_de_proceso(filename):
+    ruta = os.path.abspath(filename)
+    with _locks_proceso_lock:
+        lock = _locks_proceso.get(ruta)
+        if lock is None:
+            lock = _locks_proceso[ruta] = threading.Lock()
+        return lock
+
+@contextmanager
+def file_lock(filename):
+    """Bloqueo exclusivo sobre `filename` entre hilos y entre procesos.
+
+    Los bloqueos POSIX (`lockf`) son del proceso: dos hilos del mismo proceso
+    no se excluyen entre sí. Por eso primero se toma un `threading.Lock` por
+    ruta y luego el bloqueo consultivo sobre un archivo `.lock` auxiliar (el
+    archivo de datos se reemplaza por rename en cada escritura), que también
+    funciona sobre directorios de red montados por NFS.
+    """
+    with _lock_de_proceso(filename):
+        if fcntl is None:
+            yield
+            return
+
+        with open(filename + '.lock', 'a') as lock_file:
+            fcntl.lockf(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(lock_file.fileno(), fcntl.LOCK_UN)
+
+def file_version(filename):
+    """Identidad de un archivo para reutilizar su contenido ya parseado: (inodo, mtime, tamaño)"""
+    try:
+        st = os.stat(filename)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return None
+
+# Gestores con escritura agrupada: al salir se vuelcan los que sigan vivos, sin
+# que el hook de salida los mantenga vivos a todos hasta entonces
+_gestores_agrupados = weakref.WeakSet()
+
+@atexit.register
+def _volcar_gestores_agrupados():
+    for gestor in list(_gestores_agrupados):
+        gestor.flush()
 
 class ProfileManager:
-    def __init__(self, profiles_file="perfiles_usuarios.json"):
+    def __init__(self, profiles_file="perfiles_usuarios.json", coalesce_window=0.0):
         self.profiles_file = profiles_file
         self.current_profile = None
 
+        # Ventana (segundos) para agrupar ráfagas de cambios en una sola escritura
+        self.coalesce_window = coalesce_window
+        self.escrituras = 0
+        self._lock = threading.RLock()
+        self._operaciones = []
+        self._timer = None
+        # Caché de parseo: última versión leída del archivo y su contenido (siempre bajo file_lock)
+        self._version = None
+        self._cache = {}
+        # Métricas de la estación opcionales (ver metrics_server.MetricasEstacion)
+        self.metricas = None
+        if coalesce_window > 0:
+            _gestores_agrupados.add(self)
+
     def save_profile(self, perfil: UsuarioPerfil):
         """Guarda un perfil de usuario"""
         try:
             # Validar datos antes de guardar
             errores = perfil.validar_datos()
             if errores:
+                self._contar('guardar', 'invalido')
                 return False, errores
 
-            # Cargar perfiles existentes
-            profiles = self.load_all_profiles()
-            
             # Agregar o actualizar perfil
-            profiles[perfil.nombre] = perfil.to_dict()
-            
-            # Guardar archivo
-            with open(self.profiles_file, 'w', encoding='utf-8') as f:
-                json.dump(profiles, f, indent=4, ensure_ascii=False)
+            self._registrar_operacion(('guardar', perfil.nombre, perfil.to_dict()))
             
             logging.info(f"Perfil de {perfil.nombre} guardado exitosamente")
+            self._contar('guardar', 'ok')
             return True, []
             
         except Exception as e:
             error_msg = f"Error al guardar el perfil: {str(e)}"
             logging.error(error_msg)
+            self._contar('guardar', 'error')
             return False, [error_msg]
 
     def load_profile(self, nombre):
@@ -191,25 +366,25 @@ class ProfileManager:
                 perfil = UsuarioPerfil.from_dict(profiles[nombre])
                 self.current_profile = perfil
                 logging.info(f"Perfil de {nombre} cargado exitosamente")
+                self._contar('cargar', 'ok')
                 return perfil, []
             else:
                 error_msg = f"Perfil '{nombre}' no encontrado"
                 logging.warning(error_msg)
+                self._contar('cargar', 'no_encontrado')
                 return None, [error_msg]
                 
         except Exception as e:
             error_msg = f"Error al cargar el perfil: {str(e)}"
             logging.error(error_msg)
+            self._contar('cargar', 'error')
             return None, [error_msg]
 
     def load_all_profiles(self):
-        """Carga todos los perfiles disponibles"""
+        """Carga todos los perfiles disponibles (incluye cambios aún no escritos)"""
         try:
-            if os.path.exists(self.profiles_file):
-                with open(self.profiles_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                return {}
+            with self._lock:
+                return self._aplicar_operaciones(self._leer_archivo())
         except Exception as e:
             logging.error(f"Error al cargar perfiles: {e}")
             return {}
@@ -226,26 +401,157 @@ class ProfileManager:
     def delete_profile(self, nombre):
         """Elimina un perfil"""
         try:
-            profiles = self.load_all_profiles()
-            
-            if nombre in profiles:
-                del profiles[nombre]
+            with self._lock:
+                profiles = self.load_all_profiles()
                 
-                with open(self.profiles_file, 'w', encoding='utf-8') as f:
-                    json.dump(profiles, f, indent=4, ensure_ascii=False)
-                
-                logging.info(f"Perfil de {nombre} eliminado exitosamente")
-                return True, []
-            else:
-                error_msg = f"Perfil '{nombre}' no encontrado"
-                logging.warning(error_msg)
-                return False, [error_msg]
+                if nombre in profiles:
+                    self._registrar_operacion(('eliminar', nombre, None))
+                    
+                    logging.info(f"Perfil de {nombre} eliminado exitosamente")
+                    return True, []
+                else:
+                    error_msg = f"Perfil '{nombre}' no encontrado"
+                    logging.warning(error_msg)
+                    return False, [error_msg]
                 
         except Exception as e:
             error_msg = f"Error al eliminar el perfil: {str(e)}"
             logging.error(error_msg)
             return False, [error_msg]
 
+    def import_profiles(self, filename):
+        """Importa perfiles en lote desde un archivo CSV o JSON Lines.
+
+        Cada fila se valida por separado; las filas inválidas se reportan sin
+        abortar el lote y las válidas se confirman en una única escritura.
+        Retorna (número de perfiles importados, [(fila, errores), ...]).
+        """
+        operaciones = []
+        errores_filas = []
+        nombres_lote = set()
+
+        try:
+            for fila, datos in _leer_filas_perfiles(filename):
+                if datos is None:
+                    errores_filas.append((fila, ["Fila con formato inválido"]))
+                    continue
+
+                perfil, errores = _perfil_desde_fila(datos)
+                if not errores and perfil.nombre in nombres_lote:
+                    errores = [f"Perfil '{perfil.nombre}' duplicado en el lote"]
+                if errores:
+                    errores_filas.append((fila, errores))
+                    continue
+
+                nombres_lote.add(perfil.nombre)
+                operaciones.append(('guardar', perfil.nombre, perfil.to_dict()))
+
+            with self._lock:
+                self._operaciones.extend(operaciones)
+                if not self.flush():
+                    for operacion in operaciones:
+                        self._operaciones.remove(operacion)
+                    raise IOError(f"No se pudo escribir {self.profiles_file}")
+
+            logging.info(f"Importación de {filename}: {len(operaciones)} perfiles, {len(errores_filas)} filas con errores")
+            return len(operaciones), errores_filas
+
+        except Exception as e:
+            error_msg = f"Error al importar perfiles: {str(e)}"
+            logging.error(error_msg)
+            return 0, errores_filas + [(0, [error_msg])]
+
+    def export_profiles(self, filename):
+        """Exporta los perfiles a CSV o JSON Lines, escribiendo fila por fila"""
+        try:
+            profiles = self.load_all_profiles()
+            with open(filename, 'w', encoding='utf-8', newline='') as f:
+                if filename.lower().endswith('.csv'):
+                    writer = csv.DictWriter(f, fieldnames=CAMPOS_PERFIL, extrasaction='ignore')
+                    writer.writeheader()
+                    for data in profiles.values():
+                        writer.writerow(data)
+                else:
+                    for data in profiles.values():
+                        f.write(json.dumps({campo: data.get(campo) for campo in CAMPOS_PERFIL}, ensure_ascii=False) + "\n")
+
+            logging.info(f"{len(profiles)} perfiles exportados a {filename}")
+            return True, len(profiles)
+
+        except Exception as e:
+            error_msg = f"Error al exportar perfiles: {str(e)}"
+            logging.error(error_msg)
+            return False, error_msg
+
+    def flush(self):
+        """Escribe de inmediato los cambios pendientes"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._operaciones:
+                return True
+
+            t0 = time.perf_counter()
+            try:
+                # Otras estaciones pueden escribir el mismo archivo: leer, aplicar y
+                # escribir bajo bloqueo. Si la versión no cambió desde la última
+                # lectura (caso habitual) no hace falta volver a parsear el JSON.
+                with file_lock(self.profiles_file):
+                    profiles = self._aplicar_operaciones(self._leer_archivo())
+                    write_json_atomic(self.profiles_file, profiles)
+                    self._version = file_version(self.profiles_file)
+                    self._cache = profiles
+                self._operaciones = []
+                self.escrituras += 1
+                if self.metricas is not None:
+                    self.metricas.escritura_perfiles.observe(time.perf_counter() - t0)
+                self._contar('escribir', 'ok')
+                return True
+            except Exception as e:
+                logging.error(f"Error al escribir perfiles: {e}")
+                self._contar('escribir', 'error')
+                return False
+
+    def _contar(self, operacion, resultado):
+        if self.metricas is not None:
+            self.metricas.perfiles.inc(operacion, resultado)
+
+    def _registrar_operacion(self, operacion):
+        with self._lock:
+            self._operaciones.append(operacion)
+
+            if self.coalesce_window <= 0:
+                if not self.flush():
+                    self._operaciones.remove(operacion)
+                    raise IOError(f"No se pudo escribir {self.profiles_file}")
+            elif self._timer is None:
+                self._timer = threading.Timer(self.coalesce_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _leer_archivo(self):
+        version = file_version(self.profiles_file)
+        if version is None:
+            profiles = {}
+        elif version == self._version:
+            profiles = self._cache
+        else:
+            with open(self.profiles_file, 'r', encoding='utf-8') as f:
+                profiles = json.load(f)
+        self._version = version
+        self._cache = profiles
+        return dict(profiles)
+
+    def _aplicar_operaciones(self, profiles):
+        for accion, nombre, data in self._operaciones:
+            if accion == 'guardar':
+                profiles[nombre] = data
+            else:
+                profiles.pop(nombre, None)
+        return profiles
+
     def create_default_profile(self, nombre="Usuario Demo"):
         """Crea un perfil por defecto para pruebas"""
         perfil = UsuarioPerfil(
@@ -272,6 +578,126 @@ class ProfileManager:
         """Establece el perfil actual"""
         self.current_profile = perfil
 
+# Archivo y ventana de los agregados de rendimiento por perfil
+AGREGADOS_FILE = "agregados_rendimiento.json"
+VENTANA_AGREGADOS = 10
+
+# Nombre corto de cada tipo de salto (TipoSalto.value -> TipoSalto.name)
+TIPOS_SALTO = {
+    "Counter Movement Jump (CMJ)": "CMJ",
+    "Squat Jump (SQJ)": "SQJ",
+    "Abalakov": "ABALAKOV"
+}
+
+class AgregadoSalto:
+    """Estadísticas incrementales de altura para un tipo de salto"""
+    def __init__(self, ventana=VENTANA_AGREGADOS):
+        self.count = 0
+        self.suma = 0.0
+        self.suma_cuadrados = 0.0
+        self.mejor = 0.0
+        self.ultimos = deque(maxlen=ventana)
+        self.suma_ultimos = 0.0
+
+    def agregar(self, altura):
+        """Incorpora una altura de salto en O(1)"""
+        altura = float(altura)
+        self.count += 1
+        self.suma += altura
+        self.suma_cuadrados += altura * altura
+        self.mejor = max(self.mejor, altura)
+
+        if len(self.ultimos) == self.ultimos.maxlen:
+            self.suma_ultimos -= self.ultimos[0]
+        self.ultimos.append(altura)
+        self.suma_ultimos += altura
+
+    @property
+    def promedio(self):
+        return self.suma / self.count if self.count > 0 else 0.0
+
+    @property
+    def desviacion(self):
+        if self.count < 2:
+            return 0.0
+        varianza = (self.suma_cuadrados - self.suma * self.suma / self.count) / (self.count - 1)
+        return math.sqrt(max(varianza, 0.0))
+
+    @property
+    def promedio_ultimos(self):
+        return self.suma_ultimos / len(self.ultimos) if self.ultimos else 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'suma': self.suma,
+            'suma_cuadrados': self.suma_cuadrados,
+            'mejor': self.mejor,
+            'ultimos': list(self.ultimos)
+        }
+
+    @classmethod
+    def from_dict(cls, data, ventana=VENTANA_AGREGADOS):
+        agregado = cls(ventana)
+        agregado.count = data.get('count', 0)
+        agregado.suma = data.get('suma', 0.0)
+        agregado.suma_cuadrados = data.get('suma_cuadrados', 0.0)
+        agregado.mejor = data.get('mejor', 0.0)
+        agregado.ultimos.extend(data.get('ultimos', []))
+        agregado.suma_ultimos = sum(agregado.ultimos)
+        return agregado
+
+class AgregadosPerfil:
+    """Agregados de rendimiento de un perfil, por tipo de salto"""
+    def __init__(self, ventana=VENTANA_AGREGADOS):
+        self.ventana = ventana
+        self.sesiones = 0
+        self.por_tipo = {tipo: AgregadoSalto(ventana) for tipo in TIPOS_SALTO.values()}
+
+    def registrar_sesion(self, resultados):
+        """Actualiza los agregados con los resultados de una sesión"""
+        tipo = TIPOS_SALTO.get(resultados.get('tipo_salto'), resultados.get('tipo_salto'))
+        if tipo not in self.por_tipo:
+            logging.warning(f"Tipo de salto desconocido en agregados: {tipo}")
+            return
+
+        alturas = resultados.get('alturas_saltos')
+        if alturas is None:
+            # Resultados antiguos: solo se dispone del promedio de la sesión
+            alturas = [resultados['altura_salto_promedio']] if resultados.get('altura_salto_promedio') else []
+
+        for altura in alturas:
+            self.por_tipo[tipo].agregar(altura)
+        self.sesiones += 1
+
+    def indice_elasticidad(self):
+        """Índice de elasticidad (CMJ vs SQJ) a partir de las alturas promedio"""
+        altura_sqj = self.por_tipo['SQJ'].promedio
+        if altura_sqj == 0:
+            return 0.0
+        return ((self.por_tipo['CMJ'].promedio - altura_sqj) / altura_sqj) * 100
+
+    def indice_coordinacion(self):
+        """Índice de coordinación brazo-tronco (Abalakov vs CMJ)"""
+        altura_cmj = self.por_tipo['CMJ'].promedio
+        if altura_cmj == 0:
+            return 0.0
+        return ((self.por_tipo['ABALAKOV'].promedio - altura_cmj) / altura_cmj) * 100
+
+    def to_dict(self):
+        return {
+            'sesiones': self.sesiones,
+            'por_tipo': {tipo: agregado.to_dict() for tipo, agregado in self.por_tipo.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, ventana=VENTANA_AGREGADOS):
+        agregados = cls(ventana)
+        agregados.sesiones = data.get('sesiones', 0)
+        for tipo, datos_tipo in data.get('por_tipo', {}).items():
+            agregados.por_tipo[tipo] = AgregadoSalto.from_dict(datos_tipo, ventana)
+        return agregados
+
 # Funciones de utilidad para la aplicación móvil
 def validate_user_input(nombre, sexo, edad, altura, peso, nivel):
     """Valida la entrada del usuario desde la interfaz móvil"""
@@ -346,10 +772,10 @@ def save_session_results(perfil_nombre, resultados, filename=None):
             'resultados': resultados
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(resultados_completos, f, indent=2, ensure_ascii=False)
+        write_json_atomic(filename, resultados_completos, indent=2)
         
         logging.info(f"Resultados guardados en {filename}")
+        update_performance_aggregates(perfil_nombre, resultados)
         return True, filename
         
     except Exception as e:
@@ -390,3 +816,39 @@ def load_session_history(perfil_nombre=None):
         error_msg = f"Error cargando historial: {str(e)}"
         logging.error(error_msg)
         return [], [error_msg]
+
+def load_performance_aggregates(perfil_nombre, agregados_file=AGREGADOS_FILE):
+    """Carga los agregados de rendimiento de un perfil sin recorrer el historial"""
+    try:
+        if os.path.exists(agregados_file):
+            with open(agregados_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if perfil_nombre in data:
+                return AgregadosPerfil.from_dict(data[perfil_nombre])
+        return AgregadosPerfil()
+    except Exception as e:
+        logging.error(f"Error al cargar agregados: {e}")
+        return AgregadosPerfil()
+
+def update_performance_aggregates(perfil_nombre, resultados, agregados_file=AGREGADOS_FILE):
+    """Incorpora una sesión guardada a los agregados del perfil"""
+    try:
+        # Índice compartido por varias estaciones: lectura-modificación-escritura bajo bloqueo
+        with file_lock(agregados_file):
+            data = {}
+            if os.path.exists(agregados_file):
+                with open(agregados_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+            agregados = AgregadosPerfil.from_dict(data.get(perfil_nombre, {}))
+            agregados.registrar_sesion(resultados)
+            data[perfil_nombre] = agregados.to_dict()
+
+            write_json_atomic(agregados_file, data, indent=2)
+
+        return True, agregados
+
+    except Exception as e:
+        error_msg = f"Error al actualizar agregados: {str(e)}"
+        logging.error(error_msg)
+        return False, error_msg
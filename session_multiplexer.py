@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from analysis_pipeline import UltimoValor
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def procesar_frame(analizador, elemento):
+    """Procesamiento por defecto: detección de pose + análisis de un frame.
+
+    `elemento` es (timestamp, frame); con timestamp None se usa el reloj de pared.
+    """
+    timestamp, frame = elemento
+    return analizador.process_frame(frame, timestamp)
+
+
+def procesar_landmarks(analizador, elemento):
+    """Procesamiento de landmarks ya extraídos; `elemento` es (timestamp, landmarks)"""
+    timestamp, lm = elemento
+    return analizador.process_landmarks(lm, timestamp)
+
+
+class SesionMultiplexada:
+    """Un stream dentro del multiplexor: su analizador, su cola acotada y sus contadores"""
+
+    def __init__(self, sesion_id, analizador, capacidad_cola):
+        self.sesion_id = sesion_id
+        self.analizador = analizador
+        self.cola = deque()
+        self.capacidad_cola = capacidad_cola
+        self.resultados = UltimoValor()
+
+        self.frames_recibidos = 0
+        self.frames_procesados = 0
+        self.frames_descartados = 0
+        self.ultimo_tiempo_inferencia = 0.0
+
+        # Estado de planificación, protegido por la condición del multiplexor
+        self.en_proceso = False
+        self.en_lista = False
+        self.cerrada = False
+        self.recalibrar = False
+
+
+class MultiplexorSesiones:
+    """Varios streams de cámara sobre un pool fijo de hilos de inferencia.
+
+    Cada sesión conserva su propio `JumpAnalyzer` (y con él su grafo `Pose`,
+    que guarda el seguimiento entre frames del mismo stream). Los trabajadores
+    atienden las sesiones con frames pendientes en round-robin, un frame por
+    turno, así que un stream rápido no acapara el pool. Una sesión nunca se
+    procesa en dos trabajadores a la vez: su analizador solo lo toca un hilo
+    y los frames se analizan en orden.
+
+    Cada sesión tiene una cola acotada (`capacidad_cola`). Con `bloquear=False`
+    (cámaras en vivo) un frame nuevo descarta el más antiguo de su propia
+    cola; con `bloquear=True` (videos) el productor espera a que haya espacio.
+    En ambos casos la presión se aplica por sesión y no frena a las demás.
+    """
+
+    def __init__(self, trabajadores=None, capacidad_cola=2, procesar=procesar_frame):
+        if trabajadores is None:
+            # MediaPipe usa varios hilos internos por inferencia; no conviene un trabajador por núcleo
+            trabajadores = max(1, (os.cpu_count() or 2) // 2)
+        self.trabajadores = trabajadores
+        self.capacidad_cola = capacidad_cola
+        # Función (analizador, elemento) -> resultado; inyectable para landmarks o benchmarks
+        self.procesar = procesar
+
+        self.sesiones = {}
+        self._listas = deque()
+        self._condicion = threading.Condition()
+        self._detener = False
+        self._hilos = []
+        self._capturas = {}
+
+    @property
+    def activo(self):
+        return bool(self._hilos) and not self._detener
+
+    def start(self):
+        """Arranca el pool de trabajadores"""
+        self._detener = False
+        self._hilos = [threading.Thread(target=self._trabajar, name=f"MultiplexorInferencia-{i}", daemon=True)
+                       for i in range(self.trabajadores)]
+        for hilo in self._hilos:
+            hilo.start()
+        logging.info(f"Multiplexor iniciado con {self.trabajadores} trabajadores")
+
+    def stop(self, timeout=2.0):
+        """Detiene capturas y trabajadores; los frames pendientes se descartan"""
+        for sesion_id in list(self._capturas):
+            self._detener_captura(sesion_id, timeout)
+        with self._condicion:
+            self._detener = True
+            self._condicion.notify_all()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+        for sesion in self.sesiones.values():
+            logging.info(f"Sesión {sesion.sesion_id}: {sesion.frames_procesados} frames procesados, "
+                         f"{sesion.frames_descartados} descartados de {sesion.frames_recibidos}")
+
+    def agregar_sesion(self, sesion_id, analizador):
+        with self._condicion:
+            if sesion_id in self.sesiones:
+                raise ValueError(f"La sesión {sesion_id} ya existe")
+            sesion = SesionMultiplexada(sesion_id, analizador, self.capacidad_cola)
+            self.sesiones[sesion_id] = sesion
+        return sesion
+
+    def quitar_sesion(self, sesion_id, timeout=None):
+        """Cierra una sesión y espera a que termine su frame en curso; retorna la sesión o None"""
+        self._detener_captura(sesion_id, timeout)
+        with self._condicion:
+            sesion = self.sesiones.get(sesion_id)
+            if sesion is None:
+                return None
+            sesion.cerrada = True
+            sesion.frames_descartados += len(sesion.cola)
+            sesion.cola.clear()
+            if sesion.en_lista:
+                self._listas.remove(sesion)
+                sesion.en_lista = False
+            self._condicion.wait_for(lambda: not sesion.en_proceso, timeout)
+            del self.sesiones[sesion_id]
+            self._condicion.notify_all()
+        return sesion
+
+    def solicitar_recalibracion(self, sesion_id):
+        """Reinicia la sesión desde su trabajador, entre dos frames"""
+        with self._condicion:
+            sesion = self.sesiones.get(sesion_id)
+            if sesion is not None:
+                sesion.recalibrar = True
+
+    def enviar(self, sesion_id, elemento, bloquear=False, timeout=None):
+        """Encola un frame (o elemento para `procesar`) de una sesión.
+
+        Retorna False si la sesión no existe o, con `bloquear`, si la cola
+        siguió llena durante `timeout` segundos.
+        """
+        with self._condicion:
+            sesion = self.sesiones.get(sesion_id)
+            if sesion is None or sesion.cerrada or self._detener:
+                return False
+            sesion.frames_recibidos += 1
+            if len(sesion.cola) >= sesion.capacidad_cola:
+                if bloquear:
+                    hay_espacio = self._condicion.wait_for(
+                        lambda: len(sesion.cola) < sesion.capacidad_cola or sesion.cerrada or self._detener, timeout)
+                    if not hay_espacio or sesion.cerrada or self._detener:
+                        sesion.frames_descartados += 1
+                        return False
+                else:
+                    sesion.cola.popleft()
+                    sesion.frames_descartados += 1
+            sesion.cola.append(elemento)
+            if not sesion.en_proceso and not sesion.en_lista:
+                sesion.en_lista = True
+                self._listas.append(sesion)
+                # Trabajadores y productores bloqueados comparten la condición
+                self._condicion.notify_all()
+            return True
+
+    def esperar_pendientes(self, timeout=None):
+        """Espera a que todas las colas se vacíen y no quede ningún frame en proceso"""
+        with self._condicion:
+            return self._condicion.wait_for(
+                lambda: not self._listas and not any(s.en_proceso for s in self.sesiones.values()), timeout)
+
+    def agregar_fuente(self, sesion_id, analizador, fuente=0, captura=None):
+        """Crea una sesión alimentada por una cámara o video en su propio hilo de captura.
+
+        Retorna False si la fuente no se pudo abrir.
+        """
+        if captura is None:
+            captura = cv2.VideoCapture(fuente)
+        if not captura.isOpened():
+            logging.warning(f"No se pudo abrir la fuente de video {fuente}")
+            captura.release()
+            return False
+        self.agregar_sesion(sesion_id, analizador)
+        detener = threading.Event()
+        hilo = threading.Thread(target=self._capturar, args=(sesion_id, captura, detener),
+                                name=f"MultiplexorCaptura-{sesion_id}", daemon=True)
+        self._capturas[sesion_id] = (hilo, detener, captura)
+        hilo.start()
+        return True
+
+    def _detener_captura(self, sesion_id, timeout):
+        captura = self._capturas.pop(sesion_id, None)
+        if captura is None:
+            return
+        hilo, detener, video = captura
+        detener.set()
+        hilo.join(timeout)
+        video.release()
+
+    def _capturar(self, sesion_id, captura, detener):
+        while not detener.is_set():
+            ret, frame = captura.read()
+            if not ret:
+                logging.warning(f"La fuente de la sesión {sesion_id} no entregó más frames")
+                break
+            if not self.enviar(sesion_id, (None, frame)):
+                break
+
+    def _trabajar(self):
+        procesar = self.procesar
+        while True:
+            with self._condicion:
+                while not self._listas and not self._detener:
+                    self._condicion.wait()
+                if self._detener:
+                    return
+                sesion = self._listas.popleft()
+                sesion.en_lista = False
+                sesion.en_proceso = True
+                elemento = sesion.cola.popleft()
+                recalibrar = sesion.recalibrar
+                sesion.recalibrar = False
+                # Hay espacio en la cola para un productor bloqueado
+                self._condicion.notify_all()
+
+            if recalibrar:
+                sesion.analizador.reset_session()
+            t0 = time.perf_counter()
+            try:
+                resultado = procesar(sesion.analizador, elemento)
+            except Exception as e:
+                logging.error(f"Error procesando frame de la sesión {sesion.sesion_id}: {e}")
+                resultado = {'error': f'Error procesando frame: {str(e)}', 'feedback': [f'Error: {str(e)}']}
+            duracion = time.perf_counter() - t0
+
+            with self._condicion:
+                # Se publica antes de liberar la sesión para que los resultados salgan en orden
+                sesion.resultados.publicar(resultado)
+                sesion.en_proceso = False
+                sesion.frames_procesados += 1
+                sesion.ultimo_tiempo_inferencia = duracion
+                # Al final de la lista: round-robin entre las sesiones con frames pendientes
+                if sesion.cola and not sesion.cerrada:
+                    sesion.en_lista = True
+                    self._listas.append(sesion)
+                self._condicion.notify_all()
@@ -0,0 +1,233 @@
+import math
+
+import numpy as np
+
+from jump_analyzer import TipoSalto, PoseLandmark, NUM_LANDMARKS, landmarks_desde_array
+
+# Altura de salto por defecto (m) según el tipo de salto
+ALTURA_SALTO_DEFECTO = {
+    TipoSalto.CMJ: 0.32,
+    TipoSalto.SQJ: 0.28,
+    TipoSalto.ABALAKOV: 0.38
+}
+
+# Fases de la secuencia sintética, en orden de aparición dentro de un salto
+FASE_DE_PIE = "de_pie"
+FASE_CONTRAMOVIMIENTO = "contramovimiento"
+FASE_SENTADILLA = "sentadilla"
+FASE_IMPULSO = "impulso"
+FASE_VUELO = "vuelo"
+FASE_ATERRIZAJE = "aterrizaje"
+FASE_RECUPERACION = "recuperacion"
+
+# Grupos de landmarks que se ocultan juntos en una oclusión
+GRUPOS_OCLUSION = [
+    [PoseLandmark.LEFT_HIP, PoseLandmark.LEFT_KNEE, PoseLandmark.LEFT_ANKLE,
+     PoseLandmark.LEFT_HEEL, PoseLandmark.LEFT_FOOT_INDEX],
+    [PoseLandmark.RIGHT_HIP, PoseLandmark.RIGHT_KNEE, PoseLandmark.RIGHT_ANKLE,
+     PoseLandmark.RIGHT_HEEL, PoseLandmark.RIGHT_FOOT_INDEX],
+    [PoseLandmark.LEFT_ELBOW, PoseLandmark.LEFT_WRIST, PoseLandmark.LEFT_PINKY,
+     PoseLandmark.LEFT_INDEX, PoseLandmark.LEFT_THUMB],
+    [PoseLandmark.RIGHT_ELBOW, PoseLandmark.RIGHT_WRIST, PoseLandmark.RIGHT_PINKY,
+     PoseLandmark.RIGHT_INDEX, PoseLandmark.RIGHT_THUMB]
+]
+
+ANGULO_DE_PIE = 178.0
+
+
+def _suave(u):
+    """Interpolación smoothstep en [0, 1]"""
+    return u * u * (3 - 2 * u)
+
+
+class GeneradorPoseSintetica:
+    """Generador determinista de secuencias de landmarks de salto.
+
+    Produce la cinemática de CMJ, SQJ y Abalakov (de pie, contramovimiento,
+    impulso, vuelo parabólico, aterrizaje con flexión y recuperación) como un
+    array (frames, 33, 4) de [x, y, z, visibility] en coordenadas
+    normalizadas de MediaPipe, o como listas de objetos `Landmark`. Con la
+    misma semilla la secuencia es idéntica bit a bit, así que sirve para
+    benchmarks y pruebas sin cámara ni mediapipe.
+
+    La escala vertical sigue la calibración de `JumpAnalyzer`: el
+    desplazamiento del salto se expresa en unidades de la distancia entre
+    rodillas (`separacion_rodillas`), de modo que el analizador mide de vuelta
+    alturas en metros. Con la separación por defecto el analizador detecta el
+    vuelo a partir de ~0.25 m de salto.
+    """
+
+    def __init__(self, tipo_salto=TipoSalto.CMJ, saltos=3, fps=30, altura_salto_m=None,
+                 distancia_rodillas_m=0.315, separacion_rodillas=0.55, altura_imagen=0.45,
+                 angulo_contramovimiento=70.0, angulo_aterrizaje=80.0,
+                 ruido=0.002, prob_oclusion=0.0, semilla=0):
+        self.tipo_salto = tipo_salto
+        self.saltos = saltos
+        self.fps = fps
+        self.altura_salto_m = altura_salto_m if altura_salto_m is not None else ALTURA_SALTO_DEFECTO[tipo_salto]
+        self.separacion_rodillas = separacion_rodillas
+        self.altura_imagen = altura_imagen
+        self.angulo_contramovimiento = angulo_contramovimiento
+        self.angulo_aterrizaje = angulo_aterrizaje
+        self.ruido = ruido
+        self.prob_oclusion = prob_oclusion
+        self.semilla = semilla
+
+        # Factor metros/unidad que obtendrá JumpAnalyzer.calibrar
+        self.px_to_m = distancia_rodillas_m / separacion_rodillas
+        self.suelo_y = 0.95
+
+    @classmethod
+    def para_perfil(cls, usuario_perfil, **kwargs):
+        """Crea un generador con la distancia entre rodillas del perfil"""
+        return cls(distancia_rodillas_m=usuario_perfil.longitudes["distancia_rodillas"], **kwargs)
+
+    def _segmentos(self):
+        """Fases de la secuencia: (fase, duración s, rodilla inicial, rodilla final, elevación, brazos ini, brazos fin)"""
+        cm = self.angulo_contramovimiento
+        aterrizaje = self.angulo_aterrizaje
+        abalakov = self.tipo_salto == TipoSalto.ABALAKOV
+        brazos_atras = -45.0 if abalakov else 0.0
+        brazos_arriba = 160.0 if abalakov else 0.0
+        tiempo_vuelo = 2 * math.sqrt(2 * self.altura_salto_m / 9.81)
+
+        segmentos = [(FASE_DE_PIE, 1.0, ANGULO_DE_PIE, ANGULO_DE_PIE, False, 0.0, 0.0)]
+        for _ in range(self.saltos):
+            if self.tipo_salto == TipoSalto.SQJ:
+                segmentos += [
+                    (FASE_CONTRAMOVIMIENTO, 1.0, ANGULO_DE_PIE, cm, False, 0.0, 0.0),
+                    (FASE_SENTADILLA, 3.0, cm, cm, False, 0.0, 0.0)
+                ]
+            else:
+                segmentos.append((FASE_CONTRAMOVIMIENTO, 0.5, ANGULO_DE_PIE, cm, False, 0.0, brazos_atras))
+            segmentos += [
+                (FASE_IMPULSO, 0.25, cm, ANGULO_DE_PIE, False, brazos_atras, brazos_arriba),
+                (FASE_VUELO, tiempo_vuelo, ANGULO_DE_PIE, ANGULO_DE_PIE, True, brazos_arriba, brazos_arriba),
+                (FASE_ATERRIZAJE, 0.2, ANGULO_DE_PIE, aterrizaje, False, brazos_arriba, 20.0 if abalakov else 0.0),
+                (FASE_ATERRIZAJE, 0.4, aterrizaje, aterrizaje, False, 20.0 if abalakov else 0.0, 0.0),
+                (FASE_RECUPERACION, 0.6, aterrizaje, ANGULO_DE_PIE, False, 0.0, 0.0),
+                (FASE_DE_PIE, 1.0, ANGULO_DE_PIE, ANGULO_DE_PIE, False, 0.0, 0.0)
+            ]
+        return segmentos
+
+    def _cinematica(self):
+        """Ángulo de rodilla, elevación del cuerpo y ángulo de brazos por frame"""
+        elevacion_max = self.altura_salto_m / self.px_to_m
+        rodilla, elevacion, brazos, fases = [], [], [], []
+        for fase, duracion, r0, r1, vuelo, b0, b1 in self._segmentos():
+            n = max(1, int(round(duracion * self.fps)))
+            u = np.arange(n) / n
+            s = _suave(u)
+            rodilla.append(r0 + (r1 - r0) * s)
+            brazos.append(b0 + (b1 - b0) * s)
+            # Vuelo parabólico (u lineal: la gravedad ya da la forma)
+            elevacion.append(4 * elevacion_max * u * (1 - u) if vuelo else np.zeros(n))
+            fases += [fase] * n
+        return np.concatenate(rodilla), np.concatenate(elevacion), np.concatenate(brazos), fases
+
+    def generar_arrays(self):
+        """Retorna (timestamps, landmarks (N, 33, 4) float32, fases por frame)"""
+        rodilla, elevacion, brazos, fases = self._cinematica()
+        n = len(rodilla)
+        h = self.altura_imagen
+        muslo, pierna = 0.23 * h, 0.22 * h
+        altura_tobillo = 0.04 * h
+        tronco, brazo, antebrazo = 0.30 * h, 0.17 * h, 0.15 * h
+
+        datos = np.zeros((n, NUM_LANDMARKS, 4), dtype=np.float64)
+        datos[:, :, 3] = 0.99
+
+        # Piernas en el plano y-z: tobillo fijo, rodilla hacia la cámara (z negativo)
+        theta = np.radians(rodilla)
+        distancia = np.sqrt(muslo ** 2 + pierna ** 2 - 2 * muslo * pierna * np.cos(theta))
+        cos_alfa = np.clip((pierna ** 2 + distancia ** 2 - muslo ** 2) / (2 * pierna * distancia), -1, 1)
+        sin_alfa = np.sqrt(1 - cos_alfa ** 2)
+
+        tobillo_y = self.suelo_y - altura_tobillo - elevacion
+        rodilla_y = tobillo_y - pierna * cos_alfa
+        rodilla_z = -pierna * sin_alfa
+        cadera_y = tobillo_y - distancia
+
+        # Inclinación del tronco proporcional a la flexión de rodilla
+        inclinacion = np.radians((ANGULO_DE_PIE - rodilla) * 0.3)
+        hombro_y = cadera_y - tronco * np.cos(inclinacion)
+        hombro_z = -tronco * np.sin(inclinacion)
+
+        phi = np.radians(brazos)
+        codo_y = hombro_y + brazo * np.cos(phi)
+        codo_z = hombro_z - brazo * np.sin(phi)
+        muneca_y = codo_y + antebrazo * np.cos(phi)
+        muneca_z = codo_z - antebrazo * np.sin(phi)
+
+        mitad = self.separacion_rodillas / 2
+        for lado, x in (("LEFT", 0.5 + mitad), ("RIGHT", 0.5 - mitad)):
+            def poner(nombre, y, z, dx=0.0):
+                idx = PoseLandmark[f"{lado}_{nombre}"].value
+                datos[:, idx, 0] = x + (dx if lado == "LEFT" else -dx)
+                datos[:, idx, 1] = y
+                datos[:, idx, 2] = z
+
+            poner("HIP", cadera_y, 0.0)
+            poner("KNEE", rodilla_y, rodilla_z)
+            poner("ANKLE", tobillo_y, 0.0)
+            poner("HEEL", tobillo_y + 0.02 * h, 0.03 * h)
+            poner("FOOT_INDEX", tobillo_y + altura_tobillo, -0.08 * h)
+            poner("SHOULDER", hombro_y, hombro_z)
+            poner("ELBOW", codo_y, codo_z)
+            poner("WRIST", muneca_y, muneca_z)
+            poner("PINKY", muneca_y + 0.02 * h * np.cos(phi), muneca_z - 0.02 * h * np.sin(phi), 0.01 * h)
+            poner("INDEX", muneca_y + 0.025 * h * np.cos(phi), muneca_z - 0.025 * h * np.sin(phi))
+            poner("THUMB", muneca_y + 0.015 * h * np.cos(phi), muneca_z - 0.015 * h * np.sin(phi), -0.01 * h)
+            poner("EYE_INNER", hombro_y - 0.14 * h, hombro_z - 0.04 * h, 0.01 * h - mitad)
+            poner("EYE", hombro_y - 0.14 * h, hombro_z - 0.04 * h, 0.02 * h - mitad)
+            poner("EYE_OUTER", hombro_y - 0.14 * h, hombro_z - 0.04 * h, 0.03 * h - mitad)
+            poner("EAR", hombro_y - 0.13 * h, hombro_z, 0.045 * h - mitad)
+
+        for idx, dy, dx in ((PoseLandmark.NOSE, 0.12, 0.0),
+                            (PoseLandmark.MOUTH_LEFT, 0.10, 0.012 * h),
+                            (PoseLandmark.MOUTH_RIGHT, 0.10, -0.012 * h)):
+            datos[:, idx.value, 0] = 0.5 + dx
+            datos[:, idx.value, 1] = hombro_y - dy * h
+            datos[:, idx.value, 2] = hombro_z - 0.05 * h
+
+        rng = np.random.default_rng(self.semilla)
+        if self.ruido > 0:
+            datos[:, :, :3] += rng.normal(0.0, self.ruido, (n, NUM_LANDMARKS, 3))
+            datos[:, :, 3] -= np.abs(rng.normal(0.0, 0.01, (n, NUM_LANDMARKS)))
+
+        # Ráfagas de oclusión: un grupo de landmarks pierde visibilidad y precisión
+        if self.prob_oclusion > 0:
+            i = 0
+            while i < n:
+                if rng.random() < self.prob_oclusion:
+                    duracion = int(rng.integers(2, 6))
+                    grupo = [p.value for p in GRUPOS_OCLUSION[rng.integers(len(GRUPOS_OCLUSION))]]
+                    fin = min(n, i + duracion)
+                    datos[i:fin, grupo, 3] = 0.2
+                    datos[i:fin, grupo, :3] += rng.normal(0.0, 0.02, (fin - i, len(grupo), 3))
+                    i = fin
+                else:
+                    i += 1
+
+        timestamps = np.arange(n) / self.fps
+        return timestamps, datos.astype(np.float32), fases
+
+    def generar_landmarks(self):
+        """Retorna [(timestamp, [Landmark] * 33)] compatible con los resultados de MediaPipe"""
+        timestamps, datos, _ = self.generar_arrays()
+        return [(float(t), landmarks_desde_array(frame)) for t, frame in zip(timestamps, datos)]
+
+    def __iter__(self):
+        return iter(self.generar_landmarks())
+
+
+def reproducir_landmarks(analizador, frames):
+    """Pasa una secuencia [(timestamp, landmarks)] por calibrar/verificar; retorna los detalles por frame"""
+    detalles = []
+    for t, lm in frames:
+        if not analizador.calibrado:
+            analizador.calibrar(lm)
+            detalles.append({"estado_salto_str": "CALIBRANDO"})
+            continue
+        detalles.append(analizador.verificar(lm, timestamp=t)[2])
+    return detalles
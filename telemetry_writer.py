@@ -0,0 +1,319 @@
+import json
+import os
+import glob
+import logging
+import queue
+import threading
+from datetime import datetime
+
+from profile_manager import update_performance_aggregates, write_json_atomic, file_lock
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Tipos de registro del stream de telemetría (una línea JSON por registro)
+REGISTRO_INICIO = "inicio"
+REGISTRO_FRAME = "frame"
+REGISTRO_TRANSICION = "transicion"
+REGISTRO_FIN = "fin"
+
+_FIN_HILO = object()
+
+# Subdirectorio de los streams ya guardados o recuperados: recover_pending_sessions no los relee
+DIRECTORIO_ARCHIVO = "telemetria_archivo"
+
+# Streams abiertos por este proceso: lockf no detecta los del propio proceso
+_streams_abiertos = set()
+_streams_abiertos_lock = threading.Lock()
+
+
+class TelemetryWriter:
+    """Escritor append-only de telemetría por frame.
+
+    Los registros se acumulan en un búfer de tamaño fijo y se entregan por
+    bloques a un hilo de fondo que los escribe (y sincroniza a disco) en un
+    archivo JSON Lines. Si la aplicación se cierra inesperadamente, el archivo
+    contiene todo lo escrito hasta el último bloque y puede reconstruirse con
+    `recover_session`. Abrir un stream que ya tiene registros continúa esa
+    sesión (p. ej. tras restaurar un snapshot) sin repetir la cabecera.
+    """
+
+    def __init__(self, filename, perfil_nombre="", tipo_salto="", chunk_size=64, max_chunks_pendientes=16):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.frames_escritos = 0
+        self.chunks_escritos = 0
+        self.chunks_descartados = 0
+        self.cerrado = False
+
+        self._buffer = []
+        self._cola = queue.Queue(maxsize=max_chunks_pendientes)
+        self._archivo = open(filename, 'a', encoding='utf-8')
+        if fcntl is not None:
+            # Mantener el stream bloqueado mientras está vivo para que otra
+            # estación no lo tome por una sesión interrumpida
+            try:
+                fcntl.lockf(self._archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # Otro proceso escribe este stream: no dejar el archivo abierto
+                self._archivo.close()
+                raise
+        with _streams_abiertos_lock:
+            _streams_abiertos.add(os.path.abspath(filename))
+        reanudado = os.fstat(self._archivo.fileno()).st_size > 0
+        if reanudado:
+            # Completar una última línea truncada por el cierre inesperado
+            with open(filename, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._archivo.write('\n')
+        self._hilo = threading.Thread(target=self._escribir_bloques, name="TelemetryWriter", daemon=True)
+        self._hilo.start()
+
+        if reanudado:
+            return
+        self._agregar({
+            'tipo': REGISTRO_INICIO,
+            'perfil_usuario': perfil_nombre,
+            'tipo_salto': tipo_salto,
+            'fecha_sesion': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+        # Sin cabecera en disco el stream no se puede recuperar: escribirla ya
+        self.flush()
+
+    def write_frame(self, t, estado, detalles, potencia, error_keys=None):
+        """Registra la cinemática de un frame analizado"""
+        self._agregar({
+            'tipo': REGISTRO_FRAME,
+            't': t,
+            'estado': estado,
+            'angulo_rodilla': float(detalles.get('angulo_rodilla', 0)),
+            'angulo_cadera': float(detalles.get('angulo_cadera', 0)),
+            'angulo_tobillo': float(detalles.get('angulo_tobillo', 0)),
+            'velocidad_rodilla': float(detalles.get('velocidad_rodilla', 0)),
+            'mid_hip_y_px': float(detalles.get('mid_hip_y_px', 0)),
+            'is_in_air': bool(detalles.get('is_in_air', False)),
+            'potencia': float(potencia),
+            'errores': list(error_keys or [])
+        })
+        self.frames_escritos += 1
+
+    def write_transition(self, t, desde, hacia, analizador):
+        """Registra un cambio de estado junto con los acumulados del analizador"""
+        registro = {
+            'tipo': REGISTRO_TRANSICION,
+            't': t,
+            'desde': desde,
+            'hacia': hacia,
+            'contador': analizador.contador,
+            'correctas': analizador.correctas,
+            'errores': dict(analizador.errores),
+            'jump_height_m': float(analizador.jump_height_m)
+        }
+        if analizador.tiempos_vuelo and hacia == "ATERRIZAJE":
+            registro['tiempo_vuelo'] = float(analizador.tiempos_vuelo[-1])
+            registro['potencia_salto'] = float(analizador.potencias[-1])
+        self._agregar(registro)
+        # Las transiciones son raras y valiosas: no esperar a llenar el bloque
+        self.flush()
+
+    def flush(self, bloquear=False):
+        """Entrega el búfer actual al hilo de escritura.
+
+        Si la cola está llena y no se pide `bloquear`, solo se descartan los
+        registros por frame: cabecera, transiciones y registro final (de los
+        que depende `recover_session`) quedan en el búfer para el próximo bloque.
+        """
+        if not self._buffer:
+            return
+        bloque, self._buffer = self._buffer, []
+        if bloquear:
+            self._cola.put(bloque)
+            return
+        try:
+            self._cola.put_nowait(bloque)
+        except queue.Full:
+            # Nunca bloquear el bucle de análisis: se pierden los frames y se contabiliza
+            self._buffer = [r for r in bloque if r['tipo'] != REGISTRO_FRAME]
+            descartados = len(bloque) - len(self._buffer)
+            if descartados:
+                self.chunks_descartados += 1
+                logging.warning(f"Telemetría saturada, {descartados} registros de frame descartados")
+
+    def close(self, resultados=None):
+        """Escribe el registro final y espera a que el hilo vacíe la cola"""
+        if self.cerrado:
+            return
+        self._buffer.append({'tipo': REGISTRO_FIN, 'resultados': resultados or {}})
+        self.flush(bloquear=True)
+        self._cola.put(_FIN_HILO)
+        self._hilo.join()
+        self._archivo.close()
+        with _streams_abiertos_lock:
+            _streams_abiertos.discard(os.path.abspath(self.filename))
+        self.cerrado = True
+        logging.info(f"Telemetría cerrada: {self.frames_escritos} frames en {self.chunks_escritos} bloques ({self.filename})")
+
+    def _agregar(self, registro):
+        self._buffer.append(registro)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def _escribir_bloques(self):
+        while True:
+            bloque = self._cola.get()
+            if bloque is _FIN_HILO:
+                self._cola.task_done()
+                break
+            try:
+                lineas = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in bloque)
+                self._archivo.write(lineas)
+                self._archivo.flush()
+                os.fsync(self._archivo.fileno())
+                self.chunks_escritos += 1
+            except Exception as e:
+                logging.error(f"Error escribiendo telemetría: {e}")
+            finally:
+                self._cola.task_done()
+
+
+def _stream_en_uso(filename):
+    """Indica si este u otro proceso mantiene abierto (bloqueado) un stream de telemetría"""
+    # Consultar primero los streams propios: sondear con lockf un archivo que
+    # este proceso ya bloquea siempre tiene éxito, y cerrar el descriptor de
+    # la sonda liberaría el bloqueo del escritor vivo
+    with _streams_abiertos_lock:
+        if os.path.abspath(filename) in _streams_abiertos:
+            return True
+    if fcntl is None:
+        return False
+    with open(filename, 'a') as f:
+        try:
+            fcntl.lockf(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.lockf(f.fileno(), fcntl.LOCK_UN)
+    return False
+
+
+def read_telemetry(filename):
+    """Lee un stream de telemetría ignorando las líneas truncadas (la última, o una previa a una reanudación)"""
+    registros = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                logging.warning(f"Registro truncado ignorado en {filename}")
+    return registros
+
+
+def recover_session(telemetry_file, filename=None):
+    """Reconstruye un archivo de sesión válido desde un stream de telemetría parcial"""
+    try:
+        registros = read_telemetry(telemetry_file)
+        if not registros or registros[0].get('tipo') != REGISTRO_INICIO:
+            return False, f"Stream de telemetría sin cabecera: {telemetry_file}"
+
+        inicio = registros[0]
+        fin = next((r for r in registros if r.get('tipo') == REGISTRO_FIN), None)
+
+        if fin is not None and fin.get('resultados'):
+            resultados = fin['resultados']
+        else:
+            transiciones = [r for r in registros if r.get('tipo') == REGISTRO_TRANSICION]
+            aterrizajes = [r for r in transiciones if r.get('hacia') == "ATERRIZAJE" and 'tiempo_vuelo' in r]
+            ultima = transiciones[-1] if transiciones else {}
+
+            alturas = [r['jump_height_m'] for r in aterrizajes]
+            potencias = [r['potencia_salto'] for r in aterrizajes]
+            tiempos = [r['tiempo_vuelo'] for r in aterrizajes]
+            contador = ultima.get('contador', 0)
+            correctas = ultima.get('correctas', 0)
+
+            resultados = {
+                "total": contador,
+                "correctas": correctas,
+                "errores": ultima.get('errores', {}),
+                "precision": (correctas / contador) * 100 if contador > 0 else 0,
+                "altura_salto_promedio": sum(alturas) / len(alturas) if alturas else 0,
+                "potencia_promedio": sum(potencias) / len(potencias) if potencias else 0,
+                "tiempo_vuelo_promedio": sum(tiempos) / len(tiempos) if tiempos else 0,
+                "alturas_saltos": alturas,
+                "tipo_salto": inicio.get('tipo_salto', ""),
+                "frames_recuperados": sum(1 for r in registros if r.get('tipo') == REGISTRO_FRAME),
+                "sesion_recuperada": True
+            }
+
+        if filename is None:
+            directorio, nombre = os.path.split(telemetry_file)
+            nombre = os.path.splitext(nombre)[0].replace("telemetria_", "resultados_", 1)
+            filename = os.path.join(directorio, nombre + ".json")
+
+        resultados_completos = {
+            'perfil_usuario': inicio.get('perfil_usuario', ""),
+            'fecha_sesion': inicio.get('fecha_sesion', ""),
+            'resultados': resultados
+        }
+        write_json_atomic(filename, resultados_completos, indent=2)
+
+        logging.info(f"Sesión recuperada desde {telemetry_file} en {filename}")
+        return True, filename
+
+    except Exception as e:
+        error_msg = f"Error al recuperar sesión: {str(e)}"
+        logging.error(error_msg)
+        return False, error_msg
+
+
+def archive_stream(telemetry_file):
+    """Mueve un stream ya guardado al subdirectorio de archivo; retorna su nueva ruta"""
+    directorio, nombre = os.path.split(telemetry_file)
+    archivo = os.path.join(directorio, DIRECTORIO_ARCHIVO)
+    os.makedirs(archivo, exist_ok=True)
+    destino = os.path.join(archivo, nombre)
+    os.replace(telemetry_file, destino)
+    return destino
+
+
+def recover_pending_sessions(directorio=".", excluir=()):
+    """Recupera las sesiones cuyo stream de telemetría no llegó a cerrarse.
+
+    Los streams de `excluir` (p. ej. el de una sesión con snapshot que se
+    reanudará) no se tocan: su sesión se guarda una sola vez, al finalizarla.
+    Los recuperados, los irrecuperables (vacíos o sin cabecera) y los que ya
+    tienen registro final se archivan, así que cada inicio solo lee los
+    streams pendientes.
+    """
+    excluir = {os.path.abspath(archivo) for archivo in excluir}
+    recuperadas = []
+    # Varias estaciones pueden compartir el directorio: solo una recupera a la vez
+    with file_lock(os.path.join(directorio, "telemetria")):
+        for archivo in sorted(glob.glob(os.path.join(directorio, "telemetria_*.jsonl"))):
+            if os.path.abspath(archivo) in excluir or _stream_en_uso(archivo):
+                continue
+            registros = read_telemetry(archivo)
+            if any(r.get('tipo') == REGISTRO_FIN for r in registros):
+                # Sesión cerrada normalmente y guardada por quien la cerró
+                archive_stream(archivo)
+                continue
+            success, resultado = recover_session(archivo)
+            archive_stream(archivo)
+            if not success:
+                # Vacío o sin cabecera: no hay nada que recuperar, pero dejarlo
+                # pendiente haría que cada inicio lo volviera a leer
+                logging.warning(f"Stream de telemetría irrecuperable archivado: {archivo}")
+                continue
+            with open(resultado, 'r', encoding='utf-8') as f:
+                sesion = json.load(f)
+            update_performance_aggregates(sesion['perfil_usuario'], sesion['resultados'])
+            recuperadas.append(resultado)
+    return recuperadas
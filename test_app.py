@@ -119,8 +119,9 @@ def test_profile_manager():
             return False
         
         # Limpiar archivo de prueba
-        if os.path.exists("test_profiles.json"):
-            os.remove("test_profiles.json")
+        for archivo in ("test_profiles.json", "test_profiles.json.lock"):
+            if os.path.exists(archivo):
+                os.remove(archivo)
         
         print("✅ Gestor de perfiles funcional")
         return True
@@ -129,6 +130,52 @@ def test_profile_manager():
         print(f"❌ Error en gestor de perfiles: {e}")
         return False
 
+def test_compact_profile_model():
+    """Prueba el perfil compacto con valores derivados en caché"""
+    print("\n🔍 Probando modelo compacto de perfil...")
+    
+    try:
+        from profile_manager import UsuarioPerfil
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 180, 81, "intermedio")
+        
+        if hasattr(perfil, '__dict__'):
+            print("❌ El perfil no usa __slots__")
+            return False
+        
+        if abs(perfil.imc - 25.0) > 1e-9 or abs(perfil.longitudes["femur"] - 1.8 * 0.23) > 1e-9:
+            print("❌ Valores derivados incorrectos")
+            return False
+        
+        # Cambiar un campo primario invalida los valores derivados
+        perfil.actualizar_datos(altura_cm=200, edad=60)
+        if abs(perfil.altura_m - 2.0) > 1e-9 or abs(perfil.longitudes["femur"] - 2.0 * 0.23 * 0.97) > 1e-9:
+            print("❌ Los valores derivados no se invalidaron")
+            return False
+        
+        data = perfil.to_dict()
+        if set(data) & {'altura_m', 'imc', 'longitudes'}:
+            print("❌ La serialización incluye valores derivados")
+            return False
+        
+        # Perfiles guardados por versiones anteriores incluyen valores derivados
+        data.update({'altura_m': 1.0, 'imc': 1.0, 'longitudes': {}})
+        perfil_cargado = UsuarioPerfil.from_dict(data)
+        if perfil_cargado.altura_m != 2.0 or perfil_cargado.fecha_creacion != perfil.fecha_creacion:
+            print("❌ Error al cargar un perfil serializado")
+            return False
+        
+        if UsuarioPerfil().umbrales_nivel.get('tolerancia_angulo') is None:
+            print("❌ umbrales_nivel no disponible en un perfil incompleto")
+            return False
+        
+        print("✅ Modelo compacto de perfil funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en modelo compacto de perfil: {e}")
+        return False
+
 def test_jump_analyzer():
     """Prueba el analizador de saltos"""
     print("\n🔍 Probando analizador de saltos...")
@@ -174,6 +221,1469 @@ def test_jump_analyzer():
         print(f"❌ Error en analizador de saltos: {e}")
         return False
 
+def test_calibration_accumulator():
+    """Prueba la calibración robusta con varios frames"""
+    print("\n🔍 Probando acumulador de calibración...")
+    
+    try:
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer, AcumuladorCalibracion, Landmark, PoseLandmark
+        from synthetic_pose import GeneradorPoseSintetica
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+        generador = GeneradorPoseSintetica.para_perfil(perfil, saltos=1, semilla=5)
+        frames = [lm for _, lm in generador.generar_landmarks()[:30]]
+        
+        # Una rodilla mal detectada: con un solo frame fija una escala errónea, el acumulador la descarta
+        rodilla = frames[2][PoseLandmark.RIGHT_KNEE.value]
+        frames[2][PoseLandmark.RIGHT_KNEE.value] = Landmark(rodilla.x + 0.3, rodilla.y, rodilla.z, rodilla.visibility)
+        un_frame = JumpAnalyzer(perfil, usar_mediapipe=False)
+        un_frame.calibrar(frames[2])
+        
+        acumulador = AcumuladorCalibracion(min_frames=10, max_frames=60)
+        oculto = [Landmark(visibility=0.1)] * 33
+        for i, lm in enumerate(frames):
+            acumulador.agregar(oculto if i == 5 else lm)
+            if acumulador.completo:
+                break
+        if not acumulador.convergido or acumulador.frames >= 30 or acumulador.rechazados != 1:
+            print(f"❌ La calibración no convergió antes del límite: {acumulador.estado()}")
+            return False
+        if acumulador.inliers != acumulador.frames - 1:
+            print("❌ El frame atípico no se descartó")
+            return False
+        
+        px_to_m = perfil.longitudes["distancia_rodillas"] / acumulador.estimacion[0]
+        if abs(px_to_m / generador.px_to_m - 1) > 0.01 or abs(un_frame.px_to_m / generador.px_to_m - 1) < 0.1:
+            print(f"❌ Escala incorrecta: {px_to_m:.4f} (acumulada) / {un_frame.px_to_m:.4f} (un frame) / {generador.px_to_m:.4f}")
+            return False
+        estado = acumulador.estado()
+        if not 0 < estado['estabilidad'] <= 1 or not 0 < estado['confianza'] <= estado['estabilidad']:
+            print(f"❌ Confianza o estabilidad fuera de rango: {estado}")
+            return False
+        
+        # Postura inestable: no calibra y sigue con los frames más recientes en el buffer preasignado
+        inestable = GeneradorPoseSintetica.para_perfil(perfil, saltos=1, ruido=0.03, semilla=5)
+        acumulador = AcumuladorCalibracion(min_frames=10, max_frames=60)
+        buffer = acumulador._muestras
+        for _, lm in inestable.generar_landmarks()[:30] * 4:
+            acumulador.agregar(lm)
+        if acumulador.completo or acumulador.frames != 120 or acumulador._muestras is not buffer:
+            print(f"❌ Una postura inestable no debería calibrar: {acumulador.estado()}")
+            return False
+        if acumulador.estabilidad >= estado['estabilidad'] or acumulador.estado()['progreso'] >= 1.0:
+            print("❌ La estabilidad no refleja la oscilación")
+            return False
+        
+        # Integración en process_landmarks: progreso por frame y calibración al converger
+        analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+        resultados = [analizador.process_landmarks(lm, t) for t, lm in generador.generar_landmarks()[:30]]
+        completados = [i for i, r in enumerate(resultados) if r.get('calibration_success')]
+        if len(completados) != 1 or not analizador.calibrado or 'calibracion' not in resultados[0]:
+            print("❌ process_landmarks no calibró con el acumulador")
+            return False
+        if resultados[completados[0]]['calibracion']['progreso'] != 1.0 or resultados[0]['calibracion']['progreso'] >= 1.0:
+            print("❌ Progreso de calibración incorrecto")
+            return False
+        analizador.reset_session()
+        if analizador.acumulador_calibracion.frames != 0:
+            print("❌ reset_session no reinició la calibración")
+            return False
+        
+        print(f"✅ Acumulador de calibración funcional (convergió en {completados[0] + 1} frames)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en acumulador de calibración: {e}")
+        return False
+
+def test_analyzer_snapshot():
+    """Prueba snapshot/restore del analizador y la migración de una sesión entre servidores"""
+    print("\n🔍 Probando snapshot y reanudación del analizador...")
+    
+    try:
+        import asyncio
+        import json
+        import time
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer, TipoSalto, EstadoSalto, VENTANA_HISTORIAL
+        from synthetic_pose import GeneradorPoseSintetica
+        from landmark_server import ServidorLandmarks, ClienteLandmarks
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+        generador = GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=TipoSalto.ABALAKOV, saltos=3, semilla=3)
+        frames = generador.generar_landmarks()
+        _, arrays, fases = generador.generar_arrays()
+        
+        def analizador_nuevo():
+            analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+            analizador.set_tipo_salto(TipoSalto.ABALAKOV)
+            return analizador
+        
+        continuo = analizador_nuevo()
+        for t, lm in frames:
+            continuo.process_landmarks(lm, t)
+        esperado = continuo.get_results()
+        
+        # Cortes en distintas fases, incluido el vuelo; el snapshot pasa por JSON como en disco
+        cortes = [len(frames) // 4, fases.index("vuelo") + 2, len(frames) // 2, len(frames) - 5]
+        for corte in cortes:
+            original = analizador_nuevo()
+            for t, lm in frames[:corte]:
+                original.process_landmarks(lm, t)
+            datos = json.loads(json.dumps(original.snapshot()))
+            reanudado, errors = JumpAnalyzer.desde_snapshot(datos, usar_mediapipe=False)
+            if reanudado is None:
+                print(f"❌ No se pudo restaurar el snapshot: {errors}")
+                return False
+            if reanudado.estado != original.estado or reanudado.px_to_m != original.px_to_m:
+                print("❌ Estado o calibración no restaurados")
+                return False
+            for t, lm in frames[corte:]:
+                reanudado.process_landmarks(lm, t)
+            if reanudado.get_results() != esperado:
+                print(f"❌ La sesión reanudada en el frame {corte} difiere de la continua")
+                return False
+        
+        # Snapshot inválido: el analizador queda intacto
+        success, errors = continuo.restore({'version': 99})
+        incompleto, _ = continuo.restore({'version': 1, 'estado': 'VUELO'})
+        if success or incompleto or continuo.get_results() != esperado:
+            print("❌ Un snapshot inválido no debería modificar el analizador")
+            return False
+        
+        completo = continuo.snapshot(incluir_historial=True)
+        compacto = continuo.snapshot()
+        if len(completo['historial']['historial_tiempos']) != min(VENTANA_HISTORIAL, len(frames) - 1) or \
+                len(compacto['historial']['historial_tiempos']) != 1:
+            print("❌ Historial del snapshot incorrecto")
+            return False
+        t0 = time.perf_counter()
+        for _ in range(100):
+            json.dumps(continuo.snapshot())
+        costo_us = (time.perf_counter() - t0) / 100 * 1e6
+        
+        # Migración de una sesión remota entre dos servidores de landmarks
+        async def migrar():
+            servidores = [ServidorLandmarks(puerto=0), ServidorLandmarks(puerto=0)]
+            for servidor in servidores:
+                await servidor.start()
+            clientes = [ClienteLandmarks(), ClienteLandmarks()]
+            try:
+                for cliente, servidor in zip(clientes, servidores):
+                    await cliente.conectar(puerto=servidor.puerto)
+                mitad = len(arrays) // 2
+                await clientes[0].iniciar_sesion(1, perfil, tipo_salto=TipoSalto.ABALAKOV)
+                for (t, _), frame in zip(frames[:mitad], arrays[:mitad]):
+                    await clientes[0].enviar_frame(1, t, frame)
+                snapshot = await clientes[0].snapshot(1)
+                success, errors = await clientes[1].iniciar_sesion(5, snapshot=snapshot)
+                if not success:
+                    raise RuntimeError(errors)
+                for (t, _), frame in zip(frames[mitad:], arrays[mitad:]):
+                    await clientes[1].enviar_frame(5, t, frame)
+                return await clientes[1].finalizar(5)
+            finally:
+                for cliente in clientes:
+                    await cliente.cerrar()
+                for servidor in servidores:
+                    await servidor.stop()
+        
+        migrado = asyncio.run(migrar())
+        if migrado['total'] != esperado['total'] or migrado['alturas_saltos'] != esperado['alturas_saltos']:
+            print("❌ La sesión migrada entre servidores difiere de la continua")
+            return False
+        
+        print(f"✅ Snapshot y reanudación funcionales ({len(json.dumps(compacto))} bytes, {costo_us:.0f} µs)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en snapshot del analizador: {e}")
+        return False
+
+def test_latency_instrumentation():
+    """Prueba la medición opcional de latencias por etapa"""
+    print("\n🔍 Probando medición de latencias por etapa...")
+    
+    try:
+        import numpy as np
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        
+        analyzer = JumpAnalyzer(perfil)
+        if 'latencias_ms' in analyzer.process_frame(frame) or analyzer.get_latency_stats():
+            print("❌ Se reportan latencias con la medición desactivada")
+            return False
+        
+        analyzer = JumpAnalyzer(perfil, medir_latencias=True)
+        for _ in range(20):
+            resultado = analyzer.process_frame(frame)
+        
+        latencias = resultado.get('latencias_ms', {})
+        if not {'conversion', 'pose', 'total'} <= set(latencias):
+            print(f"❌ Etapas faltantes en el frame: {latencias}")
+            return False
+        
+        stats = analyzer.get_latency_stats()
+        total = stats.get('total', {})
+        if total.get('muestras') != 20 or not total['p50'] <= total['p95'] <= total['p99']:
+            print(f"❌ Percentiles incorrectos: {total}")
+            return False
+        
+        print("✅ Medición de latencias funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en medición de latencias: {e}")
+        return False
+
+def test_synthetic_pose():
+    """Prueba que las secuencias sintéticas sean deterministas y completen saltos en el analizador"""
+    print("\n🔍 Probando generador de pose sintética...")
+    
+    try:
+        import numpy as np
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer, TipoSalto
+        from synthetic_pose import GeneradorPoseSintetica, reproducir_landmarks
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+        
+        t1, datos1, fases = GeneradorPoseSintetica(semilla=7, prob_oclusion=0.02).generar_arrays()
+        _, datos2, _ = GeneradorPoseSintetica(semilla=7, prob_oclusion=0.02).generar_arrays()
+        if datos1.shape != (len(t1), 33, 4) or len(fases) != len(t1) or not np.array_equal(datos1, datos2):
+            print("❌ La secuencia sintética no es determinista")
+            return False
+        
+        for tipo in TipoSalto:
+            generador = GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=tipo, saltos=2)
+            analyzer = JumpAnalyzer(perfil, usar_mediapipe=False)
+            analyzer.set_tipo_salto(tipo)
+            reproducir_landmarks(analyzer, generador.generar_landmarks())
+            
+            if analyzer.contador != 2 or not all(0.1 < h < 0.6 for h in analyzer.alturas_saltos):
+                print(f"❌ {tipo.name}: {analyzer.contador} saltos, alturas {analyzer.alturas_saltos}")
+                return False
+        
+        print("✅ Generador de pose sintética funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en generador de pose sintética: {e}")
+        return False
+
+def test_golden_replay():
+    """Prueba la reproducción de secuencias grabadas contra sus golden y presupuestos de tiempo"""
+    print("\n🔍 Probando reproducción golden...")
+    
+    try:
+        import glob
+        from golden_replay import verificar_directorio, verificar_golden, comparar, DIRECTORIO_GOLDEN
+        
+        success, fallos = verificar_directorio()
+        if not success:
+            print(f"❌ El analizador ya no coincide con los golden: {fallos}")
+            return False
+        
+        golden_file = sorted(glob.glob(f"{DIRECTORIO_GOLDEN}/*.json"))[0]
+        success, errors = verificar_golden(golden_file, factor_presupuesto=1e-6)
+        if success or not all(e.startswith("presupuesto") for e in errors):
+            print(f"❌ No se detectó la regresión de tiempo: {errors}")
+            return False
+        
+        esperado = {"alturas_saltos": [0.30, 0.26], "total": 2}
+        if comparar(esperado, {"alturas_saltos": [0.302, 0.26], "total": 2}):
+            print("❌ Diferencia dentro de tolerancia reportada como error")
+            return False
+        if len(comparar(esperado, {"alturas_saltos": [0.32, 0.26], "total": 3})) != 2:
+            print("❌ No se detectaron diferencias fuera de tolerancia")
+            return False
+        
+        print("✅ Reproducción golden funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en reproducción golden: {e}")
+        return False
+
+def test_memory_soak():
+    """Prueba el perfilado de memoria y que el analizador no crezca en sesiones largas"""
+    print("\n🔍 Probando memoria en sesiones largas...")
+    
+    try:
+        from jump_analyzer import VENTANA_HISTORIAL
+        from memory_monitor import soak
+        
+        # 3 minutos simulados a 30 fps, con reinicio de sesión cada minuto
+        success, errors, muestras = soak(horas=0.05, intervalo_frames=1800, frames_sesion=1800, limite_kb=128)
+        if not success:
+            print(f"❌ Memoria no acotada: {errors}")
+            return False
+        
+        contenedores = muestras[-1]['contenedores']['analizador']
+        if contenedores['historial_tiempos'] != VENTANA_HISTORIAL or not muestras[-1]['top_lineas']:
+            print(f"❌ Muestra de memoria incompleta: {contenedores}")
+            return False
+        
+        print("✅ Memoria acotada en sesiones largas")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en perfilado de memoria: {e}")
+        return False
+
+def test_metrics_endpoint():
+    """Prueba el endpoint local de métricas contra un scrape en localhost"""
+    print("\n🔍 Probando endpoint de métricas...")
+    
+    try:
+        import os
+        import shutil
+        import tempfile
+        import urllib.request
+        import urllib.error
+        import numpy as np
+        from profile_manager import ProfileManager, UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer
+        from synthetic_pose import GeneradorPoseSintetica, reproducir_landmarks
+        from metrics_server import ServidorMetricas
+        
+        servidor = ServidorMetricas(puerto=0)
+        if not servidor.start():
+            print("❌ No se pudo abrir el endpoint de métricas")
+            return False
+        
+        directorio = tempfile.mkdtemp()
+        try:
+            perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+            pm = ProfileManager(os.path.join(directorio, "perfiles.json"))
+            pm.metricas = servidor.metricas
+            pm.save_profile(perfil)
+            pm.load_profile("No Existe")
+            
+            analyzer = JumpAnalyzer(perfil)
+            analyzer.metricas = servidor.metricas
+            for _ in range(3):
+                analyzer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+            reproducir_landmarks(analyzer, GeneradorPoseSintetica.para_perfil(perfil, saltos=2).generar_landmarks())
+            
+            url = f"http://127.0.0.1:{servidor.puerto}"
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5) as respuesta:
+                tipo = respuesta.headers['Content-Type']
+                lineas = respuesta.read().decode('utf-8').splitlines()
+            try:
+                urllib.request.urlopen(f"{url}/otra", timeout=5)
+                print("❌ Rutas distintas de /metrics deberían responder 404")
+                return False
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    raise
+        finally:
+            servidor.stop()
+            shutil.rmtree(directorio, ignore_errors=True)
+        
+        valores = dict(linea.rsplit(" ", 1) for linea in lineas if not linea.startswith("#"))
+        esperados = {
+            'ergosanitas_frames_total{resultado="sin_pose"}': "3",
+            'ergosanitas_saltos_total{tipo_salto="CMJ",correcto="si"}': "2",
+            'ergosanitas_perfiles_operaciones_total{operacion="guardar",resultado="ok"}': "1",
+            'ergosanitas_perfiles_operaciones_total{operacion="cargar",resultado="no_encontrado"}': "1",
+            'ergosanitas_inferencia_segundos_count': "3",
+        }
+        for clave, valor in esperados.items():
+            if valores.get(clave) != valor:
+                print(f"❌ {clave} = {valores.get(clave)}, se esperaba {valor}")
+                return False
+        if not tipo.startswith("text/plain") or 'ergosanitas_errores_tecnicos_total{error="stiff_landing"}' not in valores:
+            print("❌ Formato de exposición incompleto")
+            return False
+        
+        print("✅ Endpoint de métricas funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en endpoint de métricas: {e}")
+        return False
+
+def test_landmark_server():
+    """Prueba el servicio de ingesta de landmarks con dos sesiones en una conexión"""
+    print("\n🔍 Probando servidor de landmarks...")
+    
+    try:
+        import asyncio
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer, TipoSalto, landmarks_desde_array
+        from synthetic_pose import GeneradorPoseSintetica
+        from landmark_server import (ServidorLandmarks, ClienteLandmarks, empaquetar, empaquetar_frame,
+                                     desempaquetar_frame, CABECERA, TAMANO_FRAME, MSG_INICIO, MSG_ERROR)
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+        secuencias = {
+            1: (TipoSalto.CMJ, GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=TipoSalto.CMJ, saltos=2, semilla=1)),
+            2: (TipoSalto.SQJ, GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=TipoSalto.SQJ, saltos=2, semilla=2))
+        }
+        frames = {sesion_id: generador.generar_arrays() for sesion_id, (_, generador) in secuencias.items()}
+        
+        mensaje = empaquetar_frame(1, 1.25, frames[1][1][0])
+        t, lm = desempaquetar_frame(mensaje[CABECERA.size:])
+        if len(mensaje) != CABECERA.size + TAMANO_FRAME or t != 1.25 or not (lm == frames[1][1][0]).all():
+            print("❌ Ida y vuelta del formato de frame incorrecta")
+            return False
+        
+        async def sesion_remota():
+            servidor = ServidorLandmarks(puerto=0)
+            if not await servidor.start():
+                return None
+            cliente = ClienteLandmarks()
+            try:
+                await cliente.conectar(puerto=servidor.puerto)
+                sin_iniciar = await cliente.enviar_frame(7, 0.0, frames[1][1][0])
+                # Un INICIO con JSON válido pero que no es un objeto se rechaza sin cortar la conexión
+                no_objeto = await cliente._solicitar(empaquetar(MSG_INICIO, 8, b'[]'))
+                for sesion_id, (tipo, _) in secuencias.items():
+                    success, errors = await cliente.iniciar_sesion(sesion_id, perfil, tipo_salto=tipo)
+                    if not success:
+                        raise RuntimeError(errors)
+                # Frames intercalados de ambas sesiones por la misma conexión
+                estados = {}
+                for i in range(max(len(f[0]) for f in frames.values())):
+                    for sesion_id, (timestamps, landmarks, _) in frames.items():
+                        if i < len(timestamps):
+                            estados[sesion_id] = await cliente.enviar_frame(sesion_id, float(timestamps[i]), landmarks[i])
+                resultados = {sesion_id: await cliente.finalizar(sesion_id) for sesion_id in secuencias}
+                return sin_iniciar, no_objeto, estados, resultados, servidor.sesiones_activas
+            finally:
+                await cliente.cerrar()
+                await servidor.stop()
+        
+        salida = asyncio.run(sesion_remota())
+        if salida is None:
+            print("❌ No se pudo abrir el servidor de landmarks")
+            return False
+        sin_iniciar, no_objeto, estados, resultados, activas = salida
+        if 'error' not in sin_iniciar or activas != 0:
+            print("❌ Sesiones no iniciadas o no cerradas correctamente")
+            return False
+        if no_objeto[0] != MSG_ERROR or 'INICIO inválido' not in no_objeto[1]['error']:
+            print(f"❌ INICIO que no es un objeto JSON mal respondido: {no_objeto}")
+            return False
+        
+        for sesion_id, (tipo, _) in secuencias.items():
+            local = JumpAnalyzer(perfil, usar_mediapipe=False)
+            local.set_tipo_salto(tipo)
+            timestamps, landmarks, _ = frames[sesion_id]
+            for t, frame in zip(timestamps, landmarks):
+                local.process_landmarks(landmarks_desde_array(frame), float(t))
+            esperado = local.get_results()
+            remoto = resultados[sesion_id]
+            if remoto['total'] != esperado['total'] or remoto['total'] != 2 or estados[sesion_id]['contador'] != 2:
+                print(f"❌ Sesión {tipo.name}: {remoto['total']} saltos remotos, {esperado['total']} locales")
+                return False
+            if abs(remoto['altura_salto_promedio'] - esperado['altura_salto_promedio']) > 1e-6:
+                print(f"❌ Sesión {tipo.name}: alturas distintas al análisis local")
+                return False
+        
+        # Dos sesiones del mismo usuario que terminan a la vez: dos archivos y dos sesiones en los agregados
+        import glob
+        import shutil
+        import tempfile
+        from profile_manager import load_performance_aggregates
+        
+        async def sesiones_simultaneas():
+            servidor = ServidorLandmarks(puerto=0, guardar_resultados=True)
+            if not await servidor.start():
+                return None
+            clientes = [ClienteLandmarks(), ClienteLandmarks()]
+            try:
+                timestamps, landmarks, _ = frames[1]
+                for cliente in clientes:
+                    await cliente.conectar(puerto=servidor.puerto)
+                    await cliente.iniciar_sesion(1, perfil, tipo_salto=TipoSalto.CMJ)
+                    for t, frame in zip(timestamps, landmarks):
+                        await cliente.enviar_frame(1, float(t), frame)
+                return await asyncio.gather(*(cliente.finalizar(1) for cliente in clientes))
+            finally:
+                for cliente in clientes:
+                    await cliente.cerrar()
+                await servidor.stop()
+        
+        directorio_original = os.getcwd()
+        directorio = tempfile.mkdtemp()
+        os.chdir(directorio)
+        try:
+            asyncio.run(sesiones_simultaneas())
+            archivos = glob.glob("resultados_Test_User_*.json")
+            sesiones = load_performance_aggregates("Test User").sesiones
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+        if len(archivos) != 2 or sesiones != 2:
+            print(f"❌ Sesiones simultáneas: {len(archivos)} archivos, {sesiones} sesiones en los agregados")
+            return False
+        
+        print(f"✅ Servidor de landmarks funcional ({CABECERA.size + TAMANO_FRAME} bytes por frame)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en servidor de landmarks: {e}")
+        return False
+
+def test_session_multiplexer():
+    """Prueba el multiplexor de sesiones: orden por sesión, round-robin y presión por sesión"""
+    print("\n🔍 Probando multiplexor de sesiones...")
+    
+    try:
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer, TipoSalto
+        from synthetic_pose import GeneradorPoseSintetica
+        from session_multiplexer import MultiplexorSesiones, procesar_landmarks
+        
+        perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+        
+        # Presión por sesión: sin trabajadores, la cola conserva solo los frames más recientes
+        multiplexor = MultiplexorSesiones(trabajadores=1, capacidad_cola=2, procesar=lambda a, e: e)
+        multiplexor.agregar_sesion("a", None)
+        multiplexor.agregar_sesion("b", None)
+        for i in range(5):
+            multiplexor.enviar("a", i)
+        multiplexor.enviar("b", 0)
+        sesion_a = multiplexor.sesiones["a"]
+        if list(sesion_a.cola) != [3, 4] or sesion_a.frames_descartados != 3 or multiplexor.sesiones["b"].frames_descartados:
+            print("❌ La cola acotada no descartó los frames más antiguos de su sesión")
+            return False
+        if multiplexor.enviar("a", 5, bloquear=True, timeout=0.05):
+            print("❌ El envío bloqueante debería expirar con la cola llena")
+            return False
+        
+        # Round-robin: con un trabajador las sesiones se alternan frame a frame
+        orden = []
+        multiplexor.procesar = lambda analizador, elemento: orden.append(elemento)
+        multiplexor.start()
+        multiplexor.esperar_pendientes(timeout=5)
+        multiplexor.stop()
+        if orden != [3, 0, 4]:
+            print(f"❌ Orden de atención no equitativo: {orden}")
+            return False
+        
+        # Sesiones reales: el análisis de cada stream coincide con el análisis secuencial
+        secuencias = {tipo: GeneradorPoseSintetica.para_perfil(perfil, tipo_salto=tipo, saltos=2, semilla=i).generar_landmarks()
+                      for i, tipo in enumerate(TipoSalto)}
+        multiplexor = MultiplexorSesiones(trabajadores=2, capacidad_cola=4, procesar=procesar_landmarks)
+        for tipo in secuencias:
+            analizador = JumpAnalyzer(perfil, usar_mediapipe=False)
+            analizador.set_tipo_salto(tipo)
+            multiplexor.agregar_sesion(tipo.name, analizador)
+        multiplexor.start()
+        for i in range(max(len(f) for f in secuencias.values())):
+            for tipo, frames in secuencias.items():
+                if i < len(frames):
+                    if not multiplexor.enviar(tipo.name, frames[i], bloquear=True, timeout=5):
+                        print("❌ Envío bloqueante rechazado")
+                        return False
+        multiplexor.esperar_pendientes(timeout=10)
+        sesiones = {tipo: multiplexor.quitar_sesion(tipo.name) for tipo in secuencias}
+        multiplexor.stop()
+        
+        for tipo, frames in secuencias.items():
+            local = JumpAnalyzer(perfil, usar_mediapipe=False)
+            local.set_tipo_salto(tipo)
+            for t, lm in frames:
+                local.process_landmarks(lm, t)
+            sesion = sesiones[tipo]
+            if sesion.frames_procesados != len(frames) or sesion.frames_descartados:
+                print(f"❌ {tipo.name}: {sesion.frames_procesados} de {len(frames)} frames procesados")
+                return False
+            remoto, esperado = sesion.analizador.get_results(), local.get_results()
+            if remoto['total'] != esperado['total'] or remoto['alturas_saltos'] != esperado['alturas_saltos']:
+                print(f"❌ {tipo.name}: resultados distintos al análisis secuencial")
+                return False
+            if sesion.resultados.leer()[1]['contador'] != esperado['total']:
+                print(f"❌ {tipo.name}: último resultado publicado desactualizado")
+                return False
+        
+        print("✅ Multiplexor de sesiones funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en multiplexor de sesiones: {e}")
+        return False
+
+def test_frame_sources():
+    """Prueba las fuentes de frames asíncronas con archivos y un stream MJPEG local (sin cámara)"""
+    print("\n🔍 Probando fuentes de frames...")
+    
+    try:
+        import asyncio
+        import os
+        import shutil
+        import tempfile
+        import cv2
+        import numpy as np
+        from profile_manager import UsuarioPerfil
+        from jump_analyzer import JumpAnalyzer
+        from session_multiplexer import MultiplexorSesiones
+        from frame_sources import (FuenteDirectorioImagenes, FuenteVideo, FuenteMJPEG, ServidorMJPEG,
+                                   abrir_fuente, analizar_fuente, alimentar_multiplexor)
+        
+        directorio = tempfile.mkdtemp()
+        try:
+            frames = [np.full((48, 64, 3), i * 20, dtype=np.uint8) for i in range(8)]
+            carpeta = os.path.join(directorio, "imagenes")
+            os.makedirs(carpeta)
+            for i, frame in enumerate(frames):
+                cv2.imwrite(os.path.join(carpeta, f"{i:03d}.png"), frame)
+            video = os.path.join(directorio, "sesion.avi")
+            escritor = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+            for frame in frames:
+                escritor.write(frame)
+            escritor.release()
+            
+            async def leer_todo(fuente):
+                async with fuente:
+                    return [(t, float(frame.mean())) async for t, frame in fuente]
+            
+            async def servir_corruptos(reader, writer):
+                # Muchas partes JPEG ilegibles seguidas (más que el límite de recursión) y una válida
+                await reader.readuntil(b"\r\n\r\n")
+                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=--corrupto\r\n\r\n")
+                parte = b"--corrupto\r\nContent-Type: image/jpeg\r\nContent-Length: 4\r\n\r\nnada\r\n"
+                writer.write(parte * 1500)
+                jpeg = cv2.imencode('.jpg', frames[3])[1].tobytes()
+                writer.write(b"--corrupto\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n%s\r\n" % (len(jpeg), jpeg))
+                await writer.drain()
+                writer.close()
+            
+            async def escenario():
+                servidor = ServidorMJPEG(frames, puerto=0, fps=240)
+                if not await servidor.start():
+                    return None
+                try:
+                    fuentes = [abrir_fuente(carpeta), abrir_fuente(video), abrir_fuente(servidor.url)]
+                    tipos = [type(f) for f in fuentes]
+                    # Las tres fuentes se leen a la vez en un solo bucle de eventos
+                    lecturas = await asyncio.gather(*(leer_todo(f) for f in fuentes))
+                    
+                    resultados = []
+                    analizados = await analizar_fuente(FuenteMJPEG(servidor.url), JumpAnalyzer(perfil),
+                                                       max_frames=3, al_resultado=resultados.append)
+                    
+                    timestamps = []
+                    multiplexor = MultiplexorSesiones(trabajadores=1, capacidad_cola=2,
+                                                      procesar=lambda a, e: timestamps.append(e[0]))
+                    multiplexor.agregar_sesion("video", None)
+                    multiplexor.start()
+                    enviados = await alimentar_multiplexor(FuenteVideo(video), multiplexor, "video")
+                    multiplexor.esperar_pendientes(timeout=5)
+                    sesion = multiplexor.quitar_sesion("video")
+                    multiplexor.stop()
+                    
+                    servidor_corrupto = await asyncio.start_server(servir_corruptos, "127.0.0.1", 0)
+                    puerto = servidor_corrupto.sockets[0].getsockname()[1]
+                    try:
+                        async with FuenteMJPEG(f"http://127.0.0.1:{puerto}/") as fuente:
+                            recuperado = await fuente.leer()
+                    finally:
+                        servidor_corrupto.close()
+                    
+                    cerrada = await FuenteDirectorioImagenes(os.path.join(directorio, "no_existe")).abrir()
+                    return tipos, lecturas, analizados, resultados, enviados, sesion, timestamps, recuperado, cerrada
+                finally:
+                    await servidor.stop()
+            
+            perfil = UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio")
+            salida = asyncio.run(escenario())
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+        
+        if salida is None:
+            print("❌ No se pudo abrir el servidor MJPEG")
+            return False
+        tipos, lecturas, analizados, resultados, enviados, sesion, timestamps, recuperado, cerrada = salida
+        if tipos != [FuenteDirectorioImagenes, FuenteVideo, FuenteMJPEG]:
+            print(f"❌ abrir_fuente eligió fuentes incorrectas: {tipos}")
+            return False
+        for nombre, lectura in zip(("directorio", "video", "mjpeg"), lecturas):
+            medias = [m for _, m in lectura]
+            if len(lectura) != len(frames) or any(abs(m - i * 20) > 3 for i, m in enumerate(medias)):
+                print(f"❌ Fuente {nombre}: frames incorrectos {medias}")
+                return False
+        if abs(lecturas[0][1][0] - 1 / 30) > 1e-6 or abs(lecturas[1][1][0] - 1 / 30) > 1e-3:
+            print("❌ Las fuentes grabadas deberían usar su propio reloj")
+            return False
+        if analizados != 3 or len(resultados) != 3 or any('estado' not in r for r in resultados):
+            print("❌ analizar_fuente no entregó un resultado por frame")
+            return False
+        if enviados != len(frames) or sesion.frames_procesados != len(frames) or sesion.frames_descartados:
+            print("❌ Una fuente grabada no debería perder frames en el multiplexor")
+            return False
+        if timestamps != [t for t, _ in lecturas[1]]:
+            print("❌ El multiplexor no recibió el reloj de la fuente grabada")
+            return False
+        if recuperado is None or abs(float(recuperado[1].mean()) - 60) > 3:
+            print("❌ El stream MJPEG no se recuperó tras partes JPEG ilegibles")
+            return False
+        if cerrada:
+            print("❌ Un directorio inexistente no debería abrirse")
+            return False
+        
+        print("✅ Fuentes de frames funcionales (directorio, video y MJPEG)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en fuentes de frames: {e}")
+        return False
+
+def test_telemetry_writer():
+    """Prueba la escritura de telemetría y la recuperación de una sesión interrumpida"""
+    print("\n🔍 Probando telemetría append-only...")
+    
+    try:
+        import json
+        import shutil
+        import tempfile
+        from types import SimpleNamespace
+        import glob
+        import subprocess
+        import threading
+        from telemetry_writer import (TelemetryWriter, recover_session, recover_pending_sessions, read_telemetry,
+                                      DIRECTORIO_ARCHIVO, fcntl, _streams_abiertos, _streams_abiertos_lock)
+        
+        directorio = tempfile.mkdtemp()
+        archivo = os.path.join(directorio, "telemetria_Test_User_20240101_000000.jsonl")
+        writer = TelemetryWriter(archivo, perfil_nombre="Test User", tipo_salto="Abalakov", chunk_size=8)
+        
+        # Simular una sesión con un salto completo
+        analizador = SimpleNamespace(contador=0, correctas=0, errores={"stiff_landing": 0},
+                                     jump_height_m=0.0, tiempos_vuelo=[], potencias=[])
+        for i in range(40):
+            writer.write_frame(i / 30.0, "INICIAL", {"angulo_rodilla": 170.0}, 10.0)
+        analizador.jump_height_m = 0.32
+        analizador.tiempos_vuelo.append(0.5)
+        analizador.potencias.append(1500.0)
+        writer.write_transition(1.5, "VUELO", "ATERRIZAJE", analizador)
+        analizador.contador = 1
+        analizador.correctas = 1
+        writer.write_transition(2.0, "ATERRIZAJE", "ESTABLE_POST_ATERRIZAJE", analizador)
+        
+        # Simular un cierre inesperado: sin registro final y con la última línea truncada
+        writer.flush()
+        writer._cola.join()
+        with open(archivo, 'a', encoding='utf-8') as f:
+            f.write('{"tipo": "frame", "t": 2.1, "esta')
+        
+        if writer.chunks_escritos == 0 or writer.chunks_escritos >= writer.frames_escritos:
+            print("❌ La telemetría no se está escribiendo por bloques")
+            return False
+        
+        success, filename = recover_session(archivo)
+        if not success:
+            print(f"❌ Error al recuperar la sesión: {filename}")
+            return False
+        
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        resultados = data['resultados']
+        if resultados['total'] != 1 or abs(resultados['altura_salto_promedio'] - 0.32) > 1e-9:
+            print(f"❌ Sesión recuperada incorrecta: {resultados}")
+            return False
+        
+        # Una sesión restaurada de su snapshot sigue escribiendo en el mismo stream,
+        # y la recuperación al iniciar no lo toca (sus saltos se guardan una sola vez)
+        reanudado = os.path.join(directorio, "telemetria_Test_User_20240102_000000.jsonl")
+        writer = TelemetryWriter(reanudado, perfil_nombre="Test User", tipo_salto="Abalakov")
+        writer.write_transition(1.5, "VUELO", "ATERRIZAJE", analizador)
+        writer.flush()
+        writer._cola.join()
+        with open(reanudado, 'a', encoding='utf-8') as f:
+            f.write('{"tipo": "frame", "t": 2.1, "esta')
+        writer._archivo.close()
+        with _streams_abiertos_lock:
+            _streams_abiertos.discard(os.path.abspath(reanudado))
+        
+        if recover_pending_sessions(directorio, excluir=[reanudado]) or not os.path.exists(reanudado):
+            print("❌ La recuperación tocó el stream de una sesión con snapshot")
+            return False
+        
+        writer = TelemetryWriter(reanudado, perfil_nombre="Test User", tipo_salto="Abalakov")
+        writer.write_transition(3.0, "VUELO", "ATERRIZAJE", analizador)
+        writer.close({'total': 2})
+        registros = read_telemetry(reanudado)
+        tipos = [r['tipo'] for r in registros]
+        if tipos.count('inicio') != 1 or tipos.count('transicion') != 2 or tipos[-1] != 'fin':
+            print(f"❌ El stream reanudado no continúa la sesión: {tipos}")
+            return False
+        
+        # Al iniciar se recupera el stream interrumpido y se archivan los dos:
+        # el siguiente inicio ya no vuelve a leerlos
+        with _streams_abiertos_lock:
+            _streams_abiertos.discard(os.path.abspath(archivo))
+        directorio_original = os.getcwd()
+        os.chdir(directorio)
+        try:
+            recuperadas = recover_pending_sessions(".")
+            pendientes = glob.glob("telemetria_*.jsonl")
+            archivados = sorted(os.listdir(DIRECTORIO_ARCHIVO))
+        finally:
+            os.chdir(directorio_original)
+        if len(recuperadas) != 1 or pendientes or archivados != sorted(map(os.path.basename, (archivo, reanudado))):
+            print(f"❌ Streams terminados sin archivar: {pendientes} / {archivados}")
+            return False
+        
+        # La cabecera llega al disco al crear el stream; un stream vacío o sin
+        # cabecera no se puede recuperar y se archiva en lugar de releerse en cada inicio
+        sin_cerrar = os.path.join(directorio, "telemetria_Test_User_20240104_000000.jsonl")
+        writer = TelemetryWriter(sin_cerrar, perfil_nombre="Test User")
+        for i in range(10):
+            writer.write_frame(i / 30.0, "INICIAL", {}, 0.0)
+        writer._cola.join()
+        if [r['tipo'] for r in read_telemetry(sin_cerrar)] != ['inicio']:
+            print("❌ La cabecera del stream no se escribió al crearlo")
+            return False
+        writer.close()
+        vacio = os.path.join(directorio, "telemetria_Vacio_20240105_000000.jsonl")
+        open(vacio, 'w').close()
+        recover_pending_sessions(directorio)
+        if os.path.exists(vacio) or recover_pending_sessions(directorio) or glob.glob(os.path.join(directorio, "telemetria_*.jsonl")):
+            print("❌ Un stream sin cabecera quedó pendiente de recuperación")
+            return False
+        
+        # Con la cola saturada solo se pierden frames: transiciones y registro final llegan al archivo
+        class ArchivoLento:
+            def __init__(self, archivo, liberar):
+                self.archivo = archivo
+                self.liberar = liberar
+            def write(self, texto):
+                self.liberar.wait()
+                return self.archivo.write(texto)
+            def __getattr__(self, nombre):
+                return getattr(self.archivo, nombre)
+        
+        saturado = os.path.join(directorio, "telemetria_Test_User_20240106_000000.jsonl")
+        writer = TelemetryWriter(saturado, perfil_nombre="Test User", chunk_size=4, max_chunks_pendientes=1)
+        writer._cola.join()
+        liberar = threading.Event()
+        writer._archivo = ArchivoLento(writer._archivo, liberar)
+        transiciones = [("DESPEGUE", "VUELO"), ("VUELO", "ATERRIZAJE"), ("ATERRIZAJE", "PARADO")] * 3
+        for i, (desde, hacia) in enumerate(transiciones):
+            for j in range(6):
+                writer.write_frame(i + j / 30.0, desde, {}, 0.0)
+            writer.write_transition(i + 0.5, desde, hacia, analizador)
+        liberar.set()
+        writer.close({'total': 3})
+        registros = read_telemetry(saturado)
+        escritas = [(r['desde'], r['hacia']) for r in registros if r['tipo'] == 'transicion']
+        if writer.chunks_descartados == 0 or escritas != transiciones or registros[-1]['tipo'] != 'fin':
+            print(f"❌ La saturación perdió transiciones: {len(escritas)}/{len(transiciones)} ({writer.chunks_descartados} descartes)")
+            return False
+        
+        # Si otro proceso escribe el stream, el constructor falla sin dejar el archivo abierto
+        if fcntl is not None:
+            bloqueado = os.path.join(directorio, "telemetria_Otro_20240103_000000.jsonl")
+            otro = subprocess.Popen([sys.executable, "-c",
+                                     "import fcntl, sys\n"
+                                     f"f = open({bloqueado!r}, 'a')\n"
+                                     "fcntl.lockf(f.fileno(), fcntl.LOCK_EX)\n"
+                                     "print('ok', flush=True)\n"
+                                     "sys.stdin.read()"],
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            try:
+                otro.stdout.readline()
+                descriptores = len(os.listdir("/proc/self/fd"))
+                try:
+                    TelemetryWriter(bloqueado)
+                    print("❌ Se abrió un stream bloqueado por otro proceso")
+                    return False
+                except OSError:
+                    pass
+                if len(os.listdir("/proc/self/fd")) != descriptores:
+                    print("❌ El constructor dejó abierto el stream que no pudo bloquear")
+                    return False
+            finally:
+                otro.communicate("")
+        
+        shutil.rmtree(directorio, ignore_errors=True)
+        
+        print("✅ Telemetría y recuperación funcionales")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en telemetría: {e}")
+        return False
+
+def test_performance_aggregates():
+    """Prueba los agregados incrementales de rendimiento por perfil"""
+    print("\n🔍 Probando agregados de rendimiento...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from profile_manager import update_performance_aggregates, load_performance_aggregates
+        
+        agregados_file = os.path.join(tempfile.mkdtemp(), "agregados_test.json")
+        alturas_cmj = [0.30, 0.35, 0.32, 0.41, 0.38]
+        
+        # Registrar sesiones de distintos tipos de salto
+        update_performance_aggregates("Test User", {"tipo_salto": "Counter Movement Jump (CMJ)", "alturas_saltos": alturas_cmj[:3]}, agregados_file)
+        update_performance_aggregates("Test User", {"tipo_salto": "Counter Movement Jump (CMJ)", "alturas_saltos": alturas_cmj[3:]}, agregados_file)
+        update_performance_aggregates("Test User", {"tipo_salto": "Squat Jump (SQJ)", "alturas_saltos": [0.30]}, agregados_file)
+        
+        agregados = load_performance_aggregates("Test User", agregados_file)
+        cmj = agregados.por_tipo['CMJ']
+        
+        if cmj.count != 5 or cmj.mejor != 0.41 or agregados.sesiones != 3:
+            print("❌ Contadores de agregados incorrectos")
+            return False
+        
+        if abs(cmj.promedio - np.mean(alturas_cmj)) > 1e-9 or abs(cmj.desviacion - np.std(alturas_cmj, ddof=1)) > 1e-9:
+            print("❌ Estadísticas de agregados incorrectas")
+            return False
+        
+        esperado = (np.mean(alturas_cmj) - 0.30) / 0.30 * 100
+        if abs(agregados.indice_elasticidad() - esperado) > 1e-6:
+            print("❌ Índice de elasticidad incorrecto")
+            return False
+        
+        os.remove(agregados_file)
+        
+        print("✅ Agregados de rendimiento funcionales")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en agregados de rendimiento: {e}")
+        return False
+
+def test_profile_store_crash_safety():
+    """Prueba de estrés: interrumpe el escritor en puntos aleatorios y verifica integridad"""
+    print("\n🔍 Probando escrituras atómicas de perfiles...")
+    
+    try:
+        import json
+        import random
+        import shutil
+        import signal
+        import subprocess
+        import tempfile
+        import time
+        from profile_manager import ProfileManager, UsuarioPerfil
+        
+        directorio = tempfile.mkdtemp()
+        archivo = os.path.join(directorio, "perfiles_estres.json")
+        escritor = (
+            "import sys; sys.path.insert(0, %r)\n"
+            "from profile_manager import ProfileManager, UsuarioPerfil\n"
+            "pm = ProfileManager(%r)\n"
+            "i = len(pm.get_profile_names())\n"
+            "while True:\n"
+            "    pm.save_profile(UsuarioPerfil('Atleta %%d' %% i, 'F', 20, 165, 60, 'avanzado'))\n"
+            "    i += 1\n"
+        ) % (os.getcwd(), archivo)
+        
+        # Matar el proceso escritor (SIGKILL) en instantes aleatorios
+        rng = random.Random(42)
+        for _ in range(6):
+            proceso = subprocess.Popen([sys.executable, "-c", escritor], stderr=subprocess.DEVNULL)
+            time.sleep(0.4 + rng.random() * 0.4)
+            proceso.send_signal(signal.SIGKILL)
+            proceso.wait()
+            
+            if os.path.exists(archivo):
+                with open(archivo, 'r', encoding='utf-8') as f:
+                    perfiles = json.load(f)
+                # Cada escritura agrega un atleta: el archivo debe ser un prefijo contiguo
+                esperados = {f"Atleta {i}" for i in range(len(perfiles))}
+                if set(perfiles) != esperados:
+                    print("❌ Archivo de perfiles inconsistente tras interrupción")
+                    return False
+        
+        if not os.path.exists(archivo):
+            print("❌ El escritor no llegó a guardar perfiles")
+            return False
+        
+        # Ventana de agrupación: una ráfaga de cambios produce una sola escritura
+        pm = ProfileManager(os.path.join(directorio, "perfiles_rafaga.json"), coalesce_window=60)
+        for i in range(20):
+            pm.save_profile(UsuarioPerfil(f"Atleta {i}", "M", 25, 175, 70, "intermedio"))
+        pm.delete_profile("Atleta 0")
+        
+        if pm.escrituras != 0 or len(pm.get_profile_names()) != 19:
+            print("❌ La ráfaga de cambios no se agrupó")
+            return False
+        
+        pm.flush()
+        if pm.escrituras != 1 or len(ProfileManager(pm.profiles_file).get_profile_names()) != 19:
+            print(f"❌ Conteo de escrituras incorrecto: {pm.escrituras}")
+            return False
+        
+        # El volcado al salir alcanza a los gestores vivos sin retener a los descartados
+        import gc
+        import weakref
+        import profile_manager
+        pm.save_profile(UsuarioPerfil("Atleta Final", "M", 25, 175, 70, "intermedio"))
+        profile_manager._volcar_gestores_agrupados()
+        if "Atleta Final" not in ProfileManager(pm.profiles_file).get_profile_names():
+            print("❌ Los cambios pendientes no se vuelcan al salir")
+            return False
+        referencia = weakref.ref(pm)
+        del pm
+        gc.collect()
+        if referencia() is not None:
+            print("❌ El hook de salida mantiene vivo un gestor descartado")
+            return False
+        
+        shutil.rmtree(directorio, ignore_errors=True)
+        
+        print("✅ Escrituras atómicas y agrupación funcionales")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en escrituras atómicas: {e}")
+        return False
+
+def test_profile_store_concurrency():
+    """Prueba que varios procesos guardando a la vez no pierdan perfiles"""
+    print("\n🔍 Probando guardado concurrente de perfiles...")
+    
+    try:
+        import shutil
+        import subprocess
+        import tempfile
+        from profile_manager import ProfileManager
+        
+        directorio = tempfile.mkdtemp()
+        archivo = os.path.join(directorio, "perfiles_compartidos.json")
+        escritor = (
+            "import sys; sys.path.insert(0, %r)\n"
+            "from profile_manager import ProfileManager, UsuarioPerfil\n"
+            "pm = ProfileManager(%r)\n"
+            "for i in range(20):\n"
+            "    pm.save_profile(UsuarioPerfil('Estacion %%s Atleta %%d' %% (sys.argv[1], i), 'M', 25, 175, 70, 'intermedio'))\n"
+        ) % (os.getcwd(), archivo)
+        
+        procesos = [subprocess.Popen([sys.executable, "-c", escritor, str(n)], stderr=subprocess.DEVNULL) for n in range(4)]
+        for proceso in procesos:
+            proceso.wait()
+        
+        nombres = ProfileManager(archivo).get_profile_names()
+        if len(nombres) != 80:
+            print(f"❌ Se perdieron perfiles: {80 - len(nombres)} de 80")
+            return False
+        
+        # Hilos del mismo proceso: lockf no los excluye, file_lock sí
+        import threading
+        from profile_manager import update_performance_aggregates, load_performance_aggregates
+        agregados_file = os.path.join(directorio, "agregados.json")
+        resultados = {'tipo_salto': "Counter Movement Jump (CMJ)", 'alturas_saltos': [0.3]}
+        def actualizar():
+            for _ in range(10):
+                update_performance_aggregates("Atleta", resultados, agregados_file)
+        hilos = [threading.Thread(target=actualizar) for _ in range(16)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        sesiones = load_performance_aggregates("Atleta", agregados_file).sesiones
+        if sesiones != 160:
+            print(f"❌ Actualizaciones perdidas entre hilos: {sesiones} de 160 sesiones")
+            return False
+        
+        # Un stream abierto por este mismo proceso está en uso, y sondearlo no libera su bloqueo
+        from telemetry_writer import TelemetryWriter, _stream_en_uso
+        stream = os.path.join(directorio, "telemetria_Atleta.jsonl")
+        writer = TelemetryWriter(stream, perfil_nombre="Atleta")
+        en_uso = _stream_en_uso(stream) and _stream_en_uso(stream)
+        writer.close()
+        if not en_uso or _stream_en_uso(stream):
+            print("❌ Estado de uso del stream de telemetría incorrecto en el mismo proceso")
+            return False
+        
+        shutil.rmtree(directorio, ignore_errors=True)
+        
+        print("✅ Guardado concurrente sin pérdidas")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en guardado concurrente: {e}")
+        return False
+
+def test_bulk_profile_import():
+    """Prueba la importación masiva de perfiles y la exportación en streaming"""
+    print("\n🔍 Probando importación/exportación masiva de perfiles...")
+    
+    try:
+        import shutil
+        import tempfile
+        from profile_manager import ProfileManager
+        
+        directorio = tempfile.mkdtemp()
+        archivo_csv = os.path.join(directorio, "plantel.csv")
+        with open(archivo_csv, 'w', encoding='utf-8') as f:
+            f.write("nombre,sexo,edad,altura_cm,peso_kg,nivel_actividad\n")
+            for i in range(500):
+                f.write(f"Atleta {i},Femenino,20,165,60,avanzado\n")
+            f.write("Atleta Invalido,X,20,165,60,avanzado\n")
+            f.write("Atleta 3,M,20,170,70,intermedio\n")
+        
+        pm = ProfileManager(os.path.join(directorio, "perfiles.json"))
+        importados, errores = pm.import_profiles(archivo_csv)
+        
+        # Las filas inválidas se reportan sin abortar el lote, confirmado en una escritura
+        if importados != 500 or [fila for fila, _ in errores] != [502, 503] or pm.escrituras != 1:
+            print(f"❌ Importación incorrecta: {importados} perfiles, errores {errores}")
+            return False
+        
+        archivo_jsonl = os.path.join(directorio, "plantel.jsonl")
+        success, exportados = pm.export_profiles(archivo_jsonl)
+        if not success or exportados != 500:
+            print("❌ Error en la exportación de perfiles")
+            return False
+        
+        pm_destino = ProfileManager(os.path.join(directorio, "perfiles_destino.json"))
+        importados, errores = pm_destino.import_profiles(archivo_jsonl)
+        if importados != 500 or errores or pm_destino.load_all_profiles()["Atleta 7"]["sexo"] != "F":
+            print("❌ La exportación no se puede volver a importar")
+            return False
+        
+        # CSV exportado desde Excel: empieza con BOM
+        archivo_bom = os.path.join(directorio, "plantel_excel.csv")
+        with open(archivo_bom, 'w', encoding='utf-8-sig') as f:
+            f.write("nombre,sexo,edad,altura_cm,peso_kg,nivel_actividad\n")
+            f.write("Atleta Excel,M,22,180,75,avanzado\n")
+        pm_bom = ProfileManager(os.path.join(directorio, "perfiles_bom.json"))
+        importados, errores = pm_bom.import_profiles(archivo_bom)
+        if importados != 1 or errores:
+            print(f"❌ Un CSV con BOM no se importó: {errores}")
+            return False
+        
+        shutil.rmtree(directorio, ignore_errors=True)
+        
+        print("✅ Importación/exportación masiva funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en importación masiva: {e}")
+        return False
+
+def test_analysis_pipeline():
+    """Prueba el pipeline cámara → analizador en hilos de fondo"""
+    print("\n🔍 Probando pipeline de análisis en segundo plano...")
+    
+    try:
+        import threading
+        import time
+        import numpy as np
+        from analysis_pipeline import PipelineAnalisis
+        
+        class CapturaFalsa:
+            def __init__(self, n_frames):
+                self.n_frames = n_frames
+                self.leidos = 0
+            def isOpened(self):
+                return True
+            def read(self):
+                if self.leidos >= self.n_frames:
+                    return False, None
+                self.leidos += 1
+                time.sleep(0.002)
+                return True, np.full((48, 64, 3), self.leidos % 255, dtype=np.uint8)
+            def release(self):
+                pass
+        
+        class AnalizadorLento:
+            def __init__(self):
+                self.hilos = set()
+                self.reinicios = 0
+                self.procesados = 0
+            def process_frame(self, frame, timestamp=None):
+                self.hilos.add(threading.current_thread().name)
+                time.sleep(0.01)  # Inferencia más lenta que la captura
+                self.procesados += 1
+                return {'estado': 'INICIAL', 'contador': self.procesados}
+            def reset_session(self):
+                self.reinicios += 1
+            def snapshot(self):
+                return {'procesados': self.procesados, 'hilo': threading.current_thread().name}
+        
+        analizador = AnalizadorLento()
+        pipeline = PipelineAnalisis(analizador, captura=CapturaFalsa(200))
+        if not pipeline.start():
+            print("❌ El pipeline no arrancó con una fuente abierta")
+            return False
+        
+        # Lecturas desde el hilo principal: nunca bloquean
+        ultima_secuencia, lecturas = 0, 0
+        t0 = time.perf_counter()
+        while pipeline.activo and time.perf_counter() - t0 < 5:
+            t_lectura = time.perf_counter()
+            ultima_secuencia, resultado = pipeline.resultados.leer_si_nuevo(ultima_secuencia)
+            if time.perf_counter() - t_lectura > 0.005:
+                print("❌ La lectura del resultado bloqueó al hilo de la interfaz")
+                return False
+            if resultado is not None:
+                lecturas += 1
+                if lecturas == 3:
+                    pipeline.solicitar_recalibracion()
+                    pipeline.solicitar_snapshot()
+            time.sleep(0.001)
+        pipeline.stop()
+        
+        _, snapshot = pipeline.snapshots.leer_si_nuevo(0)
+        if snapshot is None or snapshot['hilo'] == threading.current_thread().name:
+            print("❌ El snapshot periódico no se tomó en el hilo de inferencia")
+            return False
+        
+        if threading.current_thread().name in analizador.hilos or not analizador.procesados:
+            print("❌ process_frame no se ejecutó en el hilo de inferencia")
+            return False
+        
+        if pipeline.frames_descartados == 0 or pipeline.frames_procesados + pipeline.frames_descartados > pipeline.frames_capturados:
+            print(f"❌ Contabilidad de frames incorrecta: {pipeline.frames_procesados}/{pipeline.frames_descartados}/{pipeline.frames_capturados}")
+            return False
+        
+        if analizador.reinicios != 1:
+            print("❌ La recalibración no se aplicó en el hilo de inferencia")
+            return False
+        
+        # Sin cámara el pipeline no arranca y la pantalla usa el modo demostración
+        class CapturaCerrada(CapturaFalsa):
+            def isOpened(self):
+                return False
+        if PipelineAnalisis(analizador, captura=CapturaCerrada(0)).start():
+            print("❌ El pipeline arrancó sin cámara")
+            return False
+        
+        print("✅ Pipeline de análisis en segundo plano funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en pipeline de análisis: {e}")
+        return False
+
+def test_real_time_policy():
+    """Prueba la política de descarte de frames en tiempo real"""
+    print("\n🔍 Probando política de tiempo real...")
+    
+    try:
+        import time
+        import numpy as np
+        from analysis_pipeline import PipelineAnalisis, PoliticaTiempoReal, RanuraTiempoReal
+        
+        # Fuera de fase crítica: gana el frame más reciente y los viejos se descartan
+        ranura = RanuraTiempoReal(PoliticaTiempoReal(latencia_max_s=0.1, buffer_critico=3))
+        for i in range(3):
+            ranura.publicar(i, time.monotonic())
+        if ranura.tomar(timeout=0.1)[0] != 2 or ranura.descartados['reemplazado'] != 2:
+            print("❌ La ranura no entregó el frame más reciente")
+            return False
+        ranura.publicar(3, time.monotonic() - 1.0)
+        if ranura.tomar(timeout=0.05) is not None or ranura.descartados['latencia'] != 1:
+            print("❌ Un frame fuera de la latencia máxima se entregó al análisis")
+            return False
+        
+        # En vuelo los frames se analizan en orden aunque lleguen tarde; solo se pierden si el buffer se llena
+        ranura.actualizar_estado('VUELO')
+        for i in range(5):
+            ranura.publicar(i, time.monotonic() - 1.0)
+        entregados = [ranura.tomar(timeout=0.1)[0] for _ in range(3)]
+        if entregados != [2, 3, 4] or ranura.descartados['buffer_critico'] != 2:
+            print(f"❌ Buffer crítico incorrecto: {entregados} {ranura.descartados}")
+            return False
+        ranura.cerrar()
+        if ranura.tomar() is not None:
+            print("❌ La ranura cerrada siguió entregando frames")
+            return False
+        
+        class CapturaFalsa:
+            def __init__(self, n_frames):
+                self.n_frames = n_frames
+                self.leidos = 0
+            def isOpened(self):
+                return True
+            def read(self):
+                if self.leidos >= self.n_frames:
+                    return False, None
+                self.leidos += 1
+                time.sleep(0.001)
+                return True, np.array([self.leidos])
+            def release(self):
+                pass
+        
+        class AnalizadorConVuelo:
+            """Inferencia más lenta que la captura (mucho más en vuelo); del resultado 20 al 39 reporta VUELO"""
+            def __init__(self):
+                self.procesados = []
+                self.timestamps = []
+            def process_frame(self, frame, timestamp=None):
+                estado = 'VUELO' if 20 <= len(self.procesados) < 40 else 'INICIAL'
+                time.sleep(0.02 if estado == 'VUELO' else 0.005)
+                self.procesados.append((int(frame[0]), estado))
+                self.timestamps.append(timestamp)
+                return {'estado': estado}
+            def reset_session(self):
+                pass
+        
+        analizador = AnalizadorConVuelo()
+        pipeline = PipelineAnalisis(analizador, captura=CapturaFalsa(400),
+                                    politica=PoliticaTiempoReal(latencia_max_s=0.05, buffer_critico=200))
+        resultados = []
+        ultima_secuencia = 0
+        pipeline.start()
+        t0 = time.perf_counter()
+        while pipeline.activo and time.perf_counter() - t0 < 10:
+            ultima_secuencia, resultado = pipeline.resultados.leer_si_nuevo(ultima_secuencia)
+            if resultado is not None:
+                resultados.append(resultado)
+        pipeline.stop()
+        
+        procesados = analizador.procesados
+        en_vuelo = [procesados[i][0] for i in range(1, len(procesados)) if procesados[i - 1][1] == 'VUELO']
+        if len(en_vuelo) < 20 or en_vuelo != list(range(en_vuelo[0], en_vuelo[0] + len(en_vuelo))):
+            print("❌ Se descartaron frames durante el vuelo")
+            return False
+        
+        # Los frames encolados en vuelo llevan su instante de captura, no el del análisis (≥20 ms entre sí)
+        indices_vuelo = [i for i in range(1, len(procesados)) if procesados[i - 1][1] == 'VUELO']
+        t_vuelo = [analizador.timestamps[i] for i in indices_vuelo]
+        intervalo_medio = (t_vuelo[-1] - t_vuelo[0]) / (len(t_vuelo) - 1)
+        if None in t_vuelo or intervalo_medio >= 0.015:
+            print(f"❌ Los frames en vuelo no se analizaron con su instante de captura ({intervalo_medio * 1000:.1f} ms)")
+            return False
+        
+        if pipeline.ranura.descartados['reemplazado'] == 0 or pipeline.ranura.descartados['buffer_critico']:
+            print(f"❌ Descartes inesperados: {pipeline.ranura.descartados}")
+            return False
+        
+        if any(k not in resultados[-1] for k in ('descartados', 'descartados_total', 'latencia_ms')):
+            print("❌ El resultado por frame no incluye los descartes")
+            return False
+        
+        # Fuera del vuelo el atraso acumulado no se arrastra: la latencia vuelve al límite
+        if resultados[-1]['latencia_ms'] > 50 + 20:
+            print(f"❌ Latencia sin acotar tras el vuelo: {resultados[-1]['latencia_ms']:.0f} ms")
+            return False
+        
+        print("✅ Política de tiempo real funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en política de tiempo real: {e}")
+        return False
+
+def test_camera_preview_buffer():
+    """Prueba que la vista previa reutilice su búfer y no copie frames pequeños"""
+    print("\n🔍 Probando búfer de vista previa de cámara...")
+    
+    try:
+        import numpy as np
+        from main import VistaPreviaCamara
+        
+        vista = VistaPreviaCamara(ancho_max=640)
+        frame_hd = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+        
+        primero = vista.preparar(frame_hd)
+        segundo = vista.preparar(frame_hd)
+        if primero.shape != (360, 640, 3) or primero is not segundo:
+            print("❌ La reducción de la vista previa no reutiliza el búfer")
+            return False
+        
+        frame_vga = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        if vista.preparar(frame_vga) is not frame_vga:
+            print("❌ La vista previa copió un frame que no requería reducción")
+            return False
+        
+        print("✅ Búfer de vista previa reutilizado")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en vista previa de cámara: {e}")
+        return False
+
+def test_recycled_results_rows():
+    """Prueba las filas de datos de la lista reciclada de resultados"""
+    print("\n🔍 Probando filas de resultados recicladas...")
+    
+    try:
+        from main import filas_resultados, filas_historial
+        
+        resultados = {
+            "total": 120, "correctas": 100, "precision": 83.3,
+            "altura_salto_promedio": 0.31, "alturas_saltos": [0.31] * 120,
+            "clasificacion": "Medio", "evaluacion_rendimiento": "BUENO",
+            "recomendaciones": [f"Recomendación {i}" for i in range(8)]
+        }
+        filas = filas_resultados(resultados)
+        
+        # 6 métricas + título y 120 saltos + título y 5 recomendaciones
+        if len(filas) != 6 + 1 + 120 + 1 + 5:
+            print(f"❌ Número de filas incorrecto: {len(filas)}")
+            return False
+        
+        historial = [{'fecha': '2024-01-01 10:00:00', 'resultados': {'tipo_salto': 'CMJ', 'total': 3, 'correctas': 2}}] * 50
+        filas += filas_historial(historial) + filas_historial([])
+        
+        # Todas las filas definen todas las claves de estilo (las vistas se reutilizan)
+        claves = set(filas[0])
+        if any(set(fila) != claves for fila in filas):
+            print("❌ Hay filas sin todas las claves de estilo")
+            return False
+        
+        print("✅ Filas de resultados recicladas correctas")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en filas de resultados: {e}")
+        return False
+
+def test_hud_compositor():
+    """Prueba que el HUD en caché reconstruya solo el panel que cambió"""
+    print("\n🔍 Probando compositor del HUD...")
+    
+    try:
+        import numpy as np
+        from TestSalto import CompositorHUD, AnalizadorSaltos, UsuarioPerfil
+        
+        analizador = AnalizadorSaltos(UsuarioPerfil("Test User", "M", 25, 175, 70, "intermedio"))
+        analizador.iniciar()
+        compositor = CompositorHUD()
+        compositor.componer(np.zeros((720, 1280, 3), dtype=np.uint8), analizador, mostrar_marcador=True)
+        
+        # Cada cambio reconstruye solo su región; el resultado debe ser idéntico
+        # al de componer el HUD completo desde cero
+        cambios = [
+            lambda: setattr(analizador, 'contador', analizador.contador + 1),
+            lambda: analizador.errores.update(stiff_landing=1),
+            lambda: analizador.mensajes_feedback.append("Buen salto"),
+        ]
+        for cambiar in cambios:
+            cambiar()
+            frame = np.full((720, 1280, 3), 90, dtype=np.uint8)
+            compositor.componer(frame, analizador, mostrar_marcador=True)
+            referencia = np.full((720, 1280, 3), 90, dtype=np.uint8)
+            CompositorHUD().componer(referencia, analizador, mostrar_marcador=True)
+            if not np.array_equal(frame, referencia):
+                print("❌ La reconstrucción parcial no coincide con el HUD completo")
+                return False
+        
+        if compositor.reconstrucciones != 1 + len(cambios):
+            print("❌ El HUD se reconstruyó sin cambios en sus valores")
+            return False
+        
+        # Sin marcador solo queda el panel de ayuda
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        compositor.componer(frame, analizador, mostrar_marcador=False)
+        if frame[:, :300].any() or not frame[:, -200:].any():
+            print("❌ El marcador no se retiró del HUD")
+            return False
+        
+        print("✅ Compositor del HUD funcional")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error en compositor del HUD: {e}")
+        return False
+
 def test_kivy_app():
     """Prueba básica de la aplicación Kivy"""
     print("\n🔍 Probando aplicación Kivy...")
@@ -232,7 +1742,28 @@ def run_all_tests():
         ("Importación de módulos", test_imports),
         ("Archivo de configuración", test_config_file),
         ("Gestor de perfiles", test_profile_manager),
+        ("Modelo compacto de perfil", test_compact_profile_model),
         ("Analizador de saltos", test_jump_analyzer),
+        ("Acumulador de calibración", test_calibration_accumulator),
+        ("Snapshot del analizador", test_analyzer_snapshot),
+        ("Latencias por etapa", test_latency_instrumentation),
+        ("Pose sintética", test_synthetic_pose),
+        ("Reproducción golden", test_golden_replay),
+        ("Memoria en sesiones largas", test_memory_soak),
+        ("Endpoint de métricas", test_metrics_endpoint),
+        ("Servidor de landmarks", test_landmark_server),
+        ("Multiplexor de sesiones", test_session_multiplexer),
+        ("Fuentes de frames", test_frame_sources),
+        ("Telemetría de sesión", test_telemetry_writer),
+        ("Agregados de rendimiento", test_performance_aggregates),
+        ("Escrituras atómicas de perfiles", test_profile_store_crash_safety),
+        ("Guardado concurrente de perfiles", test_profile_store_concurrency),
+        ("Importación masiva de perfiles", test_bulk_profile_import),
+        ("Pipeline de análisis", test_analysis_pipeline),
+        ("Política de tiempo real", test_real_time_policy),
+        ("Vista previa de cámara", test_camera_preview_buffer),
+        ("Resultados reciclados", test_recycled_results_rows),
+        ("Compositor del HUD", test_hud_compositor),
         ("Aplicación Kivy", test_kivy_app),
         ("Disponibilidad de cámara", test_camera_availability),
     ]